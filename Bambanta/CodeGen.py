@@ -0,0 +1,257 @@
+'''
+Code generation from recorded tapes.
+
+A function is traced once into a Tape, then emitted as straight-line
+Python/NumPy source computing its values and full Jacobian. The generated
+module uses no autodiff objects at runtime. Modules are cached on disk,
+keyed by a hash of the tape, and imported from there on later calls.
+'''
+import os
+import sys
+import hashlib
+import importlib.util
+
+import numpy as np
+
+from . import Tape
+
+# bumped whenever the generated source changes, to invalidate cached modules
+VERSION = 1
+
+# forward rules, with {a} and {b} standing for the names of the parents
+VALUES = {
+    'add': '{a} + {b}',
+    'sub': '{a} - {b}',
+    'mul': '{a} * {b}',
+    'div': '{a} / {b}',
+    'pow': '{a} ** {b}',
+    'neg': '-{a}',
+    'abs': 'abs({a})',
+    'sin': 'np.sin({a})',
+    'cos': 'np.cos({a})',
+    'tan': 'np.tan({a})',
+    'arcsin': 'np.arcsin({a})',
+    'arccos': 'np.arccos({a})',
+    'arctan': 'np.arctan({a})',
+    'sinh': 'np.sinh({a})',
+    'cosh': 'np.cosh({a})',
+    'tanh': 'np.tanh({a})',
+    'exp': 'np.exp({a})',
+    'logistic': '1/(1+np.exp(-{a}))',
+    'log': 'np.log({a})/np.log({b})',
+    'sqrt': '{a}**0.5',
+}
+
+# partial derivatives with respect to the first and second parent, as in Tape.PARTIALS
+PARTIALS = {
+    'add': ('1.0', '1.0'),
+    'sub': ('1.0', '-1.0'),
+    'mul': ('{b}', '{a}'),
+    'div': ('1/{b}', '-{a}/({b}**2)'),
+    'pow': ('{a}**({b}-1)*{b}', '{a}**{b}*np.log({a})'),
+    'neg': ('-1.0',),
+    'abs': ('{a}/abs({a})',),
+    'sin': ('np.cos({a})',),
+    'cos': ('-np.sin({a})',),
+    'tan': ('1/(np.cos({a})**2)',),
+    'arcsin': ('1/np.sqrt(1 - {a}*{a})',),
+    'arccos': ('-1/np.sqrt(1-{a}*{a})',),
+    'arctan': ('1/(1+{a}*{a})',),
+    'sinh': ('np.cosh({a})',),
+    'cosh': ('np.sinh({a})',),
+    'tanh': ('1/(np.cosh({a})**2)',),
+    'exp': ('np.exp({a})',),
+    'logistic': ('np.exp(-{a})/((np.exp(-{a})+1)**2)',),
+    'log': ('1/({a}*np.log({b}))',),
+    'sqrt': ('({a}**(-0.5))*0.5',),
+}
+
+# imported generated modules, keyed by file path
+_modules = {}
+
+def _literal(c):
+    '''
+    Return Python source for a float constant.
+    '''
+    if np.isnan(c):
+        return 'np.nan'
+    if np.isinf(c):
+        return 'np.inf' if c > 0 else '-np.inf'
+    return repr(float(c))
+
+def _name(program, i):
+    '''
+    Return the variable name holding the value of node i.
+    '''
+    return 'c{0}'.format(i) if program[i][0] == 'const' else 'v{0}'.format(i)
+
+def generate(tape):
+    '''
+    generate(tape)
+
+    Emit Python/NumPy source for a tape.
+
+    Parameters
+    --------------
+    tape: a Tape
+
+    Returns
+    --------------
+    out: str
+        source of a module defining value(*x), returning output values, and
+        value_and_jac(*x), returning (values, Jacobian) as stack_r does.
+
+    Example
+    --------------
+    >>> from Bambanta import Tape, CodeGen
+    >>> t = Tape.record(lambda x, y: x*y, [1.0, 2.0])
+    >>> print(CodeGen.generate(t).split('def value_and_jac')[1].strip())
+    (x0, x1):
+        v0 = x0
+        v1 = x1
+        v2 = v0 * v1
+        d2_0 = v1
+        d2_1 = v0
+        g0_2 = 1.0
+        g0_0 = d2_0*g0_2
+        g0_1 = d2_1*g0_2
+        return np.array([v2]), np.array([[g0_0, g0_1]])
+    '''
+    program = tape.program()
+    outputs = tape.outputs.tolist()
+    args = ', '.join('x{0}'.format(p) for p in range(tape.n_inputs))
+    inputs = [(i, a) for i, (name, a, _, _) in enumerate(program) if name == 'input']
+
+    header = ['# generated by Bambanta.CodeGen (version {0}); do not edit'.format(VERSION),
+              'import numpy as np', '']
+    for i, (name, a, _, _) in enumerate(program):
+        if name == 'const':
+            header.append('{0} = {1}'.format(_name(program, i), _literal(tape.consts[a])))
+
+    forward = []
+    for i, (name, a, b, _) in enumerate(program):
+        if name == 'input':
+            forward.append('    v{0} = x{1}'.format(i, a))
+        elif name != 'const':
+            names = {'a': _name(program, a), 'b': _name(program, b) if b >= 0 else None}
+            forward.append('    v{0} = {1}'.format(i, VALUES[name].format(**names)))
+    values = 'np.array([{0}])'.format(', '.join(_name(program, i) for i in outputs))
+
+    # partials of every active edge, computed once and shared by all outputs
+    partials = []
+    edges = {}
+    for i, (name, a, b, active) in enumerate(program):
+        if not active or name == 'input':
+            continue
+        names = {'a': _name(program, a), 'b': _name(program, b) if b >= 0 else None}
+        for k, parent in enumerate((a, b)[:len(PARTIALS[name])]):
+            if program[parent][3]:
+                expr = PARTIALS[name][k].format(**names)
+                if expr in ('1.0', '-1.0'):
+                    edges[i, k] = expr
+                else:
+                    partials.append('    d{0}_{1} = {2}'.format(i, k, expr))
+                    edges[i, k] = 'd{0}_{1}'.format(i, k)
+
+    backward = []
+    rows = []
+    for n, out in enumerate(outputs):
+        # adjoints of output n are named g<n>_<node>
+        adjoints = {}
+        if program[out][3]:
+            adjoints[out] = 'g{0}_{1}'.format(n, out)
+            backward.append('    {0} = 1.0'.format(adjoints[out]))
+        for i in range(out, -1, -1):
+            name, a, b, active = program[i]
+            if i not in adjoints or name == 'input':
+                continue
+            for k, parent in enumerate((a, b)[:len(PARTIALS[name])]):
+                if (i, k) not in edges:
+                    continue
+                edge = edges[i, k]
+                term = {'1.0': adjoints[i], '-1.0': '-' + adjoints[i]}.get(edge, '{0}*{1}'.format(edge, adjoints[i]))
+                target = 'g{0}_{1}'.format(n, parent)
+                if parent in adjoints:
+                    backward.append('    {0} = {0} + {1}'.format(target, term))
+                else:
+                    backward.append('    {0} = {1}'.format(target, term))
+                    adjoints[parent] = target
+        grad = ['0.0']*tape.n_inputs
+        for i, p in inputs:
+            if i in adjoints:
+                grad[p] = adjoints[i]
+        rows.append('[{0}]'.format(', '.join(grad)))
+    jac = 'np.array([{0}])'.format(', '.join(rows))
+
+    lines = header + ['',
+        'def value({0}):'.format(args)] + forward + [
+        '    return {0}'.format(values), '',
+        'def value_and_jac({0}):'.format(args)] + forward + partials + backward + [
+        '    return {0}, {1}'.format(values, jac), '']
+    return '\n'.join(lines)
+
+def _cache_dir(cache_dir):
+    if cache_dir is None:
+        cache_dir = os.environ.get('BAMBANTA_CACHE',
+            os.path.join(os.path.expanduser('~'), '.cache', 'bambanta'))
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def compile_tape(tape, cache_dir=None):
+    '''
+    compile_tape(tape, cache_dir = None)
+
+    Generate, cache and import the module for a tape.
+
+    Parameters
+    --------------
+    tape: a Tape
+
+    cache_dir: str, optional
+        directory of generated modules; defaults to $BAMBANTA_CACHE or ~/.cache/bambanta
+
+    Returns
+    --------------
+    out: the imported module, defining value() and value_and_jac()
+    '''
+    key = hashlib.sha1(b'%d' % VERSION + tape.tobytes()).hexdigest()
+    module_name = 'bambanta_{0}'.format(key)
+    path = os.path.join(_cache_dir(cache_dir), module_name + '.py')
+    if path in _modules:
+        return _modules[path]
+    if not os.path.exists(path):
+        # write to a temporary file first, so concurrent processes never import a partial module
+        tmp = '{0}.{1}.tmp'.format(path, os.getpid())
+        with open(tmp, 'w') as fh:
+            fh.write(generate(tape))
+        os.replace(tmp, path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    _modules[path] = module
+    return module
+
+def codegen(function, vals, cache_dir=None):
+    '''
+    codegen(function, vals, cache_dir = None)
+
+    Trace a function once and return generated straight-line code for its values and Jacobian.
+
+    Parameters
+    --------------
+    function: callable
+        function of len(vals) arguments, returning a reverse-mode autodiff object or a list of them.
+        *the traced operations must not depend on the input values, e.g. through branches*
+
+    vals: array_like
+        values of the input variables used for tracing
+
+    cache_dir: str, optional
+        directory of generated modules; defaults to $BAMBANTA_CACHE or ~/.cache/bambanta
+
+    Returns
+    --------------
+    out: callable value_and_jac(*x), returning (values, Jacobian) as stack_r does
+    '''
+    return compile_tape(Tape.record(function, vals), cache_dir).value_and_jac
@@ -0,0 +1,458 @@
+'''
+Forward-mode automatic differentiation: fAD objects carry their values together with
+the derivatives of those values with respect to every input.
+'''
+import numpy as np
+import numbers
+
+def create_f(vals):
+    '''
+    create_f(values)
+    
+    Create a forward-mode autodiff object.
+
+    Parameters
+    --------------
+    values: array_like
+        input variable values for automatic differentiation.
+        Allows for up to 2-dimensional input.
+
+    Returns
+    --------------
+    out: forward-mode automatic differentiation object satisfying the specific requirements.
+
+    
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> a = AutoDiff.create_f(3) 
+    >>> a.val
+    array([3])
+    >>> a.der
+    array([[1]])
+    '''
+    if np.array(vals).ndim == 0:
+        return fAD(vals,[1])
+    elif np.array(vals).ndim == 1:
+        ADs = []
+        num_var = len(vals)
+        for i in range(num_var):
+            val = vals[i]
+            der = [0]*num_var
+            der[i] = 1
+            ADs.append(fAD(val, der))
+        return ADs
+    elif np.array(vals).ndim == 2:
+        vals = np.array(vals)
+        ADs = []
+        num_var, num_dim = np.shape(vals)[0],np.shape(vals)[1]
+        for i in range(num_var):
+            AD_var = []
+            for j in range(num_dim):
+                val = vals[i,j]
+                der = [0]*num_var
+                der[i] = 1
+                AD_var.append(fAD(val,der))
+            ADs.append(stack_f(AD_var))
+        return ADs
+    elif np.array(vals).ndim > 2:
+        raise ValueError('Input is at most 2D.')
+
+def stack_f(ADs):
+    '''
+    stack_f(objects)
+    
+    Stack forward-mode autodiff objects.
+    
+    Parameters
+    --------------
+    objects: array_like
+        input forward-mode autodiff objects as initiated by create_f()
+        *dimensions of all objects must be the same*
+                
+    Returns
+    --------------
+    out: a forward-mode autodiff object.
+        Values of forward-mode autodiff objects are stacked and returned as a vector.
+        Derivatives of the objects are returned in a matrix.
+    '''
+    new_val = []
+    new_der = []
+    for AD in ADs:
+        for val in AD.val:
+            new_val.append(val)
+        for der in AD.der:
+            new_der.append(der)
+    new_AD = fAD(new_val,new_der)
+    return new_AD
+
+class fAD():
+    '''
+    fAD(value, derivative = 1)
+
+    Create a forward-mode autodiff object.
+
+    Parameters
+    --------------
+    value: number, or array_like if multiple values
+        input variable values for differentiation.
+        *Allows only 1-dimensional input of values, for 2-dimensional input, use create_f*
+
+    derivative: optional for single value input
+        must be defined when there are multiple values for differentiation.
+
+    Attributes
+    --------------
+    val: array, shape of (1, n_values)
+        n_values determined by length of value input
+
+    der: array
+        shape determined by input shape of derivatives
+
+    Returns
+    --------------
+    out: a forward-mode autodiff object
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> a = fAD(5.0)
+    >>> a.val
+    array([ 5.])
+    >>> a.der
+    array([[1]])
+    '''   
+    def __init__(self,val,der=1):
+        ## process val
+        # check dimension
+        if np.array(val).ndim > 1:
+            raise ValueError('First argument cannot be 2D or higher.')
+        val = np.array([val]).reshape(-1)
+        if len(val) == 0:
+            raise ValueError('First argument cannot be empty.')
+
+        # check variable type; arrays of a numeric dtype hold numbers only
+        if val.dtype.kind not in 'iufc':
+            for i in val:
+                if not isinstance(i,numbers.Number):
+                    raise TypeError('Arguments need to be consisted of numbers.')
+        # store variable as attribute
+        self.val = val
+
+        ## process der
+        # check dimension
+        if len(self.val) == 1:
+            ## scaler function
+            if np.array(der).ndim <= 1 or np.shape(der)[0] == 1:
+                der = np.array([[der]]).reshape(1,-1)
+            else:
+                raise ValueError('Input dimensions do not match.')
+        elif len(self.val) > 1:
+            ## vector function
+            if np.shape(der)[0] == len(self.val):
+                der = np.array([[der]]).reshape(len(self.val),-1)
+            else:
+                raise ValueError('Input dimensions do not match.')
+        # check variable type
+        if der.dtype.kind not in 'iufc':
+            for i in der.reshape(-1):
+                if not isinstance(i,numbers.Number):
+                    raise TypeError('Arguments need to be consisted of numbers.')
+        # store variable as attribute
+        self.der = der
+
+    def __add__(self,other):
+        '''
+        Support addition between:
+        1. forward autodiff objects
+        2. a forward autodiff object and a number
+        '''
+        try: # assume other is of AutoDiff type
+            return fAD(self.val+other.val,self.der+other.der)
+        except AttributeError: # assume other is a number
+            return fAD(self.val+other,self.der)
+            # if other is not a number, a TypeError will be raised
+
+    def __radd__(self,other):
+        '''
+        Support addition between:
+        1. forward autodiff objects
+        2. a number and a forward autodiff object
+        '''
+        try: # assume other is of AutoDiff type
+            return fAD(self.val+other.val,self.der+other.der)
+        except AttributeError: # assume other is a number
+            return fAD(self.val+other,self.der)
+            # if other is not a number, a TypeError will be raised
+
+    def __sub__(self,other):
+        '''
+        Support subtraction between:
+        1. forward autodiff objects
+        2. a forward autodiff object and a number
+        '''
+        try: # assume other is of AutoDiff type
+            return fAD(self.val-other.val,self.der-other.der)
+        except AttributeError: # assume other is a number
+            return fAD(self.val-other,self.der)
+            # if other is not a number, a TypeError will be raised
+
+    def __rsub__(self,other):
+        '''
+        Support subtraction between:
+        1. forward autodiff objects
+        2. a number and a forward autodiff object
+        '''
+        try: # assume other is of AutoDiff type
+            return fAD(other.val-self.val,other.der-self.der)
+        except AttributeError: # assume other is a number
+            return fAD(other-self.val,-self.der)
+            # if other is not a number, a TypeError will be raised
+
+
+    def __mul__(self,other):
+        '''
+        Support multiplication of:
+        1. forward autodiff objects
+        2. a forward autodiff object and a number
+        '''
+        try: # assume other is of AutoDiff type
+             return fAD(self.val*other.val,mul_by_row(self.val,other.der)+mul_by_row(other.val,self.der))
+        except AttributeError: # assume other is a number, or an array of one per value
+            return fAD(self.val*other,self.der*_by_row(other,self.der))
+            # if other is not a number, a TypeError will be raised
+
+    def __rmul__(self,other):
+        '''
+        Support multiplication of:
+        1. forward autodiff objects
+        2. a number and a forward autodiff 
+        '''
+        try: # assume other is of AutoDiff type
+            return fAD(self.val*other.val,mul_by_row(self.val,other.der)+mul_by_row(other.val,self.der))
+        except AttributeError: # assume other is a number, or an array of one per value
+            return fAD(self.val*other,self.der*_by_row(other,self.der))
+            # if other is not a number, a TypeError will be raised
+
+    def __truediv__(self,other): # self/other
+        '''
+        Support division between:
+        1. forward autodiff objects
+        2. a forward autodiff and a number
+        '''
+        try: # assume other is of AutoDiff type
+             return fAD(self.val/other.val, mul_by_row(1/other.val,self.der)-mul_by_row(self.val/(other.val**2),other.der))
+        except AttributeError: # assume other is a number, or an array of one per value
+            return fAD(self.val/other,self.der/_by_row(other,self.der))
+            # if other is not a number, a TypeError will be raised
+
+    def __rtruediv__(self,other): # other/self
+        '''
+        Support division between:
+        1. forward autodiff objects
+        2. a number and a forward autodiff object
+        '''
+        try: # assume other is of AutoDiff type
+            return fAD(other.val/self.val, mul_by_row(1/self.val,other.der)-mul_by_row(other.val/(self.val**2),self.der))
+        except AttributeError: # assume other is a number
+            return fAD(other/self.val,mul_by_row(-other/(self.val**2),self.der))
+            # if other is not a number, a TypeError will be raised
+
+    def __pow__(self,exp):
+        '''
+        Support exponentiation of a forward autodiff object
+        '''
+        try: # assume exp is of AutoDiff type
+        	return fAD(self.val**exp.val,
+        		mul_by_row(self.val**exp.val,
+                (mul_by_row(exp.val/self.val,self.der) + mul_by_row(np.log(self.val),exp.der))))
+        except AttributeError: # assume other is a number
+        	return fAD(self.val**exp, mul_by_row(exp*(self.val**(exp-1)),self.der))
+        	# if other is not a number, a TypeError will be raised
+
+    def __rpow__(self,base):
+        '''
+        Support exponentiation of a forward autodiff object
+        '''
+        try: # assume exp is of AutoDiff type
+        	return fAD(base.val**self.val,
+        		mul_by_row((base.val**self.val),
+                (mul_by_row(self.val/base.val,base.der) + mul_by_row(np.log(base.val),self.der))))
+        except AttributeError: # assume other is a number
+       		return fAD(base**self.val, mul_by_row(np.log(base)*(base**self.val),self.der))
+       		# if other is not a number, a TypeError will be raised
+
+    def __neg__(self):
+        '''
+        Returns
+        --------------
+        out: the negative, or the opposite, of the autodiff object as a forward autodiff object
+        '''
+        return fAD(-self.val, -self.der)
+
+    def __abs__(self):
+        '''
+        Returns
+        --------------
+        out: the absolute of the autodiff object as a forward autodiff object
+        '''
+        return fAD(abs(self.val), mul_by_row(self.val/abs(self.val),self.der))
+
+    def __repr__(self):
+        '''
+        Returns
+        --------------
+        out: 'fAD(values, derivatives)'
+            outputs autodiff object values, and partial derivatives
+        '''
+        return "{0}({1},{2})".format(self.__class__.__name__, self.get_val(), self.get_jac())
+
+    def __str__(self):
+        '''
+        Returns
+        --------------
+        out: "Forward-mode AutoDiff Object, value(s): values, partial derivative(s): derivatives" 
+            outputs autodiff object values, and partial derivatives.
+        '''
+        return "Forward-mode AutoDiff Object, value(s): {0}, partial derivative(s): {1}".format(self.get_val(), self.get_jac())
+
+    def __len__(self):
+        '''
+        Returns
+        --------------
+        out: number of variable values 
+        '''
+        return len(self.val)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        '''
+        Support NumPy ufuncs, e.g. np.sin(x) or array*x, through the autodiff primitives and operators
+        '''
+        from . import Primitives
+        return Primitives._array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        '''
+        Support NumPy functions, e.g. np.sum(x) or np.dot(x, y), through the autodiff primitives
+        '''
+        from . import Primitives
+        return Primitives._array_function(func, args, kwargs)
+
+    def __eq__(self, other):
+        '''
+        Allow comparisons between two equal forward autodiff objects
+        '''
+        if self.val==other.val and self.der==other.der:
+            return True
+        else:
+            return False
+
+    def __ne__(self, other):
+        '''
+        Allow comparisons between two unequal forward autodiff objects
+        '''
+        if self.val!=other.val or self.der!=other.der:
+            return True
+        else:
+            return False
+
+    def get_val(self):
+        '''
+        fAD.get_val()
+
+        Get values of differentiated object.
+    
+        Returns
+        --------------
+        out: numeric, or array_like
+            function values as a result of supported operations (e.g. multiplication)
+
+        Example
+        --------------
+        single function:
+        >>> from Bambanta import AutoDiff
+        >>> x, y = AutoDiff.create_f([5.0, 7.0])
+        >>> f = 4*x + y
+        >>> f.get_val()
+        27.0
+
+        multiple functions:
+        >>> x, y = AutoDiff.create_f([5.0, 7.0])
+        >>> f1 = 4*x + y
+        >>> f2 = x**3 - y
+        >>> f = AutoDiff.stack_f([f1, f2])
+        '''
+        if np.shape(self.val)[0] == 1:
+            return self.val[0]
+        else:
+            return self.val
+
+    def get_jac(self):
+        '''
+        fAD.get_val()
+
+        Get the Jacobian matrix of partial derivatives.
+    
+        Returns
+        --------------
+        out: array_like (vector for univariate operations, matrix for multivariate operations)
+            partial derivatives with respect to function(s) as a result of supported operations (e.g. multiplication)
+
+        Example
+        --------------
+        >>> from Bambanta import AutoDiff
+        >>> x, y = AutoDiff.create_f([5.0, 7.0])
+        >>> f = 4*x + y
+        >>> f.get_jac()
+        array([4, 1])
+        '''
+        if np.shape(self.der)[0] == 1 and np.shape(self.der)[1] == 1:
+            return self.der[0,0]
+        elif np.shape(self.der)[0] == 1 and np.shape(self.der)[1] > 1:
+            return self.der[0]
+        else:
+            return self.der
+
+def mul_by_row(val,der):
+    '''
+    mul_by_row(val, der)
+    
+    Allows multiplication of forward-mode autodiff object with 2-dimensional derivatives.
+
+    Parameters
+    --------------
+    val: array_like.
+        values of variables for differentiation
+
+    der: array_like.
+        partial derivatives of variables for differentiation
+    '''
+    if np.ndim(der) <= 1:
+        return val*der
+    else:
+        # each value scales its row of derivatives; a single value scales them all
+        return _by_row(val,der)*der
+
+def _by_row(val, der):
+    '''
+    Shape values as a column, so that they broadcast over the rows of a derivative matrix.
+    '''
+    return np.reshape(val, (-1,) + (1,)*(np.ndim(der)-1))
+
+# NumPy's loop over an object array calls the method named as the ufunc on every element, e.g. x.sin()
+# for np.sin(objects), since a lone object array never reaches __array_ufunc__
+_UFUNC_METHODS = ('sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'sinh', 'cosh', 'tanh',
+                  'exp', 'sqrt', 'log', 'log2', 'log10')
+
+def _ufunc_method(name):
+    '''
+    A method applying the NumPy ufunc of the same name through __array_ufunc__.
+    '''
+    ufunc = getattr(np, name)
+    def method(self):
+        return ufunc(self)
+    method.__name__ = name
+    return method
+
+for _name in _UFUNC_METHODS:
+    setattr(fAD, _name, _ufunc_method(_name))
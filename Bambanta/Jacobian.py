@@ -0,0 +1,367 @@
+'''
+Jacobians of functions of several variables, in the cheaper of forward and reverse mode
+according to a cost model that can be calibrated on the running machine.
+'''
+import time
+import logging
+
+import numpy as np
+
+from .Forward import fAD
+from .Reverse import rAD, set_grad_enabled
+from .Primitives import sin, exp
+
+# kept under the name of the module these functions are exported from
+logger = logging.getLogger('Bambanta.AutoDiff')
+
+# relative costs used by choose_mode(), in seconds per traced operation; see calibrate()
+COSTS = {
+    'forward_base': 2.0e-5,        # one forward-mode operation
+    'forward_per_input': 2.0e-8,   # extra cost per propagated input direction
+    'reverse_base': 1.5e-5,        # one recorded reverse-mode operation
+    'reverse_per_output': 1.0e-5,  # one backward sweep through one operation
+    'max_width': 1024,             # widest derivative propagated in a single forward pass
+}
+
+def choose_mode(n_inputs, n_outputs, costs=None):
+    '''
+    choose_mode(n_inputs, n_outputs, costs = None)
+
+    Choose how jacobian() differentiates a function, from a cost model.
+
+    Parameters
+    --------------
+    n_inputs, n_outputs: int
+        dimensions of the function
+
+    costs: dict, optional
+        cost model as in COSTS, which is used by default
+
+    Returns
+    --------------
+    out: 'forward', 'chunked' (forward mode over chunks of at most max_width inputs) or 'reverse'
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.choose_mode(2, 50)
+    'forward'
+    >>> AutoDiff.choose_mode(100000, 1)
+    'reverse'
+    '''
+    costs = COSTS if costs is None else costs
+    width = int(costs['max_width'])
+    passes = -(-n_inputs//width)
+    forward = passes*(costs['forward_base'] + costs['forward_per_input']*min(n_inputs, width))
+    reverse = costs['reverse_base'] + costs['reverse_per_output']*n_outputs
+    if reverse < forward:
+        return 'reverse'
+    return 'forward' if passes <= 1 else 'chunked'
+
+def _as_list(out):
+    if isinstance(out, (list, tuple)):
+        return list(out)
+    return [out]
+
+def _seed(x, start, stop):
+    '''
+    Forward-mode variables at x, seeded with the input directions start:stop.
+    '''
+    variables = []
+    for i, v in enumerate(x):
+        der = np.zeros(stop - start)
+        if start <= i < stop:
+            der[i - start] = 1.0
+        variables.append(fAD(v, der))
+    return variables
+
+def _jacobian_forward(f, x, start, stop, vals, jac):
+    '''
+    Fill columns start:stop of jac with one forward pass seeded with those input directions.
+    '''
+    for k, out in enumerate(_as_list(f(*_seed(x, start, stop)))):
+        if isinstance(out, fAD):
+            vals[k] = out.val[0]
+            jac[k, start:stop] = out.der[0]
+        else: # output does not depend on the inputs
+            vals[k] = out
+
+def _clear_der(variables):
+    '''
+    Reset the derivatives of every node downstream of the given reverse-mode objects.
+    '''
+    stack = list(variables)
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        node.der = None
+        stack.extend(child for _, child in node.children)
+
+def _jacobian_reverse(f, x, vals, jac):
+    '''
+    Record f once, then sweep backward once per output.
+    '''
+    variables = [rAD(v) for v in x]
+    with set_grad_enabled(True):
+        outs = _as_list(f(*variables))
+    for k, out in enumerate(outs):
+        if not isinstance(out, rAD):
+            vals[k] = out
+            continue
+        _clear_der(variables)
+        out.outer()
+        vals[k] = out.val[0]
+        jac[k] = [np.reshape(var.grad(), -1)[0] for var in variables]
+
+def jacobian(f, x, mode='auto', n_outputs=None):
+    '''
+    jacobian(function, x, mode = 'auto', n_outputs = None)
+
+    Compute the values and the Jacobian matrix of a function, choosing forward or reverse mode.
+
+    Parameters
+    --------------
+    function: callable
+        function of len(x) arguments, returning an autodiff object or a list of them.
+        *function must only contain computations supported by both forward- and
+        reverse-mode autodiff objects, and must also accept plain numbers*
+
+    x: array_like
+        values of the input variables
+
+    mode: 'auto', 'forward', 'chunked' or 'reverse'
+        'auto' probes the dimensions of the function and uses choose_mode().
+        The chosen mode is logged at DEBUG level on the 'Bambanta.AutoDiff' logger.
+
+    n_outputs: int, optional
+        number of outputs of the function, when the caller knows it.
+        Otherwise the function is evaluated once more, on plain numbers, to count them.
+
+    Returns
+    --------------
+    out: (values, Jacobian), of shapes (n_outputs,) and (n_outputs, n_inputs)
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> def f(x, y):
+    ...  return [x*y, x + 2*y, AutoDiff.sin(x)]
+    >>> v, j = AutoDiff.jacobian(f, [0.0, 3.0])
+    >>> j.tolist()
+    [[3.0, 0.0], [1.0, 2.0], [1.0, 0.0]]
+    '''
+    x = np.array(x, dtype=np.float64).reshape(-1)
+    n = len(x)
+    if n_outputs is None:
+        # plain numbers are the cheapest way to count the outputs
+        m = len(_as_list(f(*x)))
+    else:
+        m = int(n_outputs)
+    if mode == 'auto':
+        mode = choose_mode(n, m)
+    vals = np.zeros(m)
+    jac = np.zeros((m, n))
+    if mode == 'forward':
+        _jacobian_forward(f, x, 0, n, vals, jac)
+    elif mode == 'chunked':
+        width = int(COSTS['max_width'])
+        for start in range(0, n, width):
+            _jacobian_forward(f, x, start, min(start+width, n), vals, jac)
+    elif mode == 'reverse':
+        _jacobian_reverse(f, x, vals, jac)
+    else:
+        raise ValueError("mode should be 'auto', 'forward', 'chunked' or 'reverse'.")
+    logger.debug('jacobian: %d inputs, %d outputs, %s mode', n, m, mode)
+    return vals, jac
+
+def grad(f, x, mode='auto'):
+    '''
+    grad(function, x, mode = 'auto')
+
+    Compute the value and the gradient of a scalar function; see jacobian().
+
+    Returns
+    --------------
+    out: (value, gradient), a number and an array of shape (n_inputs,)
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> v, g = AutoDiff.grad(lambda x, y: x*y**2, [2.0, 3.0])
+    >>> float(v), g.tolist()
+    (18.0, [9.0, 12.0])
+    '''
+    vals, jac = jacobian(f, x, mode)
+    if len(vals) != 1:
+        raise ValueError('grad() needs a function with a single output, use jacobian().')
+    return vals[0], jac[0]
+
+def _check_batch(out, k, p):
+    '''
+    Refuse an output without one value per point, e.g. a sum over the points, which would be
+    broadcast to all of them.
+    '''
+    if len(out.val) != p:
+        raise ValueError('Output {0} has {1} values for {2} points: the function must act on '
+                         'every point independently.'.format(k, len(out.val), p))
+
+def _batch_forward(f, points, start, stop, vals, jac):
+    '''
+    Fill columns start:stop of every Jacobian with one forward pass over all points at once.
+    '''
+    variables = []
+    for i in range(points.shape[1]):
+        der = np.zeros((len(points), stop - start))
+        if start <= i < stop:
+            der[:, i - start] = 1.0
+        variables.append(fAD(points[:, i], der))
+    for k, out in enumerate(_as_list(f(*variables))):
+        if isinstance(out, fAD):
+            _check_batch(out, k, len(points))
+            vals[:, k] = out.val
+            jac[:, k, start:stop] = out.der
+        else: # output does not depend on the inputs
+            vals[:, k] = out
+
+def _batch_reverse(f, points, vals, jac):
+    '''
+    Record f once over all points, then sweep backward once per output.
+    '''
+    variables = [rAD(points[:, i]) for i in range(points.shape[1])]
+    with set_grad_enabled(True):
+        outs = _as_list(f(*variables))
+    for k, out in enumerate(outs):
+        if not isinstance(out, rAD):
+            vals[:, k] = out
+            continue
+        _check_batch(out, k, len(points))
+        _clear_der(variables)
+        out.outer()
+        vals[:, k] = out.val
+        for i, var in enumerate(variables):
+            jac[:, k, i] = var.grad()
+
+def batch_jacobian(f, points, mode='auto'):
+    '''
+    batch_jacobian(function, points, mode = 'auto')
+
+    Compute the values and Jacobians of a function at many points, in one vectorized pass over all of them.
+
+    Each variable holds the values of its input at every point, so that every operation
+    is applied once to the whole batch.
+
+    Parameters
+    --------------
+    function: callable
+        function as for jacobian().
+        *function must act on the points independently, i.e. use elementwise operations only.
+        Outputs reduced over the points, e.g. by sum(), raise a ValueError*
+
+    points: array_like, shape (n_points, n_inputs)
+        evaluation points
+
+    mode: 'auto', 'forward', 'chunked' or 'reverse', as for jacobian()
+
+    Returns
+    --------------
+    out: (values, Jacobians), of shapes (n_points, n_outputs) and (n_points, n_outputs, n_inputs)
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> v, j = AutoDiff.batch_jacobian(lambda x, y: x*y, [[1.0, 2.0], [3.0, 4.0]])
+    >>> v.tolist(), j.tolist()
+    ([[2.0], [12.0]], [[[2.0, 1.0]], [[4.0, 3.0]]])
+    '''
+    points = np.array(points, dtype=np.float64)
+    if points.ndim != 2:
+        raise ValueError('Points should be a 2D array of shape (n_points, n_inputs).')
+    p, n = points.shape
+    m = len(_as_list(f(*points[0])))
+    if mode == 'auto':
+        mode = choose_mode(n, m)
+    vals = np.zeros((p, m))
+    jac = np.zeros((p, m, n))
+    if mode == 'forward':
+        _batch_forward(f, points, 0, n, vals, jac)
+    elif mode == 'chunked':
+        width = int(COSTS['max_width'])
+        for start in range(0, n, width):
+            _batch_forward(f, points, start, min(start+width, n), vals, jac)
+    elif mode == 'reverse':
+        _batch_reverse(f, points, vals, jac)
+    else:
+        raise ValueError("mode should be 'auto', 'forward', 'chunked' or 'reverse'.")
+    logger.debug('batch_jacobian: %d points, %d inputs, %d outputs, %s mode', p, n, m, mode)
+    return vals, jac
+
+def _probe(*xs):
+    # a representative mix of operators and elementals for calibrate()
+    total = 0
+    for x in xs[:4]:
+        total = total + sin(x)*x + exp(x/2) - x**2
+    return total
+
+def _timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def calibrate(widths=(1, 16, 128, 1024, 4096), repeat=3):
+    '''
+    calibrate(widths = (1, 16, 128, 1024, 4096), repeat = 3)
+
+    Measure the cost model of choose_mode() on this machine and store it in COSTS.
+
+    Parameters
+    --------------
+    widths: tuple of int
+        numbers of input directions timed in forward mode.
+        The width with the lowest cost per direction becomes max_width.
+
+    repeat: int
+        timings are the best of repeat runs
+
+    Returns
+    --------------
+    out: dict, the measured costs
+    '''
+    n_ops = 4*7 # operations recorded by _probe on 4 inputs
+    forward = []
+    for w in widths:
+        x = np.linspace(0.1, 1.0, w)
+        seeds = np.zeros((4, w))
+        seeds[np.arange(4), np.arange(4) % w] = 1.0
+        variables = [fAD(x[i % w], seeds[i]) for i in range(4)]
+        forward.append(_timed(lambda: _probe(*variables), repeat)/n_ops)
+    # least-squares fit of cost = base + per_input*width
+    slope, base = np.polyfit(np.array(widths, dtype=float), forward, 1)
+    per_direction = [t/w for t, w in zip(forward, widths)]
+    max_width = widths[int(np.argmin(per_direction))]
+
+    def record():
+        variables = [rAD(v) for v in np.linspace(0.1, 1.0, 4)]
+        return variables, _probe(*variables)
+    reverse_base = _timed(record, repeat)/n_ops
+    def sweep():
+        variables, out = record()
+        _clear_der(variables)
+        out.outer()
+        for var in variables:
+            var.grad()
+    reverse_per_output = max(_timed(sweep, repeat)/n_ops - reverse_base, 1e-9)
+
+    costs = {'forward_base': max(float(base), 1e-9),
+             'forward_per_input': max(float(slope), 1e-12),
+             'reverse_base': reverse_base,
+             'reverse_per_output': reverse_per_output,
+             'max_width': max_width}
+    COSTS.update(costs)
+    logger.debug('calibrate: %s', costs)
+    return costs
@@ -0,0 +1,283 @@
+'''
+Compiled replay of recorded tapes.
+
+jit(tape) replays a Tape with kernels compiled by Numba when it is installed,
+and with the Tape's own NumPy interpreter otherwise. Both give the same
+results, bit for bit.
+
+A JIT compiler's math library does not round elementary functions such as
+exp or log the way NumPy's vectorized loops do. The compiled kernels therefore
+only evaluate operations that IEEE 754 rounds exactly (arithmetic, negation and
+absolute value) and run the whole reverse sweep, which only multiplies and adds.
+The other operations are evaluated by NumPy on all the nodes that are ready at
+once: nodes are grouped in stages, so a tape costs a few NumPy calls per stage
+instead of one Python call per node and edge.
+
+Tapes replayed at vector-valued inputs always use the interpreter.
+'''
+import numpy as np
+
+from . import Tape
+
+# operations evaluated by the compiled forward kernel
+EXACT = ('add', 'sub', 'mul', 'div', 'neg', 'abs')
+
+_ADD, _SUB, _MUL, _DIV, _NEG, _ABS = [Tape.OPCODES[name] for name in EXACT]
+
+_kernels = None
+
+def _build(numba):
+    # error_model='numpy' divides by zero to inf or nan, as NumPy does, instead of raising
+    @numba.njit(error_model='numpy')
+    def forward(codes, nodes, first, second, values):
+        for j in range(nodes.size):
+            code = codes[j]
+            a = values[first[j]]
+            if code == _ADD:
+                v = a + values[second[j]]
+            elif code == _SUB:
+                v = a - values[second[j]]
+            elif code == _MUL:
+                v = a * values[second[j]]
+            elif code == _DIV:
+                v = a / values[second[j]]
+            elif code == _NEG:
+                v = -a
+            else:
+                v = abs(a)
+            values[nodes[j]] = v
+
+    @numba.njit(error_model='numpy')
+    def reverse(starts, parents, partials, outputs, input_nodes, positions, jac):
+        # the edges of node i are starts[i]:starts[i+1], in the order of its parents
+        n_nodes = starts.size - 1
+        adjoints = np.empty(n_nodes)
+        reached = np.empty(n_nodes, dtype=np.bool_)
+        for k in range(outputs.size):
+            reached[:] = False
+            out = outputs[k]
+            adjoints[out] = 1.0
+            reached[out] = True
+            for i in range(out, -1, -1):
+                if not reached[i]:
+                    continue
+                adj = adjoints[i]
+                for e in range(starts[i], starts[i+1]):
+                    parent = parents[e]
+                    contribution = partials[e]*adj
+                    if reached[parent]:
+                        adjoints[parent] = adjoints[parent] + contribution
+                    else:
+                        adjoints[parent] = contribution
+                        reached[parent] = True
+            for j in range(input_nodes.size):
+                if reached[input_nodes[j]]:
+                    jac[k, positions[j]] = adjoints[input_nodes[j]]
+
+    return forward, reverse
+
+def _compiled():
+    global _kernels
+    if _kernels is None:
+        try:
+            import numba
+        except ImportError: # numba is optional, tapes are interpreted instead
+            _kernels = False
+        else:
+            _kernels = _build(numba)
+    return _kernels
+
+def available():
+    '''
+    Returns
+    --------------
+    out: bool, whether tapes are compiled, i.e. whether Numba is installed
+    '''
+    return bool(_compiled())
+
+def _scalars(vals):
+    '''
+    Return the inputs as a float array, or None if any of them is a vector.
+    '''
+    if any(np.size(val) != 1 for val in vals):
+        return None
+    return np.array([np.reshape(val, -1)[0] for val in vals], dtype=np.float64)
+
+class JitTape:
+    '''
+    JitTape(tape)
+
+    A tape prepared for compiled replay, usually created by jit().
+
+    Parameters
+    --------------
+    tape: a Tape
+
+    Attributes
+    --------------
+    backend: 'numba' when the tape is replayed by compiled kernels, 'numpy' when it is interpreted
+    '''
+    def __init__(self, tape):
+        self.tape = tape
+        self.n_inputs = tape.n_inputs
+        self.outputs = tape.outputs
+        self.backend = 'numba' if available() else 'numpy'
+        if self.backend == 'numba':
+            self._schedule()
+
+    def __len__(self):
+        return len(self.tape)
+
+    def __repr__(self):
+        return "{0}(nodes={1}, inputs={2}, outputs={3}, backend={4!r})".format(
+            self.__class__.__name__, len(self), self.n_inputs, len(self.outputs), self.backend)
+
+    def _schedule(self):
+        '''
+        Group the nodes in stages and flatten the edges, once per tape.
+
+        A NumPy operation runs one stage after the latest of its parents; an exact
+        operation runs in the stage of its latest parent, after that stage's NumPy
+        operations, in tape order.
+        '''
+        program = self.tape.program()
+        stage = [0]*len(program)
+        stages = {}
+        inputs, positions, consts, const_index = [], [], [], []
+        starts, parents, edges = [0], [], {}
+        for i, (name, a, b, active) in enumerate(program):
+            if name == 'input':
+                inputs.append(i)
+                positions.append(a)
+            elif name == 'const':
+                consts.append(i)
+                const_index.append(a)
+            else:
+                stage[i] = max(stage[a], stage[b] if b >= 0 else 0) + (name not in EXACT)
+                stages.setdefault(stage[i], []).append(i)
+                if active:
+                    for k, parent in enumerate((a, b)[:len(Tape.PARTIALS[name])]):
+                        if program[parent][3]:
+                            edges.setdefault((name, k), []).append(len(parents))
+                            parents.append(parent)
+            starts.append(len(parents))
+
+        self._inputs = np.array(inputs, dtype=np.int64)
+        self._positions = np.array(positions, dtype=np.int64)
+        self._consts = np.array(consts, dtype=np.int64)
+        self._const_values = self.tape.consts[np.array(const_index, dtype=np.int64)]
+        self._outputs = self.outputs.astype(np.int64)
+
+        self._stages = []
+        for s in sorted(stages):
+            groups = {}
+            exact = []
+            for i in stages[s]:
+                name = program[i][0]
+                if name in EXACT:
+                    exact.append(i)
+                else:
+                    groups.setdefault(name, []).append(i)
+            numpy_ops = [(name,) + self._parents(program, nodes) for name, nodes in groups.items()]
+            codes = np.array([Tape.OPCODES[program[i][0]] for i in exact], dtype=np.int64)
+            self._stages.append((numpy_ops, (codes,) + self._parents(program, exact)))
+
+        # edges of each (operation, parent position), so every partial is computed in one NumPy call
+        self._starts = np.array(starts, dtype=np.int64)
+        self._parents_of_edges = np.array(parents, dtype=np.int64)
+        children = np.repeat(np.arange(len(program)), np.diff(self._starts))
+        self._edges = []
+        for (name, k), index in edges.items():
+            index = np.array(index, dtype=np.int64)
+            nodes = children[index]
+            first = self.tape.args[nodes, 0].astype(np.int64)
+            second = self.tape.args[nodes, 1].astype(np.int64)
+            self._edges.append((Tape.PARTIALS[name][k], index, first, second if second[0] >= 0 else None))
+
+    @staticmethod
+    def _parents(program, nodes):
+        nodes = np.array(nodes, dtype=np.int64)
+        first = np.array([program[i][1] for i in nodes.tolist()], dtype=np.int64)
+        second = np.array([program[i][2] for i in nodes.tolist()], dtype=np.int64)
+        return nodes, first, second
+
+    def _forward(self, x):
+        values = np.empty(len(self.tape))
+        values[self._inputs] = x[self._positions]
+        values[self._consts] = self._const_values
+        forward = _compiled()[0]
+        for numpy_ops, (codes, nodes, first, second) in self._stages:
+            for name, ops_nodes, a, b in numpy_ops:
+                values[ops_nodes] = Tape.VALUES[name](values[a], values[b] if b[0] >= 0 else None)
+            if nodes.size:
+                forward(codes, nodes, first, second, values)
+        return values
+
+    def values(self, vals):
+        '''
+        JitTape.values(vals)
+
+        Returns
+        --------------
+        out: array of output values at vals, as returned by Tape.values()
+        '''
+        x = self._inputs_of(vals)
+        if x is None:
+            return self.tape.values(vals)
+        return self._forward(x)[self._outputs]
+
+    def gradient(self, vals):
+        '''
+        JitTape.gradient(vals)
+
+        Replay the tape at new input values and differentiate every output.
+
+        Returns
+        --------------
+        out: (values, Jacobian), as returned by Tape.gradient()
+
+        Examples
+        --------------
+        >>> from Bambanta import AutoDiff, Tape, Jit
+        >>> t = Jit.jit(Tape.record(lambda x, y: x*y + AutoDiff.exp(x), [0.0, 2.0]))
+        >>> v, j = t.gradient([0.0, 3.0])
+        >>> float(v[0]), j[0].tolist()
+        (1.0, [4.0, 0.0])
+        '''
+        x = self._inputs_of(vals)
+        if x is None:
+            return self.tape.gradient(vals)
+        values = self._forward(x)
+        partials = np.empty(len(self._parents_of_edges))
+        for partial, index, a, b in self._edges:
+            partials[index] = partial(values[a], values[b] if b is not None else None)
+        jac = np.zeros((len(self._outputs), self.n_inputs))
+        _compiled()[1](self._starts, self._parents_of_edges, partials, self._outputs,
+                       self._inputs, self._positions, jac)
+        return values[self._outputs], jac
+
+    def _inputs_of(self, vals):
+        '''
+        Return the inputs as a float array, or None where the interpreter replays the tape.
+        '''
+        if self.backend != 'numba':
+            return None
+        if len(vals) != self.n_inputs:
+            raise ValueError('Tape expects {0} inputs, got {1}.'.format(self.n_inputs, len(vals)))
+        return _scalars(vals)
+
+def jit(tape):
+    '''
+    jit(tape)
+
+    Prepare a tape for compiled replay, falling back to the interpreter when Numba is not installed.
+
+    Parameters
+    --------------
+    tape: a Tape
+
+    Returns
+    --------------
+    out: a JitTape, replayed like the tape by values() and gradient()
+    '''
+    return JitTape(tape)
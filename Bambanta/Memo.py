@@ -0,0 +1,173 @@
+'''
+Memoization of differentiated functions.
+
+Line searches and trust-region methods often ask again for the value and
+gradient at a point they have already evaluated. Memoize keeps the most
+recently used results, keyed on the exact bytes of the inputs, so a repeated
+evaluation costs one hash lookup instead of rebuilding the autodiff graph.
+'''
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+def _key(arg):
+    '''
+    Hash key of one argument: its dtype, shape and raw bytes.
+    '''
+    arr = np.ascontiguousarray(arg)
+    if arr.dtype == object:
+        raise TypeError('Memoized arguments need to be numbers or arrays of numbers.')
+    return (arr.dtype.str, arr.shape, arr.tobytes())
+
+def _nbytes(result):
+    '''
+    Number of bytes held by the arrays of a result, which may be nested in tuples or lists.
+    '''
+    if isinstance(result, (tuple, list)):
+        return sum(_nbytes(r) for r in result)
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    return np.asarray(result).nbytes
+
+def _freeze(result):
+    '''
+    Mark the arrays of a result read-only, since every hit returns the same objects.
+    '''
+    if isinstance(result, (tuple, list)):
+        for r in result:
+            _freeze(r)
+    elif isinstance(result, np.ndarray):
+        result.setflags(write=False)
+
+class Memoize:
+    '''
+    Memoize(function, maxsize = 128, maxbytes = None)
+
+    Wrap a function, e.g. one returning values and gradients, with a least-recently-used cache.
+
+    Parameters
+    --------------
+    function: callable
+        function of numbers or arrays of numbers
+
+    maxsize: int, optional
+        maximal number of cached results, None for no limit
+
+    maxbytes: int, optional
+        maximal number of bytes held by the arrays of cached results, None for no limit
+
+    Attributes
+    --------------
+    hits, misses, evictions: int
+        counters since creation or the last cache_clear()
+
+    nbytes: int
+        bytes held by the cached results
+
+    Returns
+    --------------
+    out: a callable taking the same arguments as function.
+        Arrays in returned results are read-only, since they are shared between calls.
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Memo
+    >>> def f(x, y):
+    ...  return x*y
+    >>> vg = Memo.Memoize(lambda x: AutoDiff.stack_r(x, [f]))
+    >>> v, j = vg([2.0, 3.0])
+    >>> v, j = vg([2.0, 3.0])
+    >>> vg.hits, vg.misses
+    (1, 1)
+    '''
+    def __init__(self, function, maxsize=128, maxbytes=None):
+        self.function = function
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_clear()
+
+    def __call__(self, *args, **kwargs):
+        key = tuple(_key(a) for a in args) + tuple((k, _key(v)) for k, v in sorted(kwargs.items()))
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key][0]
+            self.misses += 1
+        result = self.function(*args, **kwargs)
+        _freeze(result)
+        nbytes = _nbytes(result)
+        if self.maxbytes is not None and nbytes > self.maxbytes:
+            # too large to ever be cached
+            return result
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = (result, nbytes)
+                self.nbytes += nbytes
+                self._evict()
+        return result
+
+    def _evict(self):
+        '''
+        Drop least recently used results until both bounds hold.
+        '''
+        while ((self.maxsize is not None and len(self._cache) > self.maxsize) or
+               (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+            _, (_, nbytes) = self._cache.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+    def __len__(self):
+        '''
+        Returns
+        --------------
+        out: number of cached results
+        '''
+        return len(self._cache)
+
+    def cache_info(self):
+        '''
+        Memoize.cache_info()
+
+        Returns
+        --------------
+        out: dict of the counters, the number of cached results and the bytes they hold
+        '''
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._cache), 'nbytes': self.nbytes,
+                'maxsize': self.maxsize, 'maxbytes': self.maxbytes}
+
+    def cache_clear(self):
+        '''
+        Memoize.cache_clear()
+
+        Drop all cached results and reset the counters.
+        '''
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = self.evictions = 0
+            self.nbytes = 0
+
+def memoize(function=None, maxsize=128, maxbytes=None):
+    '''
+    memoize(function = None, maxsize = 128, maxbytes = None)
+
+    Wrap a function in a Memoize cache; usable as a decorator, with or without arguments.
+
+    Examples
+    --------------
+    >>> from Bambanta import Memo
+    >>> @Memo.memoize(maxsize = 2)
+    ... def square(x):
+    ...  return x**2
+    >>> square(3.0)
+    9.0
+    >>> square.cache_info()['misses']
+    1
+    '''
+    if function is None:
+        return lambda f: Memoize(f, maxsize, maxbytes)
+    return Memoize(function, maxsize, maxbytes)
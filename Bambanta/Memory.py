@@ -0,0 +1,141 @@
+'''
+Memory accounting for reverse-mode graphs.
+
+An rAD node holds its values and, once swept, its gradient. It keeps the
+nodes computed from it alive through its children edges, each with a partial
+derivative or a VJP rule, but not the nodes it was computed from. Holding the
+inputs of a graph therefore keeps all of it alive. graph_stats() measures the
+whole connected graph of some nodes, finding their parents among the rAD objects
+alive in the process. process_stats() does the same for every rAD alive in the
+process, e.g. to find graphs that were never released.
+'''
+import gc
+import sys
+
+import numpy as np
+
+from . import AutoDiff
+
+FIELDS = ('nodes', 'edges', 'value_bytes', 'partial_bytes', 'gradient_bytes', 'overhead_bytes')
+
+def _nbytes(obj):
+    '''
+    Bytes of a value, partial derivative or gradient; callables count as their object only.
+    '''
+    if obj is None:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    return sys.getsizeof(obj)
+
+def _account(node, totals):
+    totals['nodes'] += 1
+    totals['edges'] += len(node.children)
+    totals['value_bytes'] += _nbytes(node.val)
+    totals['gradient_bytes'] += _nbytes(node.der)
+    totals['partial_bytes'] += sum(_nbytes(w) for w, _ in node.children)
+    # the object, its attribute dict and its list and tuples of edges
+    totals['overhead_bytes'] += (sys.getsizeof(node) + sys.getsizeof(node.__dict__) +
+                                 sys.getsizeof(node.children) +
+                                 sum(sys.getsizeof(edge) for edge in node.children))
+
+def _alive():
+    return [obj for obj in gc.get_objects() if isinstance(obj, AutoDiff.rAD)]
+
+def _parents(nodes):
+    '''
+    Map the id of every node with a recorded edge to the nodes it was computed from.
+    '''
+    parents = {}
+    for node in nodes:
+        for _, child in node.children:
+            parents.setdefault(id(child), []).append(node)
+    return parents
+
+def _neighbours(node, parents):
+    for _, child in node.children:
+        yield child
+    yield from parents.get(id(node), ())
+
+def _empty():
+    return dict.fromkeys(FIELDS, 0)
+
+def _finish(totals):
+    totals['total_bytes'] = (totals['value_bytes'] + totals['partial_bytes'] +
+                             totals['gradient_bytes'] + totals['overhead_bytes'])
+    return totals
+
+def graph_stats(outputs):
+    '''
+    graph_stats(outputs)
+
+    Measure the reverse-mode graphs that some autodiff objects belong to.
+    Parents are found by scanning the rAD objects alive in the process, once per call.
+
+    Parameters
+    --------------
+    outputs: a reverse-mode autodiff object, or a list of them
+
+    Returns
+    --------------
+    out: dict of the numbers of 'nodes' and 'edges', and of the bytes of their 'value_bytes',
+        'partial_bytes' (held by the edges), 'gradient_bytes' (computed by grad()), 'overhead_bytes'
+        (of the Python objects) and 'total_bytes'
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Memory
+    >>> x = AutoDiff.rAD([1.0, 2.0])
+    >>> f = AutoDiff.sin(x)*x
+    >>> stats = Memory.graph_stats(f)
+    >>> stats['nodes'], stats['edges'], stats['value_bytes']
+    (3, 3, 48)
+    '''
+    if isinstance(outputs, AutoDiff.rAD):
+        outputs = [outputs]
+    totals = _empty()
+    parents = _parents(_alive())
+    seen = set()
+    stack = [node for node in outputs if isinstance(node, AutoDiff.rAD)]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        _account(node, totals)
+        stack.extend(n for n in _neighbours(node, parents) if id(n) not in seen)
+    return _finish(totals)
+
+def process_stats():
+    '''
+    process_stats()
+
+    Measure every reverse-mode autodiff object alive in the process, found through the garbage collector.
+
+    Returns
+    --------------
+    out: dict as for graph_stats(), with the number of separate 'graphs' and of those with edges, 'recorded'.
+        A 'recorded' count that keeps growing points to graphs that are never released or reset.
+    '''
+    nodes = _alive()
+    parents = _parents(nodes)
+    totals = _empty()
+    totals['graphs'] = totals['recorded'] = 0
+    seen = set()
+    for start in nodes:
+        if id(start) in seen:
+            continue
+        # one connected graph
+        totals['graphs'] += 1
+        edges = totals['edges']
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            _account(node, totals)
+            stack.extend(n for n in _neighbours(node, parents) if id(n) not in seen)
+        if totals['edges'] > edges:
+            totals['recorded'] += 1
+    return _finish(totals)
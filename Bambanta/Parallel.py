@@ -0,0 +1,236 @@
+'''
+Process-pool drivers for Jacobian and batch evaluation.
+
+Work is spread over a pool of worker processes: one output function per task
+in reverse mode, one chunk of input directions (or one block of evaluation
+points) per task in forward mode. Workers write their rows straight into
+arrays allocated in shared memory, so results are never pickled back.
+
+Functions handed to these drivers must be picklable, i.e. defined at the
+top level of a module.
+'''
+import os
+import multiprocessing as mp
+from multiprocessing import sharedctypes
+
+import numpy as np
+
+from . import AutoDiff
+from .Jacobian import _seed
+
+# per-process state, installed by _init_worker
+_state = {}
+
+def _view(raw, shape):
+    '''
+    Return a float64 array of the given shape backed by a shared buffer.
+    '''
+    return np.frombuffer(raw, dtype=np.float64, count=int(np.prod(shape))).reshape(shape)
+
+def _shared(shape):
+    '''
+    Allocate a zeroed float64 array in shared memory.
+
+    Returns
+    --------------
+    out: (raw, array), the shared buffer (to be handed to workers) and a view on it.
+    '''
+    raw = sharedctypes.RawArray('d', max(int(np.prod(shape)), 1))
+    return raw, _view(raw, shape)
+
+def _init_worker(payload, buffers):
+    '''
+    Install the job payload and views on the shared buffers in this process.
+    '''
+    _state.clear()
+    _state.update(payload)
+    for key, (raw, shape) in buffers.items():
+        _state[key] = _view(raw, shape)
+
+def _run(task, tasks, payload, buffers, workers):
+    '''
+    Run task over tasks on a pool of workers, or in-process when only one worker is needed.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        _init_worker(payload, buffers)
+        try:
+            for t in tasks:
+                task(t)
+        finally:
+            _state.clear()
+        return
+    chunksize = max(1, len(tasks)//(4*workers))
+    with mp.Pool(workers, _init_worker, (payload, buffers)) as pool:
+        pool.map(task, tasks, chunksize)
+
+def _chunks(n, size):
+    '''
+    Split range(n) into consecutive (start, stop) pairs of at most size elements.
+    '''
+    return [(start, min(start+size, n)) for start in range(0, n, size)]
+
+def _n_outputs(function, vals):
+    '''
+    Count the outputs of function by evaluating it once on plain numbers.
+    '''
+    out = function(*vals)
+    if isinstance(out, (list, tuple)):
+        return len(out)
+    return np.size(out)
+
+def _stack(out):
+    '''
+    Stack a list of forward-mode autodiff objects into one object.
+    '''
+    if isinstance(out, (list, tuple)):
+        return AutoDiff.stack_f(out)
+    return out
+
+def _reverse_task(i):
+    variables = [AutoDiff.rAD(val) for val in _state['vals']]
+    f_obj = _state['functions'][i](*variables)
+    f_obj.outer()
+    _state['f_vals'][i] = f_obj.get_val()
+    # variables the function does not depend on keep a gradient of 0
+    _state['jac'][i] = [np.reshape(var.grad(), -1)[0] for var in variables]
+
+def _forward_task(chunk):
+    start, stop = chunk
+    out = _stack(_state['function'](*_seed(_state['vals'], start, stop)))
+    _state['jac'][:, start:stop] = out.der
+    if start == 0:
+        _state['f_vals'][:] = out.val
+
+def _batch_task(block):
+    start, stop = block
+    for p in range(start, stop):
+        out = _stack(_state['function'](*AutoDiff.create_f(_state['points'][p])))
+        _state['f_vals'][p] = out.val
+        _state['jac'][p] = out.der
+
+def parallel_r(vals, functions, workers=None):
+    '''
+    parallel_r(vals, functions, workers = None)
+
+    Parallel counterpart of stack_r: differentiate each function in reverse mode
+    on its own worker process.
+
+    Parameters
+    --------------
+    vals: array_like
+        input reverse-mode autodiff variable values
+
+    functions: array_like
+        input functions for differentiation, defined at module level
+        *functions must share an equal number of variables for differentiation*
+
+    workers: int, optional
+        number of worker processes, defaults to the number of CPUs
+
+    Returns
+    --------------
+    out: (values, Jacobian), as returned by stack_r
+
+    Examples
+    --------------
+    >>> from Bambanta import Parallel
+    >>> v, j = Parallel.parallel_r([-2.0], [abs], workers = 1)
+    >>> v
+    array([2.])
+    >>> j
+    array([[-1.]])
+    '''
+    vals = list(vals)
+    m, n = len(functions), len(vals)
+    f_raw, f_vals = _shared((m,))
+    jac_raw, jac = _shared((m, n))
+    payload = {'vals': vals, 'functions': list(functions)}
+    buffers = {'f_vals': (f_raw, (m,)), 'jac': (jac_raw, (m, n))}
+    _run(_reverse_task, list(range(m)), payload, buffers, workers)
+    return f_vals, jac
+
+def parallel_f(function, vals, workers=None, chunk=None):
+    '''
+    parallel_f(function, vals, workers = None, chunk = None)
+
+    Compute the Jacobian of a function in forward mode, spreading chunks of
+    input directions over worker processes.
+
+    Parameters
+    --------------
+    function: callable
+        function of len(vals) arguments, returning a forward-mode autodiff object
+        or a list of them; must be defined at module level
+
+    vals: array_like
+        values of the input variables
+
+    workers: int, optional
+        number of worker processes, defaults to the number of CPUs
+
+    chunk: int, optional
+        number of input directions propagated per task, defaults to an even split over workers
+
+    Returns
+    --------------
+    out: (values, Jacobian)
+        values of shape (n_outputs,), Jacobian of shape (n_outputs, n_inputs)
+    '''
+    vals = list(vals)
+    n = len(vals)
+    m = _n_outputs(function, vals)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk is None:
+        chunk = -(-n//workers)
+    f_raw, f_vals = _shared((m,))
+    jac_raw, jac = _shared((m, n))
+    payload = {'vals': vals, 'function': function}
+    buffers = {'f_vals': (f_raw, (m,)), 'jac': (jac_raw, (m, n))}
+    _run(_forward_task, _chunks(n, chunk), payload, buffers, workers)
+    return f_vals, jac
+
+def batch_f(function, points, workers=None):
+    '''
+    batch_f(function, points, workers = None)
+
+    Evaluate a function and its forward-mode Jacobian at many points,
+    spreading blocks of points over worker processes.
+
+    Parameters
+    --------------
+    function: callable
+        function of n_inputs arguments, returning a forward-mode autodiff object
+        or a list of them; must be defined at module level
+
+    points: array_like, shape (n_points, n_inputs)
+        evaluation points
+
+    workers: int, optional
+        number of worker processes, defaults to the number of CPUs
+
+    Returns
+    --------------
+    out: (values, Jacobians)
+        values of shape (n_points, n_outputs), Jacobians of shape (n_points, n_outputs, n_inputs)
+    '''
+    points = np.array(points, dtype=np.float64)
+    if points.ndim != 2:
+        raise ValueError('Points should be a 2D array of shape (n_points, n_inputs).')
+    p, n = points.shape
+    m = _n_outputs(function, points[0])
+    if workers is None:
+        workers = os.cpu_count() or 1
+    points_raw, shared_points = _shared((p, n))
+    shared_points[:] = points
+    f_raw, f_vals = _shared((p, m))
+    jac_raw, jac = _shared((p, m, n))
+    payload = {'function': function}
+    buffers = {'points': (points_raw, (p, n)),
+               'f_vals': (f_raw, (p, m)),
+               'jac': (jac_raw, (p, m, n))}
+    _run(_batch_task, _chunks(p, -(-p//(4*workers))), payload, buffers, workers)
+    return f_vals, jac
@@ -0,0 +1,1191 @@
+'''
+Primitives: elementary functions declared once with their derivative rules, and applied
+to numbers, forward- and reverse-mode objects alike. This holds the registry, the
+elementals, the fused composites and the reductions and products of vectors.
+'''
+import numpy as np
+
+from . import Reverse
+from .Forward import fAD, mul_by_row
+from .Reverse import rAD
+
+PRIMITIVES = {}
+
+class Primitive:
+    '''
+    Primitive(name, value, deriv = None, jvp = None, vjp = None, nargs = 1)
+
+    An elementary function together with its derivative rules.
+    Calling it dispatches on the type of its arguments, to a number,
+    a forward-mode or a reverse-mode autodiff object; see register_primitive().
+
+    Attributes
+    --------------
+    name: str
+        name recorded in the op of reverse-mode results
+
+    nargs: int
+        number of leading arguments the primitive is differentiated with respect to.
+        Further arguments are constant parameters, such as the base of log().
+    '''
+    def __init__(self, name, value, deriv=None, jvp=None, vjp=None, nargs=1):
+        if deriv is None and (jvp is None or vjp is None):
+            raise ValueError('A primitive needs deriv, or both jvp and vjp.')
+        self.name = name
+        self.value = value
+        self.deriv = deriv
+        self.jvp = jvp
+        self.vjp = vjp
+        self.nargs = nargs
+
+    def __call__(self, *args):
+        if self.nargs == 1:
+            handler = _HANDLERS.get(type(args[0]), _resolve)
+            if handler is _resolve:
+                handler = _resolve(type(args[0]))
+            return self.value(*args) if handler is None else handler(self, args)
+        for a in args[:self.nargs]:
+            handler = _HANDLERS.get(type(a), _resolve)
+            if handler is _resolve:
+                handler = _resolve(type(a))
+            if handler is not None:
+                return handler(self, args)
+        # numeric
+        return self.value(*args)
+
+    def __repr__(self):
+        return 'Primitive({!r})'.format(self.name)
+
+def _apply_f(prim, args):
+    '''
+    Apply a primitive to forward-mode autodiff objects: the value, and the derivatives by its JVP rule.
+    '''
+    n = prim.nargs
+    if n == 1:
+        x = args[0]
+        xs = (x.val,) + args[1:]
+    else:
+        xs = tuple(a.val if isinstance(a, fAD) else a for a in args[:n]) + args[n:]
+    val = prim.value(*xs)
+    if prim.jvp is not None:
+        if n == 1:
+            return fAD(val, prim.jvp(val, x.der, *xs))
+        ders = tuple(a.der if isinstance(a, fAD) else None for a in args[:n])
+        return fAD(val, prim.jvp(val, ders, *xs))
+    partials = prim.deriv(val, *xs)
+    if n == 1:
+        return fAD(val, mul_by_row(partials, x.der))
+    der = 0
+    for a, partial in zip(args[:n], partials):
+        if isinstance(a, fAD):
+            der = der + mul_by_row(partial, a.der)
+    return fAD(val, der)
+
+def _apply_r(prim, args):
+    '''
+    Apply a primitive to reverse-mode autodiff objects: the value, and an edge to the result for
+    every autodiff argument, holding either its partial derivative or its VJP rule.
+    '''
+    n = prim.nargs
+    if n == 1:
+        x = args[0]
+        xs = (x.val,) + args[1:]
+    else:
+        xs = tuple(a.val if isinstance(a, rAD) else a for a in args[:n]) + args[n:]
+    ad = rAD(prim.value(*xs))
+    if Reverse._grad_enabled:
+        weights = (prim.vjp or prim.deriv)(ad.val, *xs)
+        if n == 1:
+            x.children.append((weights, ad))
+        else:
+            for a, w in zip(args[:n], weights):
+                if isinstance(a, rAD):
+                    a.children.append((w, ad))
+        if Reverse._record_ops:
+            ad.op = (prim.name, args)
+    return ad
+
+_HANDLERS = {fAD: _apply_f, rAD: _apply_r}
+
+def _resolve(tp):
+    '''
+    Find and cache the handler for a type not seen before: that of its autodiff base class, or None for numbers.
+    '''
+    handler = None
+    for base, h in ((fAD, _apply_f), (rAD, _apply_r)):
+        if issubclass(tp, base):
+            handler = h
+    _HANDLERS[tp] = handler
+    return handler
+
+def register_primitive(name, value, deriv=None, jvp=None, vjp=None, nargs=1, replace=False):
+    '''
+    register_primitive(name, value, deriv = None, jvp = None, vjp = None, nargs = 1, replace = False)
+
+    Declare a primitive once, for numbers and both modes of autodiff.
+
+    Parameters
+    --------------
+    name: str
+        key in PRIMITIVES, and name recorded in reverse-mode ops
+
+    value: callable
+        value(*args), computing the value on numbers or arrays
+
+    deriv: callable, optional
+        deriv(value, *args), the elementwise partial derivatives with respect to the first nargs arguments,
+        a tuple of them if nargs > 1. It serves as both rules unless these are given.
+
+    jvp: callable, optional
+        jvp(value, der, *args), the derivatives of the result given those of the arguments
+        (a tuple of them if nargs > 1, None for constant arguments)
+
+    vjp: callable, optional
+        vjp(value, *args), a function of the gradient of the result returning that of the argument
+        (a tuple of them if nargs > 1), for derivatives that are not elementwise
+
+    nargs: int, optional
+        number of leading arguments that are differentiated
+
+    replace: bool, optional
+        whether to replace a primitive already registered under name
+
+    Returns
+    --------------
+    out: Primitive, callable on numbers, forward- and reverse-mode autodiff objects
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> import numpy as np
+    >>> cube = AutoDiff.register_primitive('cube', lambda x: x**3, lambda y, x: 3*x**2)
+    >>> cube(2.0)
+    8.0
+    >>> print(cube(AutoDiff.fAD(2.0)).der.tolist())
+    [[12.0]]
+    >>> x = AutoDiff.rAD(2.0)
+    >>> f = cube(x)
+    >>> f.outer()
+    >>> print(x.grad().tolist())
+    [12.0]
+    '''
+    if name in PRIMITIVES and not replace:
+        raise ValueError('A primitive named {!r} is already registered.'.format(name))
+    prim = Primitive(name, value, deriv, jvp, vjp, nargs)
+    PRIMITIVES[name] = prim
+    return prim
+
+_sin = register_primitive('sin', np.sin, lambda y, x: np.cos(x))
+_cos = register_primitive('cos', np.cos, lambda y, x: -np.sin(x))
+_tan = register_primitive('tan', np.tan, lambda y, x: 1/(np.cos(x)**2))
+_arcsin = register_primitive('arcsin', np.arcsin, lambda y, x: 1/np.sqrt(1 - x*x))
+_arccos = register_primitive('arccos', np.arccos, lambda y, x: -1/np.sqrt(1-x*x))
+_arctan = register_primitive('arctan', np.arctan, lambda y, x: 1/(1+x*x))
+_sinh = register_primitive('sinh', np.sinh, lambda y, x: np.cosh(x))
+_cosh = register_primitive('cosh', np.cosh, lambda y, x: np.sinh(x))
+_tanh = register_primitive('tanh', np.tanh, lambda y, x: 1/(np.cosh(x)**2))
+_exp = register_primitive('exp', np.exp, lambda y, x: y)
+_logistic = register_primitive('logistic', lambda x: 1/(1+np.exp(-x)),
+                               lambda y, x: np.exp(-x)/((np.exp(-x)+1)**2))
+_log = register_primitive('log', lambda x, base=np.e: np.log(x)/np.log(base),
+                          lambda y, x, base=np.e: 1/(x*np.log(base)))
+_sqrt = register_primitive('sqrt', lambda x: x**0.5, lambda y, x: (x**(-0.5))*0.5)
+
+# fused composites, stable at extreme inputs and recorded as single nodes
+def _logsumexp(x):
+    x = np.asarray(x, dtype=np.float64)
+    m = np.max(x)
+    if not np.isfinite(m):
+        return m
+    return m + np.log(np.sum(np.exp(x - m)))
+
+def _softmax(x, lse):
+    return np.exp(np.asarray(x, dtype=np.float64) - lse)
+
+def _softplus(x):
+    # log(1 + exp(x)) = max(x, 0) + log(1 + exp(-|x|))
+    return np.maximum(x, 0) + np.log1p(np.exp(-np.abs(x)))
+
+def _sigmoid(x):
+    e = np.exp(-np.abs(x))
+    return np.where(np.asarray(x) >= 0, 1/(1 + e), e/(1 + e))
+
+def _norm(x):
+    x = np.asarray(x, dtype=np.float64)
+    scale = np.max(np.abs(x))
+    if scale == 0 or not np.isfinite(scale):
+        return scale
+    return scale*np.sqrt(np.sum((x/scale)**2))
+
+def _direction(r, x):
+    # derivative of the norm, taken to be 0 at the origin
+    return np.asarray(x, dtype=np.float64)/r if r > 0 else np.zeros(np.shape(x))
+
+def _cross_entropy(z, p):
+    p = np.asarray(p, dtype=np.float64)
+    return np.sum(p)*_logsumexp(z) - np.sum(p*z)
+
+def _cross_entropy_grad(z, p):
+    p = np.asarray(p, dtype=np.float64)
+    return np.sum(p)*_softmax(z, _logsumexp(z)) - p
+
+_logsumexp_p = register_primitive('logsumexp', _logsumexp,
+                                  jvp=lambda y, der, x: _softmax(x, y) @ der,
+                                  vjp=lambda y, x: lambda g: g*_softmax(x, y))
+_softplus_p = register_primitive('softplus', _softplus, lambda y, x: _sigmoid(x))
+_log_logistic_p = register_primitive('log_logistic', lambda x: -_softplus(-x),
+                                     lambda y, x: _sigmoid(-x))
+_norm_p = register_primitive('norm', _norm,
+                             jvp=lambda r, der, x: _direction(r, x) @ der,
+                             vjp=lambda r, x: lambda g: g*_direction(r, x))
+_cross_entropy_p = register_primitive('cross_entropy', _cross_entropy,
+                                      jvp=lambda y, der, z, p: _cross_entropy_grad(z, p) @ der,
+                                      vjp=lambda y, z, p: lambda g: g*_cross_entropy_grad(z, p))
+
+# reductions and linear algebra on vector values, propagating derivatives as matrices
+def _cotangent(g, shape):
+    # gradient of a result, which is the scalar 1.0 for the outer function
+    return np.broadcast_to(g, shape)
+
+def _dot_jvp(y, ders, a, b):
+    der = 0
+    if ders[0] is not None:
+        der = der + np.asarray(b) @ ders[0]
+    if ders[1] is not None:
+        der = der + np.asarray(a) @ ders[1]
+    return der
+
+def _matmul_jvp(y, ders, a, b):
+    # autodiff values are vectors, so the other operand is a constant matrix or vector
+    der = 0
+    if ders[0] is not None:
+        der = der + np.asarray(b).T @ ders[0]
+    if ders[1] is not None:
+        der = der + np.asarray(a) @ ders[1]
+    return der
+
+def _matmul_vjp(y, a, b):
+    return (lambda g: np.asarray(b) @ _cotangent(g, np.shape(y)),
+            lambda g: np.asarray(a).T @ _cotangent(g, np.shape(y)))
+
+_sum_p = register_primitive('sum', np.sum,
+                            jvp=lambda y, der, x: np.sum(der, axis=0),
+                            vjp=lambda y, x: lambda g: g*np.ones(np.shape(x)))
+_mean_p = register_primitive('mean', np.mean,
+                             jvp=lambda y, der, x: np.mean(der, axis=0),
+                             vjp=lambda y, x: lambda g: g*np.ones(np.shape(x))/np.size(x))
+_dot_p = register_primitive('dot', np.dot, jvp=_dot_jvp,
+                            vjp=lambda y, a, b: (lambda g: g*np.asarray(b), lambda g: g*np.asarray(a)),
+                            nargs=2)
+_matmul_p = register_primitive('matmul', np.matmul, jvp=_matmul_jvp, vjp=_matmul_vjp, nargs=2)
+
+def sin(x):
+    '''
+    sin(object)
+    
+    Return the sine of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the sine of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.sin(1.0)
+    0.8414709848078965
+    >>> b = AutoDiff.rAD(8.0)
+    >>> c = AutoDiff.sin(b)
+    >>> c.get_val()
+    0.98935824662338179
+    >>> x = AutoDiff.fAD(8.0)
+    >>> y = AutoDiff.sin(x)
+    >>> y.get_val()
+    0.98935824662338179
+    '''
+    return _sin(x)
+
+def cos(x):
+    '''
+    cos(object)
+    
+    Return the cosine of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the sine of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.cos(1.0)
+    0.54030230586813977
+    >>> b = AutoDiff.rAD(8.0)
+    >>> c = AutoDiff.cos(b)
+    >>> c.get_val()
+    -0.14550003380861354
+    >>> x = AutoDiff.fAD(8.0)
+    >>> y = AutoDiff.cos(x)
+    >>> y.get_val()
+    -0.14550003380861354
+    '''
+    return _cos(x)
+
+def arcsin(x):
+    '''
+    arcsin(object)
+    
+    Return the inverse sine of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the inverse sine of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.arcsin(1.0)
+    1.5707963267948966
+    >>> b = AutoDiff.rAD(-0.50)
+    >>> c = AutoDiff.arcsin(b)
+    >>> c.get_val()
+    -0.52359877559829893
+    >>> x = AutoDiff.fAD(-0.50)
+    >>> y = AutoDiff.arcsin(x)
+    >>> y.get_val()
+    -0.52359877559829893
+    '''
+    return _arcsin(x)
+
+def arccos(x):
+    '''
+    arccos(object)
+    
+    Return the inverse cosine of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the inverse cosine of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.arccos(1.0)
+    0.0
+    >>> b = AutoDiff.rAD(-0.50)
+    >>> c = AutoDiff.arccos(b)
+    >>> c.get_val()
+    2.0943951023931957
+    >>> x = AutoDiff.fAD(-0.50)
+    >>> y = AutoDiff.arccos(x)
+    >>> y.get_val()
+    2.0943951023931957
+    '''
+    return _arccos(x)
+
+def arctan(x):
+    '''
+    arctan(object)
+    
+    Return the inverse tangent of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the inverse tangent of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.arctan(1.0)
+    0.78539816339744828
+    >>> b = AutoDiff.rAD(1.0)
+    >>> c = AutoDiff.arctan(b)
+    >>> c.get_val()
+    0.78539816339744828
+    >>> x = AutoDiff.fAD(1.0)
+    >>> y = AutoDiff.arctan(x)
+    >>> y.get_val()
+    0.78539816339744828
+    '''
+    return _arctan(x)
+
+def sinh(x):
+    '''
+    arctan(object)
+    
+    Return the hyperbolic sine of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the hyperbolic sine of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.sinh(1.0)
+    1.1752011936438014
+    >>> b = AutoDiff.rAD(-0.50)
+    >>> c = AutoDiff.sinh(b)
+    >>> c.get_val()
+    -0.52109530549374738
+    >>> x = AutoDiff.fAD(-0.50)
+    >>> y = AutoDiff.sinh(x)
+    >>> y.get_val()
+    -0.52109530549374738
+    '''
+    return _sinh(x)
+
+def exp(x):
+    '''
+    exp(object)
+    
+    Return the exponential of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the exponential of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.exp(1.0)
+    2.7182818284590451
+    >>> b = AutoDiff.rAD(1.0)
+    >>> c = AutoDiff.exp(b)
+    >>> c.get_val()
+    2.7182818284590451
+    >>> x = AutoDiff.fAD(1.0)
+    >>> y = AutoDiff.exp(x)
+    >>> y.get_val()
+    2.7182818284590451
+    '''
+    return _exp(x)
+
+def logistic(x):
+    '''
+    logistic(object)
+    
+    Return the standard logistic of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the standard logistic of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.logistic(1.0)
+    0.7310585786300049
+    >>> b = AutoDiff.rAD(1.0)
+    >>> c = AutoDiff.logistic(b)
+    >>> c.get_val()
+    0.7310585786300049
+    >>> x = AutoDiff.fAD(1.0)
+    >>> y = AutoDiff.logistic(x)
+    >>> y.get_val()
+    0.7310585786300049
+    '''
+    return _logistic(x)
+
+def log(x,base=np.e):
+    '''
+    log(object)
+    
+    Return the natural logarithm of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the natural logarithm of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.log(1.0)
+    0.0
+    >>> b = AutoDiff.rAD(1.0)
+    >>> c = AutoDiff.log(b)
+    >>> c.get_val()
+    0.0
+    >>> x = AutoDiff.fAD(1.0)
+    >>> y = AutoDiff.log(x)
+    >>> y.get_val()
+    0.0
+    '''
+    return _log(x, base)
+
+def tan(x):
+    '''
+    tan(object)
+    
+    Return the tangent of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the tangent of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.tan(1.0)
+    1.5574077246549023
+    >>> b = AutoDiff.rAD(1.0)
+    >>> c = AutoDiff.tan(b)
+    >>> c.get_val()
+    1.5574077246549023
+    >>> x = AutoDiff.fAD(1.0)
+    >>> y = AutoDiff.tan(x)
+    >>> y.get_val()
+    1.5574077246549023
+    '''
+    return _tan(x)
+
+def cosh(x):
+    '''
+    cosh(object)
+    
+    Return the hyperbolic cosine of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the hyperbolic cosine of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.cosh(1.0)
+    1.5430806348152437
+    >>> b = AutoDiff.rAD(0.50)
+    >>> c = AutoDiff.cosh(b)
+    >>> c.get_val()
+    1.1276259652063807
+    >>> x = AutoDiff.fAD(0.50)
+    >>> y = AutoDiff.cosh(x)
+    >>> y.get_val()
+    1.1276259652063807
+    '''
+    return _cosh(x)
+
+def tanh(x):
+    '''
+    tanh(object)
+    
+    Return the hyperbolic tangent of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the hyperbolic tangent of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.tanh(1.0)
+    0.76159415595576485
+    >>> b = AutoDiff.rAD(0.50)
+    >>> c = AutoDiff.tanh(b)
+    >>> c.get_val()
+    0.46211715726000974
+    >>> x = AutoDiff.fAD(0.50)
+    >>> y = AutoDiff.tanh(x)
+    >>> y.get_val()
+    0.46211715726000974
+    '''
+    return _tanh(x)
+
+def sqrt(x):
+    '''
+    sqrt(object)
+    
+    Return the non-negative square-root of the input object.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.  
+
+    Returns
+    --------------
+    out: the non-negative square-root of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> AutoDiff.sqrt(4.0)
+    2.0
+    >>> b =  AutoDiff.rAD(4.0)
+    >>> c = AutoDiff.sqrt(b)
+    >>> c.get_val()
+    2.0
+    >>> x = AutoDiff.fAD(9.0)
+    >>> y = AutoDiff.sqrt(x)
+    >>> y.get_val()
+    3.0
+    '''
+    return _sqrt(x)
+
+def logsumexp(x):
+    '''
+    logsumexp(object)
+
+    Return log(sum(exp(x))) over the values of the input object, without overflow.
+
+    Parameters
+    --------------
+    object: a number or array, or an autodiff object, whether forward-, or reverse-mode.
+
+    Returns
+    --------------
+    out: the log-sum-exp of the input object, a single value.
+        Numeric if input is numeric, or an autodiff object recorded as one node if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> float(AutoDiff.logsumexp([1000.0, 1000.0]))
+    1000.6931471805599
+    >>> x = AutoDiff.rAD([0.0, 0.0])
+    >>> f = AutoDiff.logsumexp(x)
+    >>> f.outer()
+    >>> x.grad().tolist()
+    [0.5, 0.5]
+    '''
+    return _logsumexp_p(x)
+
+def softplus(x):
+    '''
+    softplus(object)
+
+    Return log(1 + exp(x)) of the input object, without overflow.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.
+
+    Returns
+    --------------
+    out: the softplus of the input object.
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> float(AutoDiff.softplus(1000.0))
+    1000.0
+    >>> y = AutoDiff.softplus(AutoDiff.fAD(0.0))
+    >>> y.der.tolist()
+    [[0.5]]
+    '''
+    return _softplus_p(x)
+
+def log_logistic(x):
+    '''
+    log_logistic(object)
+
+    Return the logarithm of the standard logistic of the input object, without overflow.
+
+    Parameters
+    --------------
+    object: a number, or an autodiff object, whether forward-, or reverse-mode.
+
+    Returns
+    --------------
+    out: the log-logistic of the input object, equal to -softplus(-x).
+        Numeric if input is a number, or an autodiff object if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> float(AutoDiff.log_logistic(-1000.0))
+    -1000.0
+    '''
+    return _log_logistic_p(x)
+
+def norm(x):
+    '''
+    norm(object)
+
+    Return the Euclidean norm sqrt(sum(x**2)) over the values of the input object, without overflow.
+
+    Parameters
+    --------------
+    object: a number or array, or an autodiff object, whether forward-, or reverse-mode.
+
+    Returns
+    --------------
+    out: the norm of the input object, a single value. Its derivative at the origin is taken to be 0.
+        Numeric if input is numeric, or an autodiff object recorded as one node if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> print('%.6g' % AutoDiff.norm([3e200, 4e200]))
+    5e+200
+    >>> y = AutoDiff.norm(AutoDiff.fAD([3.0, 4.0], [[1.0, 0.0], [0.0, 1.0]]))
+    >>> y.der.tolist()
+    [[0.6, 0.8]]
+    '''
+    return _norm_p(x)
+
+def cross_entropy(logits, target):
+    '''
+    cross_entropy(logits, target)
+
+    Return the cross-entropy -sum(target*log(softmax(logits))) of target probabilities
+    against the softmax of the logits, without overflow.
+
+    Parameters
+    --------------
+    logits: a number or array, or an autodiff object, whether forward-, or reverse-mode.
+
+    target: array_like
+        constant target probabilities, of the same length as logits
+
+    Returns
+    --------------
+    out: the cross-entropy, a single value.
+        Numeric if logits are numeric, or an autodiff object recorded as one node if logits are an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> z = AutoDiff.rAD([0.0, 0.0])
+    >>> f = AutoDiff.cross_entropy(z, [1.0, 0.0])
+    >>> round(float(f.val[0]), 6)
+    0.693147
+    >>> f.outer()
+    >>> z.grad().tolist()
+    [-0.5, 0.5]
+    '''
+    return _cross_entropy_p(logits, target)
+
+def sum(x):
+    '''
+    sum(object)
+
+    Return the sum of the values of the input object.
+
+    Parameters
+    --------------
+    object: a number or array, or an autodiff object, whether forward-, or reverse-mode.
+
+    Returns
+    --------------
+    out: the sum of the input object, a single value.
+        Numeric if input is numeric, or an autodiff object recorded as one node if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> x = AutoDiff.rAD([1.0, 2.0, 3.0])
+    >>> f = AutoDiff.sum(x*x)
+    >>> f.outer()
+    >>> x.grad().tolist()
+    [2.0, 4.0, 6.0]
+    '''
+    return _sum_p(x)
+
+def mean(x):
+    '''
+    mean(object)
+
+    Return the mean of the values of the input object.
+
+    Parameters
+    --------------
+    object: a number or array, or an autodiff object, whether forward-, or reverse-mode.
+
+    Returns
+    --------------
+    out: the mean of the input object, a single value.
+        Numeric if input is numeric, or an autodiff object recorded as one node if input is an autodiff object.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> y = AutoDiff.mean(AutoDiff.fAD([1.0, 3.0], [[1.0, 0.0], [0.0, 1.0]]))
+    >>> y.der.tolist()
+    [[0.5, 0.5]]
+    '''
+    return _mean_p(x)
+
+def dot(a, b):
+    '''
+    dot(a, b)
+
+    Return the dot product of two vectors.
+
+    Parameters
+    --------------
+    a, b: arrays, or autodiff objects of the same mode, at least one of them an autodiff object
+        for the result to be one.
+
+    Returns
+    --------------
+    out: the dot product, a single value.
+        Numeric if both inputs are numeric, or an autodiff object recorded as one node otherwise.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> x = AutoDiff.rAD([1.0, 2.0])
+    >>> f = AutoDiff.dot(x, [3.0, 4.0])
+    >>> f.outer()
+    >>> x.grad().tolist()
+    [3.0, 4.0]
+    '''
+    return _dot_p(a, b)
+
+def matmul(a, b):
+    '''
+    matmul(a, b)
+
+    Return the matrix product of a constant matrix and an autodiff vector, A @ x or x @ A.
+
+    Parameters
+    --------------
+    a, b: a constant 2-dimensional array and an autodiff object (or array) whose values form a vector.
+        The derivatives are propagated with one matrix product, e.g. A @ der, instead of one edge per element.
+
+    Returns
+    --------------
+    out: the product, a vector.
+        Numeric if both inputs are numeric, or an autodiff object recorded as one node otherwise.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> x = AutoDiff.fAD([1.0, 2.0], [[1.0, 0.0], [0.0, 1.0]])
+    >>> y = AutoDiff.matmul([[1.0, 1.0], [0.0, 2.0], [3.0, 0.0]], x)
+    >>> y.val.tolist(), y.der.tolist()
+    ([3.0, 4.0, 3.0], [[1.0, 1.0], [0.0, 2.0], [3.0, 0.0]])
+    '''
+    return _matmul_p(a, b)
+
+_EINSUM = {}
+
+def _einsum_parse(subscripts, count):
+    '''
+    Split einsum subscripts into those of the operands and of the output, filling in an implicit output.
+    '''
+    subscripts = subscripts.replace(' ', '')
+    if '.' in subscripts:
+        raise ValueError('einsum of autodiff objects does not support ellipses.')
+    if '->' in subscripts:
+        inputs, output = subscripts.split('->')
+    else:
+        inputs = subscripts
+        letters = inputs.replace(',', '')
+        output = ''.join(sorted(c for c in set(letters) if letters.count(c) == 1))
+    inputs = inputs.split(',')
+    if len(inputs) != count:
+        raise ValueError('einsum subscripts do not match the number of operands.')
+    return inputs, output
+
+def _einsum_primitive(count):
+    '''
+    The einsum primitive of count operands, differentiated with respect to each of them.
+    Its last argument is the subscripts.
+    '''
+    if count in _EINSUM:
+        return _EINSUM[count]
+
+    def value(*args):
+        out = np.einsum(args[-1], *args[:-1])
+        return out.reshape(-1) if np.ndim(out) > 1 else out
+
+    def jvp(y, ders, *args):
+        inputs, output = _einsum_parse(args[-1], count)
+        der = 0
+        for i, d in enumerate(ders):
+            if d is None:
+                continue
+            # an extra axis, named by a letter not in use, carries the derivative directions
+            extra = next(c for c in 'zyxwvutsrqponmlkjihgfedcbaZYXWVUTSRQPONMLKJIHGFEDCBA'
+                         if c not in ''.join(inputs) + output)
+            terms = list(inputs)
+            terms[i] += extra
+            operands = list(args[:-1])
+            operands[i] = d
+            part = np.einsum(','.join(terms) + '->' + output + extra, *operands)
+            der = der + part.reshape(-1, np.shape(d)[-1])
+        return der
+
+    def vjp(y, *args):
+        inputs, output = _einsum_parse(args[-1], count)
+        sizes = {}
+        for term, operand in zip(inputs, args[:-1]):
+            sizes.update(zip(term, np.shape(operand)))
+        # results are stored flattened
+        shape = tuple(sizes[c] for c in output)
+        def rule(i):
+            def apply(g):
+                others = [t for j, t in enumerate(inputs) if j != i]
+                available = ''.join(others) + output
+                target = ''.join(c for c in inputs[i] if c in available)
+                operands = [o for j, o in enumerate(args[:-1]) if j != i]
+                grad = np.einsum(','.join(others + [output]) + '->' + target,
+                                 *operands, _cotangent(g, np.shape(y)).reshape(shape))
+                # indices summed over within operand i alone get a broadcast gradient
+                expanded = [sizes[c] if c in available else 1 for c in inputs[i]]
+                return np.broadcast_to(grad.reshape(expanded), np.shape(args[i]))
+            return apply
+        return tuple(rule(i) for i in range(count))
+
+    prim = Primitive('einsum', value, jvp=jvp, vjp=vjp, nargs=count)
+    _EINSUM[count] = prim
+    return prim
+
+def einsum(subscripts, *operands):
+    '''
+    einsum(subscripts, *operands)
+
+    Return the Einstein summation of the operands, as numpy.einsum does.
+
+    Parameters
+    --------------
+    subscripts: str
+        numpy.einsum subscripts, without ellipses. Autodiff operands have vector values,
+        so they take a single index; constant operands may have any shape.
+
+    operands: arrays, or autodiff objects of the same mode
+
+    Returns
+    --------------
+    out: the summation, flattened to a vector if it has more than one dimension.
+        Numeric if all operands are numeric, or an autodiff object recorded as one node otherwise.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> x = AutoDiff.rAD([1.0, 2.0])
+    >>> f = AutoDiff.einsum('ij,j->', [[1.0, 0.0], [2.0, 3.0]], x)
+    >>> f.outer()
+    >>> x.grad().tolist()
+    [3.0, 3.0]
+    '''
+    inputs, _ = _einsum_parse(subscripts, len(operands))
+    for term, operand in zip(inputs, operands):
+        if isinstance(operand, (fAD, rAD)) and len(term) != 1:
+            raise ValueError('Autodiff operands of einsum need a single index.')
+    return _einsum_primitive(len(operands))(*operands, subscripts)
+
+_CONCATENATE = {}
+
+def _concatenate_primitive(count):
+    '''
+    The primitive joining count operands into one vector, differentiated with respect to each of them.
+    '''
+    if count in _CONCATENATE:
+        return _CONCATENATE[count]
+
+    def value(*xs):
+        return np.concatenate([np.reshape(x, -1) for x in xs])
+
+    def jvp(y, ders, *xs):
+        width = next(np.shape(d)[1] for d in ders if d is not None)
+        return np.concatenate([d if d is not None else np.zeros((np.size(x), width))
+                               for d, x in zip(ders, xs)])
+
+    def vjp(y, *xs):
+        ends = np.cumsum([np.size(x) for x in xs])
+        def rule(i):
+            start = ends[i-1] if i else 0
+            return lambda g: _cotangent(g, np.shape(y))[start:ends[i]]
+        return tuple(rule(i) for i in range(count))
+
+    prim = Primitive('concatenate', value, jvp=jvp, vjp=vjp, nargs=count)
+    _CONCATENATE[count] = prim
+    return prim
+
+def concatenate(objects):
+    '''
+    concatenate(objects)
+
+    Join the values of autodiff objects and arrays into one vector.
+
+    Parameters
+    --------------
+    objects: sequence of numbers, arrays or autodiff objects of the same mode, e.g. a list or object array
+        of scalar autodiff objects, to be differentiated through vectorized operations afterwards.
+
+    Returns
+    --------------
+    out: the joined values, a vector.
+        Numeric if all inputs are numeric, or an autodiff object recorded as one node otherwise.
+
+    Example
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> import numpy as np
+    >>> x, y = AutoDiff.create_r([1.0, 2.0])
+    >>> f = np.sum(np.concatenate([x, y])**2)
+    >>> f.outer()
+    >>> print(x.grad().tolist(), y.grad().tolist())
+    [2.0] [4.0]
+    '''
+    objects = list(objects)
+    return _concatenate_primitive(len(objects))(*objects)
+
+# NumPy functions on autodiff objects. fAD and rAD implement NumPy's dispatch
+# protocols, __array_ufunc__ and __array_function__, which look functions up here.
+def _operator(forward, reflected):
+    '''
+    A binary ufunc as the operator of whichever argument is an autodiff object, e.g. array*x as x.__rmul__(array).
+    '''
+    def apply(a, b):
+        if isinstance(a, (fAD, rAD)):
+            return getattr(a, forward)(b)
+        return getattr(b, reflected)(a)
+    return apply
+
+def _dot(a, b):
+    # a constant matrix makes a matrix-vector product
+    if any(np.ndim(c) == 2 for c in (a, b) if not isinstance(c, (fAD, rAD))):
+        return _matmul_p(a, b)
+    return _dot_p(a, b)
+
+def _stack(arrays):
+    # autodiff values are vectors, so only single values stack
+    if any((len(a.val) if isinstance(a, (fAD, rAD)) else np.size(a)) != 1 for a in arrays):
+        return NotImplemented
+    return concatenate(arrays)
+
+# ufuncs, applied to autodiff objects by the rule they map to
+UFUNCS = {
+    np.add: _operator('__add__', '__radd__'),
+    np.subtract: _operator('__sub__', '__rsub__'),
+    np.multiply: _operator('__mul__', '__rmul__'),
+    np.divide: _operator('__truediv__', '__rtruediv__'),
+    np.power: _operator('__pow__', '__rpow__'),
+    np.negative: lambda x: -x,
+    np.positive: lambda x: x,
+    np.absolute: abs,
+    np.square: lambda x: x**2,
+    np.reciprocal: lambda x: 1/x,
+    np.sin: _sin, np.cos: _cos, np.tan: _tan,
+    np.arcsin: _arcsin, np.arccos: _arccos, np.arctan: _arctan,
+    np.sinh: _sinh, np.cosh: _cosh, np.tanh: _tanh,
+    np.exp: _exp, np.sqrt: _sqrt, np.log: _log,
+    np.log2: lambda x: _log(x, 2),
+    np.log10: lambda x: _log(x, 10),
+    np.matmul: _matmul_p,
+}
+
+# array functions, called with positional arguments only; any other function behaves as for other objects
+ARRAY_FUNCTIONS = {
+    np.sum: sum,
+    np.mean: mean,
+    np.dot: _dot,
+    np.einsum: einsum,
+    np.linalg.norm: norm,
+    np.concatenate: concatenate,
+    np.hstack: concatenate,
+    np.stack: _stack,
+}
+
+def _as_object(a):
+    '''
+    Wrap an autodiff object in a 0-d object array.
+    '''
+    out = np.empty((), dtype=object)
+    out[()] = a
+    return out
+
+def _from_objects(a):
+    '''
+    Join a vector object array of scalar autodiff objects and numbers into one autodiff object, or return None.
+    '''
+    if a.ndim != 1 or not any(isinstance(e, (fAD, rAD)) for e in a):
+        return None
+    if any(isinstance(e, (fAD, rAD)) and len(e.val) != 1 for e in a):
+        return None
+    return concatenate(a)
+
+def _array_ufunc(ufunc, method, inputs, kwargs):
+    '''
+    Apply a NumPy ufunc to autodiff objects, or return NotImplemented for NumPy to raise a TypeError.
+    '''
+    rule = UFUNCS.get(ufunc)
+    if any(isinstance(a, np.ndarray) and a.dtype == object for a in inputs):
+        joined = [_from_objects(a) if isinstance(a, np.ndarray) and a.dtype == object else a for a in inputs]
+        if rule is None or method != '__call__' or kwargs or any(a is None for a in joined):
+            # e.g. 2-d object arrays keep NumPy's element-by-element loop
+            return getattr(ufunc, method)(*[_as_object(a) if isinstance(a, (fAD, rAD)) else a for a in inputs],
+                                          **kwargs)
+        inputs = joined
+    if rule is None or method != '__call__' or kwargs:
+        return NotImplemented
+    if any(isinstance(a, fAD) for a in inputs) and any(isinstance(a, rAD) for a in inputs):
+        return NotImplemented
+    return rule(*inputs)
+
+def _array_function(func, args, kwargs):
+    '''
+    Apply a NumPy function to autodiff objects, or return NotImplemented for NumPy to raise a TypeError.
+    '''
+    rule = ARRAY_FUNCTIONS.get(func)
+    if rule is None:
+        # e.g. np.shape(x), unchanged by the dispatch
+        return func._implementation(*args, **kwargs)
+    if kwargs:
+        return NotImplemented
+    return rule(*args)
@@ -0,0 +1,222 @@
+'''
+Opt-in profiling of automatic differentiation by operation.
+
+enable() replaces the operators of fAD and rAD, Primitive.__call__ (through
+which every elemental is applied), rAD.grad and the backward rule it applies
+to every edge with timed versions, and disable() puts the originals back. While
+profiling is disabled it costs one check per node of a backward sweep, which
+otherwise applies the edge rule inline.
+
+Calls and times are kept per operation and phase. Forward entries are named
+by mode and operation, e.g. 'rAD.mul' or 'numeric.sin'. Backward entries
+charge each edge of the reverse sweep to the operation that created the node
+it comes from, so they share those names, and the sweep as a whole is
+reported as 'rAD.grad'. 'self' times exclude nested profiled calls. To name
+them, rAD results record their op while profiling, which makes their graphs
+reference cycles left to the garbage collector.
+
+Profiling patches the classes, Primitive and the edge hook, so it covers every caller,
+but it is meant for one thread at a time.
+'''
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from . import AutoDiff, Reverse
+
+# dunder methods of both classes, by the name of the operation they record
+OPERATORS = {
+    '__add__': 'add', '__radd__': 'add',
+    '__sub__': 'sub', '__rsub__': 'sub',
+    '__mul__': 'mul', '__rmul__': 'mul',
+    '__truediv__': 'div', '__rtruediv__': 'div',
+    '__pow__': 'pow', '__rpow__': 'pow',
+    '__neg__': 'neg', '__abs__': 'abs',
+    '__eq__': 'eq', '__ne__': 'ne',
+}
+
+_stats = {}
+_originals = []
+_local = threading.local()
+
+def _children_times():
+    # time spent in nested profiled calls, one entry per active call
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def _record(name, phase, elapsed, own):
+    stat = _stats.get((name, phase))
+    if stat is None:
+        stat = _stats[(name, phase)] = [0, 0.0, 0.0]
+    stat[0] += 1
+    stat[1] += elapsed
+    stat[2] += own
+
+def _timed(function, name, phase, *args):
+    stack = _children_times()
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        _record(name, phase, elapsed, elapsed - nested)
+        if stack:
+            stack[-1] += elapsed
+
+def _operator(function, name):
+    def wrapper(*args):
+        return _timed(function, name, 'forward', *args)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def _primitive_call(function):
+    def wrapper(self, *args):
+        mode = 'numeric'
+        for a in args[:self.nargs]:
+            if isinstance(a, AutoDiff.fAD):
+                mode = 'fAD'
+                break
+            if isinstance(a, AutoDiff.rAD):
+                mode = 'rAD'
+                break
+        return _timed(function, mode + '.' + self.name, 'forward', self, *args)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def _grad(function):
+    def grad(self):
+        '''
+        rAD.grad(), timing the sweep as a whole.
+        '''
+        if self.der is not None or _children_times():
+            # cached, or a step of a sweep already timed
+            return function(self)
+        return _timed(function, 'rAD.grad', 'backward', self)
+    grad.__wrapped__ = function
+    return grad
+
+def _edge(function):
+    def edge(weight, child):
+        # charged to the operation that created the child, the sweep below it counts as nested
+        name = 'rAD.' + (child.op[0] if child.op is not None else 'unrecorded')
+        return _timed(function, name, 'backward', weight, child)
+    edge.__wrapped__ = function
+    return edge
+
+def _patch(owner, attr, replacement):
+    _originals.append((owner, attr, owner.__dict__[attr]))
+    setattr(owner, attr, replacement)
+
+def enable():
+    '''
+    enable()
+
+    Start profiling, replacing the profiled methods with timed versions. Counters are kept; see reset().
+    '''
+    if _originals:
+        return
+    for cls in (AutoDiff.fAD, AutoDiff.rAD):
+        prefix = cls.__name__ + '.'
+        for attr, name in OPERATORS.items():
+            if attr in cls.__dict__:
+                _patch(cls, attr, _operator(cls.__dict__[attr], prefix + name))
+    _patch(AutoDiff.Primitive, '__call__', _primitive_call(AutoDiff.Primitive.__dict__['__call__']))
+    _patch(AutoDiff.rAD, 'grad', _grad(AutoDiff.rAD.__dict__['grad']))
+    _patch(Reverse, '_edge_hook', _edge(Reverse._edge))
+    # backward entries are named by the op of each node, which is only recorded on request
+    _patch(Reverse, '_record_ops', True)
+
+def disable():
+    '''
+    disable()
+
+    Stop profiling, restoring the original methods. Counters are kept; see reset().
+    '''
+    while _originals:
+        owner, attr, original = _originals.pop()
+        setattr(owner, attr, original)
+
+def is_enabled():
+    '''
+    Returns
+    --------------
+    out: bool, whether profiling is enabled
+    '''
+    return bool(_originals)
+
+def reset():
+    '''
+    reset()
+
+    Clear all counters.
+    '''
+    _stats.clear()
+
+@contextmanager
+def profiling(clear=True):
+    '''
+    profiling(clear = True)
+
+    Context manager profiling its block, after clearing the counters unless clear is False.
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Profiler
+    >>> with Profiler.profiling():
+    ...  x = AutoDiff.rAD(2.0)
+    ...  f = AutoDiff.sin(x)*x
+    ...  f.outer()
+    ...  g = x.grad()
+    >>> sorted((s['name'], s['phase'], s['calls']) for s in Profiler.stats())
+    [('rAD.grad', 'backward', 1), ('rAD.mul', 'backward', 2), ('rAD.mul', 'forward', 1), ('rAD.sin', 'backward', 1), ('rAD.sin', 'forward', 1)]
+    '''
+    if clear:
+        reset()
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+def stats(sort='self'):
+    '''
+    stats(sort = 'self')
+
+    Returns
+    --------------
+    out: list of dicts with the 'name', 'phase', number of 'calls', and 'total' and 'self' seconds
+        of every profiled operation, in decreasing order of the sort key
+    '''
+    rows = [{'name': name, 'phase': phase, 'calls': calls, 'total': total, 'self': own}
+            for (name, phase), (calls, total, own) in _stats.items()]
+    rows.sort(key=lambda r: r[sort], reverse=True)
+    return rows
+
+def table(sort='self'):
+    '''
+    table(sort = 'self')
+
+    Returns
+    --------------
+    out: str, the counters as a text table
+    '''
+    lines = ['{:<24}{:<10}{:>10}{:>14}{:>14}'.format('operation', 'phase', 'calls', 'total (s)', 'self (s)')]
+    for r in stats(sort):
+        lines.append('{name:<24}{phase:<10}{calls:>10}{total:>14.6f}{self:>14.6f}'.format(**r))
+    return '\n'.join(lines)
+
+def to_json(sort='self'):
+    '''
+    to_json(sort = 'self')
+
+    Returns
+    --------------
+    out: str, the counters as a JSON list
+    '''
+    return json.dumps(stats(sort), indent=2)
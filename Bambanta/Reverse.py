@@ -0,0 +1,651 @@
+'''
+Reverse-mode automatic differentiation: rAD objects record, for every operation, the
+partial derivatives from each input to its result, and grad() sweeps them backward.
+'''
+import numpy as np
+import numbers
+
+from .Forward import _UFUNC_METHODS, _ufunc_method
+
+def create_r(vals):
+    '''
+    create_r(values)
+    
+    Create a reverse-mode autodiff object.
+
+    Parameters
+    --------------
+    values: numeric, or array_like
+        input variable values for automatic differentiation.
+        input can be a single number for univariate operations.
+        For multivariate operations, input values as an array.
+        Allows for up to 2-dimensional input.
+        *This method allows for simultaneous variable assignments.* 
+
+    Returns
+    --------------
+    out: reverse-mode automatic differentiation object
+        satisfying the specific requirements.
+
+    
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> a = AutoDiff.create_r(2.0)
+    >>> f = AutoDiff.sin(a)
+    >>> f.outer()
+    >>> f.get_val() #outputs function value
+    0.90929742682568171
+    >>> a.get_grad() #outputs df/da
+    -0.41614683654714241
+    '''
+    if np.array(vals).ndim == 0:
+        return rAD(vals)
+    elif np.array(vals).ndim > 2:
+        raise ValueError('Input is at most 2D.')
+    else:
+        ADs = [rAD(val) for val in vals]
+        return ADs
+
+def stack_r(vals, functions):
+    '''
+    stack_r(vals，functions)
+    
+    Initiate vector of functions for differentiation.
+    
+    Parameters
+    --------------
+    vals: array_like
+        input reverse-mode autodiff variable values
+
+    functions: array_like
+        input functions for differentiation
+        *functions must share an equal number of variables for differentiation*
+        *functions must only contain computations supported by reverse-mode
+        autodiff objects*
+                
+    Returns
+    --------------
+    out: Jacobian matrix of partial derivatives
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> def f1(x, y):
+    ...  return 2*x + y
+    >>> def f2(x, y):
+    ...  return 3*x + 2*y
+    >>> f = AutoDiff.stack_r([1, 3], [f1, f2])
+    >>> f[0]
+    array([5, 9])
+    >>> f[1][0]
+    array([ 2.,  1.])
+    >>> f[1][1]
+    array([ 3.,  2.])
+    
+    '''
+    jac = []
+    f_vals = []
+    for f in functions:
+        vars = [rAD(val) for val in vals]
+        f_obj = f(*vars)
+        f_obj.outer()
+        f_vals.append(f_obj.get_val())
+        grad = [var.get_grad() for var in vars]
+        jac.append(grad)
+    return np.array(f_vals), np.array(jac)
+
+# whether reverse-mode operations record derivatives, see no_grad()
+_grad_enabled = True
+
+class set_grad_enabled:
+    '''
+    set_grad_enabled(mode)
+
+    Context manager, or function decorator, switching the recording of
+    reverse-mode derivatives on or off.
+
+    Parameters
+    --------------
+    mode: bool
+        when False, operations on reverse-mode autodiff objects compute values only:
+        no children are recorded and no partial derivatives are computed.
+    '''
+    def __init__(self, mode):
+        self.mode = bool(mode)
+
+    def __enter__(self):
+        global _grad_enabled
+        self.prev = _grad_enabled
+        _grad_enabled = self.mode
+
+    def __exit__(self, *exc):
+        global _grad_enabled
+        _grad_enabled = self.prev
+
+    def __call__(self, function):
+        def wrapper(*args, **kwargs):
+            with set_grad_enabled(self.mode):
+                return function(*args, **kwargs)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+
+class no_grad(set_grad_enabled):
+    '''
+    no_grad()
+
+    Context manager, or function decorator, in which reverse-mode autodiff objects
+    compute values only. Use it to run code written for differentiation when only
+    the value is needed.
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> x = AutoDiff.rAD(2.0)
+    >>> with AutoDiff.no_grad():
+    ...     f = AutoDiff.exp(x)*x
+    >>> print(round(f.get_val(), 6))
+    14.778112
+    >>> x.children
+    []
+    '''
+    def __init__(self):
+        super().__init__(False)
+
+# whether results also keep the operation and the objects they were computed from, see _recording
+_record_ops = False
+
+class _recording:
+    '''
+    _recording()
+
+    Context manager in which results of reverse-mode operations record their op, for Tape.record().
+    Outside of it op stays None: an op refers back to the parents, which refer to the result
+    through their children, so recording it makes every graph a reference cycle that only the
+    garbage collector can free.
+    '''
+    def __enter__(self):
+        global _record_ops
+        self.prev = _record_ops
+        _record_ops = True
+
+    def __exit__(self, *exc):
+        global _record_ops
+        _record_ops = self.prev
+
+def is_grad_enabled():
+    '''
+    is_grad_enabled()
+
+    Returns
+    --------------
+    out: True if reverse-mode operations currently record derivatives
+    '''
+    return _grad_enabled
+
+def _edge(weight, child):
+    '''
+    Contribution of one children edge to the gradient of its parent, the backward rule of rAD.grad().
+    '''
+    grad = child.grad()
+    return weight(grad) if callable(weight) else weight*grad
+
+# applied by rAD.grad() to every edge in place of its inline rule when set, e.g. a timed _edge while
+# Profiler is enabled; the inline rule costs no call per edge, nor a frame per level of the graph
+_edge_hook = None
+
+class rAD:
+    '''
+    rAD(value)
+
+    Create a reverse-mode autodiff object.
+
+    Parameters
+    --------------
+    value: number, or array_like if multiple values
+        input variable values for differentiation.
+        *Allows only 1-dimensional input of values, for 2-dimensional input, use create_r*
+
+    Attributes
+    --------------
+    val: array, shape of (1, n_values)
+        n_values determined by length of value input
+
+    der: default to None for input variables.
+        Use outer() to resert outer function derivative.
+
+    op: default to None.
+        For results of supported operations computed while Tape.record() traces a function,
+        a tuple (operation name, arguments) recording how the object was computed.
+
+    Returns
+    --------------
+    out: a reverse-mode autodiff object
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> a = AutoDiff.rAD(5.0)
+    >>> f = 2**a
+    >>> f.outer()
+    >>> f.get_val() #output function value
+    32.0
+    >>> a.get_grad() #output df/da
+    22.180709777918249
+    '''   
+    def __init__(self, vals):
+        # check dimension of 'value'
+        if np.array(vals).ndim > 1:
+            raise ValueError('Input should be a scaler or a vector of numbers.')
+        val = np.array([vals]).reshape(-1,)
+        # arrays of a numeric dtype hold numbers only, so only other arrays are checked element-wise
+        if val.dtype.kind not in 'iufc':
+            for i in val:
+                if not isinstance(i,numbers.Number):
+                    raise TypeError('Input should be a scaler or a vector of numbers.')
+        self.val = val
+        self.children = []
+        self.der = None
+        self.op = None
+
+
+    def grad(self):
+        '''
+        rAD.grad()
+
+        Get the gradient of the variable.
+    
+        Returns
+        --------------
+        out: array_like (vector for single-value operations, matrix for multi-value operations)
+            gradient of variable with respect to function.
+            *calling variable.grad() before variable.der will update
+            derivatives of variable from None to its gradient with respect to function.
+ 
+        Example
+        --------------
+        >>> from Bambanta import AutoDiff
+        >>> a= AutoDiff.rAD([5.0])
+        >>> f = 4*a
+        >>> f.outer()
+        >>> a.grad()
+        array([ 4.])
+        '''
+        if self.der is None:
+            der = 0
+            if _edge_hook is None:
+                for w,a in self.children:
+                    grad = a.grad()
+                    der = der + (w(grad) if callable(w) else w*grad)
+            else:
+                for w,a in self.children:
+                    der = der + _edge_hook(w, a)
+            self.der = der
+        return self.der
+
+
+    def get_val(self):
+        '''
+        rAD.get_val()
+
+        Get values of differentiated object.
+    
+        Returns
+        --------------
+        out: numeric, or array_like
+            function values as a result of supported operations (e.g. multiplication)
+
+        Example
+        --------------
+        >>> from Bambanta import AutoDiff
+        >>> x, y = AutoDiff.create_r([5.0, 7.0])
+        >>> f = 4*x + y
+        >>> f.outer()
+        >>> f.get_val()
+        27.0
+        '''
+        if np.shape(self.val)[0] == 1:
+            return self.val[0]
+        else:
+            return self.val
+
+    def get_grad(self):
+        '''
+        fAD.get_grad()
+
+        Get the gradient of variable.
+    
+        Returns
+        --------------
+        out: array_like (vector for single-value operations, matrix for multi-value operations)
+            gradient of variable with respect to function.
+            *calling variable.grad() before variable.der will update
+            derivatives of variable from None to its gradient with respect to function.*
+            *must call get_grad() for individual variables, and not for the function*
+            
+        Example
+        --------------
+        >>> from Bambanta import AutoDiff
+        >>> a,b = AutoDiff.create_r([[1,2],[3,4]])
+        >>> f = 4*a + 3**b
+        >>> f.outer()
+        >>> a.get_grad()
+        array([ 4.,  4.])
+        >>> b.get_grad()
+        array([ 29.66253179,  88.98759538])
+        '''
+        grad = self.grad()
+        if np.shape(grad)[0] == 1:
+            return grad[0]
+        else:
+            return grad
+
+    def __add__(self, other):
+        '''
+        Support addition between:
+        1. reverse autodiff objects
+        2. a reverse autodiff object and a number
+        '''
+        try:
+            ad = rAD(self.val + other.val)
+            if _grad_enabled:
+                self.children.append((np.array([1.0]*len(self.val)), ad))
+                other.children.append((np.array([1.0]*len(self.val)), ad))
+                if _record_ops:
+                    ad.op = ('add', (self, other))
+            return ad
+        except AttributeError:
+            ad = rAD(self.val + other)
+            if _grad_enabled:
+                self.children.append((np.array([1.0]*len(self.val)), ad))
+                if _record_ops:
+                    ad.op = ('add', (self, other))
+            return ad
+
+    def __radd__(self, other):
+        '''
+        Support addition between:
+        1. reverse autodiff objects
+        2. a number and a reverse autodiff object
+        '''
+        return self + other
+        # try:
+        #     ad = rAD(self.val + other.val)
+        #     self.children.append((np.array([1.0]*len(self.val)), ad))
+        #     other.children.append((np.array([1.0]*len(self.val)), ad))
+        #     return ad
+        # except AttributeError:
+        #     ad = rAD(self.val + other)
+        #     self.children.append((np.array([1.0]*len(self.val)), ad))
+        #     return ad
+
+    def __sub__(self, other):
+        '''
+        Support subtraction between:
+        1. reverse autodiff objects
+        2. a reverse autodiff object and a number
+        '''
+        try:
+            ad = rAD(self.val - other.val)
+            if _grad_enabled:
+                self.children.append((np.array([1.0]*len(self.val)), ad))
+                other.children.append((np.array([-1.0]*len(self.val)), ad))
+                if _record_ops:
+                    ad.op = ('sub', (self, other))
+            return ad
+        except AttributeError:
+            ad = rAD(self.val - other)
+            if _grad_enabled:
+                self.children.append((np.array([1.0]*len(self.val)), ad))
+                if _record_ops:
+                    ad.op = ('sub', (self, other))
+            return ad
+
+    def __rsub__(self, other):
+        '''
+        Support subtraction between:
+        1. reverse autodiff objects
+        2. a number and a reverse autodiff object
+        '''
+        return - self + other
+        # try:
+        #     ad = rAD(other.val - self.val)
+        #     self.children.append((np.array([-1.0]*len(self.val)), ad))
+        #     other.children.append((np.array([1.0]*len(self.val)), ad))
+        #     return ad
+        # except AttributeError:
+        #     ad = rAD(other - self.val)
+        #     self.children.append((np.array([-1.0]*len(self.val)), ad))
+        #     return ad
+
+    def __mul__(self, other):
+        '''
+        Support multiplication of:
+        1. reverse autodiff objects
+        2. a reverse autodiff object and a number
+        '''
+        try:
+            ad = rAD(self.val * other.val)
+            if _grad_enabled:
+                self.children.append((other.val, ad))
+                other.children.append((self.val, ad))
+                if _record_ops:
+                    ad.op = ('mul', (self, other))
+            return ad
+        except AttributeError:
+            ad = rAD(self.val * other)
+            if _grad_enabled:
+                # other is a number, or an array of one per value
+                self.children.append((np.ones(len(self.val))*other, ad))
+                if _record_ops:
+                    ad.op = ('mul', (self, other))
+            return ad
+
+    def __rmul__(self, other):
+        '''
+        Support multiplication of:
+        1. reverse autodiff objects
+        2. a number and a reverse autodiff object
+        '''
+        return self * other
+        # try:
+        #     ad = rAD(self.val * other.val)
+        #     self.children.append((other.val, ad))
+        #     other.children.append((self.val, ad))
+        #     return ad
+        # except AttributeError:
+        #     ad = rAD(self.val * other)
+        #     self.children.append((np.array([other]*len(self.val)), ad))
+        #     return ad
+
+    def __truediv__(self, other):
+        '''
+        Support division between:
+        1. reverse autodiff objects
+        2. a reverse autodiff and a number
+        '''
+        try:
+            ad = rAD(self.val / other.val)
+            if _grad_enabled:
+                self.children.append((1/other.val, ad))
+                other.children.append((-self.val/(other.val**2), ad))
+                if _record_ops:
+                    ad.op = ('div', (self, other))
+            return ad
+        except AttributeError:
+            ad = rAD(self.val / other)
+            if _grad_enabled:
+                self.children.append((1/other, ad))
+                if _record_ops:
+                    ad.op = ('div', (self, other))
+            return ad
+
+    def __rtruediv__(self, other):
+        '''
+        Support division between:
+        1. reverse autodiff objects
+        2. a number and a reverse division between
+        '''
+        return self**(-1) * other
+        # try:
+        #     ad = rAD(other.val / self.val)
+        #     self.children.append((-other.val/(self.val**2), ad))
+        #     other.children.append((1/self.val, ad))
+        #     return ad
+        # except AttributeError:
+        #     ad = rAD(other / self.val)
+        #     self.children.append((-other/(self.val**2), ad))
+        #     return ad
+
+    def __pow__(self, other):
+        '''
+        Support exponentiation of a reverse autodiff object
+        '''
+        try:
+            ad = rAD(self.val ** other.val)
+            if _grad_enabled:
+                self.children.append((self.val**(other.val-1)*other.val, ad))
+                other.children.append((self.val**other.val*np.log(self.val), ad))
+                if _record_ops:
+                    ad.op = ('pow', (self, other))
+            return ad
+        except AttributeError:
+            ad = rAD(self.val ** other)
+            if _grad_enabled:
+                self.children.append((self.val**(other-1)*other, ad))
+                if _record_ops:
+                    ad.op = ('pow', (self, other))
+            return ad
+
+    def __rpow__(self, other):
+        '''
+        Support exponentiation of a reverse autodiff object
+        '''
+        try:
+            ad = rAD(self.val ** other.val)
+            if _grad_enabled:
+                self.children.append((other.val**self.val*np.log(other.val), ad))
+                other.children.append((other.val**(self.val-1)*self.val, ad))
+                if _record_ops:
+                    ad.op = ('pow', (self, other))
+            return ad
+        except AttributeError:
+            ad = rAD(other ** self.val)
+            if _grad_enabled:
+                self.children.append((other**self.val*np.log(other), ad))
+                if _record_ops:
+                    ad.op = ('pow', (other, self))
+            return ad
+
+    def __neg__(self):
+        '''
+        Returns
+        --------------
+        out: the negative, or the opposite, of the autodiff object as a reverse autodiff object
+        '''
+        new = rAD(-self.val)
+        if _grad_enabled:
+            self.children.append((np.array([-1.0]*len(self.val)), new))
+            if _record_ops:
+                new.op = ('neg', (self,))
+        return new
+
+    def __abs__(self):
+        '''
+        Returns
+        --------------
+        out: the absolute of the autodiff object as a reverse autodiff object       
+        '''
+        new = rAD(abs(self.val))
+        if _grad_enabled:
+            self.children.append((self.val/abs(self.val), new))
+            if _record_ops:
+                new.op = ('abs', (self,))
+        return new
+
+    def __str__(self):
+        '''
+        Returns
+        --------------
+        out: "Reverse AutoDiff Object, value(s): {0}, gradient: {1}"
+            outputs autodiff object values, and gradient.
+            *when print(outer function), the gradient is 1.0, please print(variables)
+            to output gradient of variable with respect to function"
+        '''
+        return "Reverse AutoDiff Object, value(s): {0}, gradient: {1}".format(self.val, self.grad())
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        '''
+        Support NumPy ufuncs, e.g. np.sin(x) or array*x, through the autodiff primitives and operators
+        '''
+        from . import Primitives
+        return Primitives._array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        '''
+        Support NumPy functions, e.g. np.sum(x) or np.dot(x, y), through the autodiff primitives
+        '''
+        from . import Primitives
+        return Primitives._array_function(func, args, kwargs)
+
+    def __eq__(self, other):
+        '''
+        Allow comparisons between two reverse autodiff objects
+        '''
+        if self.val == other.val and self.der == other.der:
+            return True
+        else:
+            return False
+
+    def __ne__(self, other):
+        '''
+        Allow comparisons between two reverse autodiff objects
+        '''
+        if self.val == other.val and self.der == other.der:
+            return False
+        else:
+            return True
+
+    def outer(self):
+        '''
+        Set gradient of outer function to 1.0. Must be called when function is defined.
+        
+        Returns
+        --------------
+        out: self.der = 1.0
+        '''
+        self.der = 1.0
+
+for _name in _UFUNC_METHODS:
+    setattr(rAD, _name, _ufunc_method(_name))
+
+def reset_der(rADs):
+    '''
+    reset_der(rADs)
+    
+    Reset derivatives of reverse-mode autodiff objects
+
+    Parameters
+    --------------
+    rADs: a single reverse autodiff object, or an array of reverse autodiff objects.
+        Reverse-mode autodiff objects
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff
+    >>> x = AutoDiff.rAD(8)
+    >>> z = x**2
+    >>> z.outer()
+    >>> x.grad()
+    array([ 16.])
+    >>> AutoDiff.reset_der(x)
+    >>> x.der
+    '''
+    try:
+        rADs.der = None
+        rADs.children = []
+    except AttributeError:
+        for rAD in rADs:
+            rAD.der = None
+            rAD.children = []
@@ -0,0 +1,354 @@
+'''
+Local evaluation server, batching concurrent requests.
+
+Functions are registered by name, and clients ask for their values and
+Jacobians at single points, over TCP on localhost or a Unix socket. Requests
+for the same function that arrive within a latency window are evaluated
+together by batch_jacobian(), in one vectorized pass over all their points,
+so the cost of every operation is shared by the whole batch.
+
+The protocol is one JSON object per line. A request
+
+    {"id": 1, "function": "name", "x": [1.0, 2.0], "grad": true}
+
+gets the response
+
+    {"id": 1, "value": [...], "jacobian": [[...], ...]}
+
+with the Jacobian left out when "grad" is false, or {"id": 1, "error": "..."}.
+Responses come in the order their batches finish, matched by id.
+
+Evaluation runs on the event loop: the server is meant for many small,
+concurrent requests from local processes.
+'''
+import json
+import asyncio
+
+import numpy as np
+
+from .Jacobian import batch_jacobian, _check_batch
+from .Reverse import rAD, no_grad
+
+class Server:
+    '''
+    Server(functions = None, window = 0.002, max_batch = 1024, mode = 'auto')
+
+    Evaluate registered functions for asynchronous requests, batching those that arrive together.
+
+    Parameters
+    --------------
+    functions: dict, optional
+        functions to register, by name; see register()
+
+    window: float
+        seconds to wait after the first request of a batch for more requests to join it.
+        With 0, a batch holds the requests made before the event loop next runs its callbacks.
+
+    max_batch: int
+        batches with this many requests are evaluated at once, without waiting for the window
+
+    mode: 'auto', 'forward', 'chunked' or 'reverse', as for batch_jacobian()
+
+    Attributes
+    --------------
+    stats: dict counting the 'requests', the 'batches' evaluated and the 'errors' returned
+
+    Examples
+    --------------
+    >>> import asyncio
+    >>> from Bambanta import AutoDiff, Server
+    >>> server = Server.Server({'f': lambda x, y: x*AutoDiff.exp(y)})
+    >>> async def clients():
+    ...     return await asyncio.gather(*[server.evaluate('f', [x, 0.0]) for x in range(3)])
+    >>> [(v.tolist(), j.tolist()) for v, j in asyncio.run(clients())]
+    [([0.0], [[1.0, 0.0]]), ([1.0], [[1.0, 1.0]]), ([2.0], [[1.0, 2.0]])]
+    >>> server.stats
+    {'requests': 3, 'batches': 1, 'errors': 0}
+    '''
+    def __init__(self, functions=None, window=0.002, max_batch=1024, mode='auto'):
+        self.functions = {}
+        self._elementwise = {}
+        self.window = window
+        self.max_batch = max_batch
+        self.mode = mode
+        self.stats = {'requests': 0, 'batches': 0, 'errors': 0}
+        # pending requests as (x, future), by function name, input size and whether a Jacobian is asked
+        self._pending = {}
+        for name, function in (functions or {}).items():
+            self.register(name, function)
+
+    def register(self, name, function, elementwise=True):
+        '''
+        Server.register(name, function, elementwise = True)
+
+        Parameters
+        --------------
+        name: str
+            name requests use
+
+        function: callable
+            function as for batch_jacobian()
+
+        elementwise: bool
+            whether function acts on the points of a batch independently, so that they can be
+            evaluated together. Functions that reduce over their inputs, e.g. with sum() or dot(),
+            are found out and evaluated point by point; functions that mix the points in any other
+            way must be registered with elementwise False.
+        '''
+        self.functions[name] = function
+        self._elementwise[name] = bool(elementwise)
+
+    async def evaluate(self, name, x, grad=True):
+        '''
+        Server.evaluate(name, x, grad = True)
+
+        Evaluate a registered function at one point, in a batch with concurrent requests.
+
+        Returns
+        --------------
+        out: (values, Jacobian) of shapes (n_outputs,) and (n_outputs, n_inputs), or values only if grad is False
+        '''
+        if name not in self.functions:
+            raise ValueError('No function registered as {!r}.'.format(name))
+        x = np.array(x, dtype=np.float64).reshape(-1)
+        self.stats['requests'] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (name, len(x), bool(grad))
+        batch = self._pending.setdefault(key, [])
+        batch.append((x, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        '''
+        Evaluate the pending batch of a key, and resolve its futures.
+        '''
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        self.stats['batches'] += 1
+        name, _, grad = key
+        function = self.functions[name]
+        points = np.array([x for x, _ in batch])
+        results = None
+        if self._elementwise[name]:
+            try:
+                results = self._batch(function, points, grad)
+            except Exception: # a failing point, or an output reduced over the points
+                pass
+        if results is None:
+            # point by point, so that functions reducing over the batch get their own results
+            # and failing points do not fail the others
+            results = []
+            for x in points:
+                try:
+                    results.append(self._batch(function, x[None, :], grad)[0])
+                except Exception as e:
+                    results.append(e)
+        for (_, future), result in zip(batch, results):
+            if future.done(): # cancelled by the client
+                continue
+            if isinstance(result, Exception):
+                self.stats['errors'] += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _batch(self, function, points, grad):
+        if grad:
+            vals, jac = batch_jacobian(function, points, self.mode)
+            return list(zip(vals, jac))
+        # values only, on autodiff objects so that reductions over the points are found out
+        with no_grad():
+            out = function(*[rAD(column) for column in points.T])
+        out = out if isinstance(out, (list, tuple)) else [out]
+        columns = []
+        for k, o in enumerate(out):
+            if isinstance(o, rAD):
+                _check_batch(o, k, len(points))
+                o = o.val
+            columns.append(np.broadcast_to(np.asarray(o, dtype=np.float64), len(points)))
+        return list(np.column_stack(columns))
+
+    async def _respond(self, request, writer):
+        try:
+            request = json.loads(request)
+            result = await self.evaluate(request['function'], request['x'], request.get('grad', True))
+            if isinstance(result, tuple):
+                response = {'value': result[0].tolist(), 'jacobian': result[1].tolist()}
+            else:
+                response = {'value': result.tolist()}
+        except Exception as e:
+            response = {'error': '{0}: {1}'.format(type(e).__name__, e)}
+        if isinstance(request, dict):
+            response['id'] = request.get('id')
+        writer.write(json.dumps(response).encode() + b'\n')
+
+    async def _connection(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # requests of one connection are evaluated concurrently, so they can share batches
+                task = asyncio.ensure_future(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if len(tasks) >= self.max_batch:
+                    await writer.drain()
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        '''
+        Server.start(host = '127.0.0.1', port = 0, path = None)
+
+        Start accepting connections on TCP, or on a Unix socket if path is given.
+
+        Parameters
+        --------------
+        host: str
+            address to listen on; the default only accepts local connections
+
+        port: int
+            TCP port, 0 for any free port
+
+        path: str, optional
+            path of a Unix socket to listen on instead
+
+        Returns
+        --------------
+        out: the asyncio server; its sockets give the address, see Server.address()
+        '''
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._connection, path)
+        else:
+            self._server = await asyncio.start_server(self._connection, host, port)
+        return self._server
+
+    def address(self):
+        '''
+        Server.address()
+
+        Returns
+        --------------
+        out: (host, port) for TCP, or the path of the Unix socket
+        '''
+        name = self._server.sockets[0].getsockname()
+        return name if isinstance(name, str) else tuple(name[:2])
+
+def serve(functions, host='127.0.0.1', port=8470, path=None, window=0.002, max_batch=1024, mode='auto'):
+    '''
+    serve(functions, host = '127.0.0.1', port = 8470, path = None, window = 0.002, max_batch = 1024, mode = 'auto')
+
+    Run an evaluation server until interrupted; see Server and Server.start() for the parameters.
+    '''
+    async def run():
+        server = Server(functions, window, max_batch, mode)
+        listener = await server.start(host, port, path)
+        async with listener:
+            await listener.serve_forever()
+    asyncio.run(run())
+
+class Client:
+    '''
+    Client(host = '127.0.0.1', port = 8470, path = None)
+
+    Asynchronous client of an evaluation server. Requests made concurrently,
+    e.g. with asyncio.gather(), are sent without waiting for each other's responses.
+
+    Examples
+    --------------
+    >>> import asyncio
+    >>> from Bambanta import AutoDiff, Server
+    >>> async def main():
+    ...     server = Server.Server({'f': lambda x: AutoDiff.sin(x)})
+    ...     async with await server.start():
+    ...         async with Server.Client(*server.address()) as client:
+    ...             return await client.evaluate('f', [0.0])
+    >>> v, j = asyncio.run(main())
+    >>> v, j
+    ([0.0], [[1.0]])
+    '''
+    def __init__(self, host='127.0.0.1', port=8470, path=None):
+        self.host, self.port, self.path = host, port, path
+        self._futures = {}
+        self._next_id = 0
+
+    async def connect(self):
+        '''
+        Client.connect()
+
+        Open the connection; also done by async with.
+        '''
+        if self.path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._listener = asyncio.ensure_future(self._listen())
+        return self
+
+    async def _listen(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._futures.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in response:
+                    future.set_exception(RuntimeError(response['error']))
+                else:
+                    future.set_result(response)
+        except ConnectionError:
+            pass
+        finally:
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Connection to the server closed.'))
+            self._futures.clear()
+
+    async def evaluate(self, name, x, grad=True):
+        '''
+        Client.evaluate(name, x, grad = True)
+
+        Returns
+        --------------
+        out: (values, Jacobian) as lists, or values only if grad is False.
+            Errors reported by the server are raised as RuntimeError.
+        '''
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._futures[self._next_id] = future
+        request = {'id': self._next_id, 'function': name, 'x': [float(v) for v in np.reshape(x, -1)], 'grad': grad}
+        self._writer.write(json.dumps(request).encode() + b'\n')
+        await self._writer.drain()
+        response = await future
+        if grad:
+            return response['value'], response['jacobian']
+        return response['value']
+
+    async def close(self):
+        '''
+        Client.close()
+        '''
+        self._writer.close()
+        await self._listener
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,567 @@
+'''
+Solvers built on the package's automatic differentiation.
+
+Jacobians come from AutoDiff.jacobian(), which picks forward or reverse
+mode for the shape of the problem, or for least squares from forward mode
+into a buffer kept for the whole solve. Since an AD evaluation costs many times a
+plain numeric one, the solvers reuse Jacobians and their factorizations
+wherever convergence allows, and report how many of each they needed.
+'''
+import numpy as np
+
+from . import AutoDiff
+from .Jacobian import _seed
+
+# scipy's LU factorization, loaded on first use: (lu_factor, lu_solve), or False without scipy
+_lu = None
+
+def _scipy_lu():
+    global _lu
+    if _lu is None:
+        try:
+            from scipy.linalg import lu_factor, lu_solve
+            _lu = (lu_factor, lu_solve)
+        except ImportError: # scipy is optional, the explicit inverse is used instead
+            _lu = False
+    return _lu
+
+METHODS = ('newton', 'chord', 'broyden')
+
+LSQ_METHODS = ('lm', 'gauss-newton')
+
+def _residual(f, x):
+    '''
+    Evaluate f on plain numbers, which skips all derivative bookkeeping.
+    '''
+    return np.asarray(f(*x), dtype=np.float64).reshape(-1)
+
+def _factorize(jac, inverse=False):
+    '''
+    Factorize a Jacobian once, returning a function solving jac @ dx = b.
+    The explicit inverse is used without scipy, or when it will be updated in place (Broyden).
+    '''
+    scipy_lu = False if inverse else _scipy_lu()
+    if scipy_lu:
+        lu_factor, lu_solve = scipy_lu
+        lu = lu_factor(jac)
+        return lambda b: lu_solve(lu, b), None
+    inv = np.linalg.inv(jac)
+    return lambda b: inv @ b, inv
+
+def newton_solve(f, x0, method='newton', tol=1e-10, xtol=1e-12, maxiter=50, ratio=0.5, mode='auto'):
+    '''
+    newton_solve(function, x0, method = 'newton', tol = 1e-10, xtol = 1e-12, maxiter = 50, ratio = 0.5, mode = 'auto')
+
+    Solve the square nonlinear system function(x) = 0 by Newton's method.
+
+    Parameters
+    --------------
+    function: callable
+        function of len(x0) arguments returning as many outputs, as for AutoDiff.jacobian()
+
+    x0: array_like
+        starting point
+
+    method: 'newton', 'chord' or 'broyden'
+        'newton' differentiates and factorizes at every iterate.
+        'chord' keeps the last Jacobian and its factorization while the residual norm
+        falls by at least ratio per step, and refreshes them otherwise.
+        'broyden' applies rank-one updates to the inverse Jacobian between refreshes.
+
+    tol: float
+        tolerance on the norm of the residual
+
+    xtol: float
+        tolerance on the norm of the step, relative to 1 + the norm of x
+
+    maxiter: int
+        maximal number of iterations
+
+    ratio: float
+        minimal decrease of the residual norm per step before a reused Jacobian is refreshed
+
+    mode: str
+        differentiation mode passed to AutoDiff.jacobian()
+
+    Returns
+    --------------
+    out: (x, report), the last iterate and a dict of 'converged', 'iterations', 'residual' (the norm),
+        and the counts of 'evaluations' (of the residual alone), 'jacobians' and 'factorizations'
+
+    Examples
+    --------------
+    >>> from Bambanta import Solvers
+    >>> def f(x, y):
+    ...  return [x*x + y*y - 4, x - y]
+    >>> x, report = Solvers.newton_solve(f, [1.0, 2.0], method = 'chord')
+    >>> [round(float(v), 8) for v in x], report['converged']
+    ([1.41421356, 1.41421356], True)
+    '''
+    if method not in METHODS:
+        raise ValueError('method should be one of {}.'.format(', '.join(METHODS)))
+    x = np.array(x0, dtype=np.float64).reshape(-1)
+    report = {'converged': False, 'iterations': 0, 'evaluations': 0,
+              'jacobians': 0, 'factorizations': 0}
+    F = _residual(f, x)
+    report['evaluations'] += 1
+    if len(F) != len(x):
+        raise ValueError('newton_solve() needs as many outputs as inputs.')
+    solve = inv = None
+    fresh = False
+    for _ in range(maxiter):
+        norm = np.linalg.norm(F)
+        if norm <= tol:
+            report['converged'] = True
+            break
+        if solve is None:
+            F, jac = AutoDiff.jacobian(f, x, mode, n_outputs=len(F))
+            report['jacobians'] += 1
+            solve, inv = _factorize(jac, inverse=(method == 'broyden'))
+            report['factorizations'] += 1
+            fresh = True
+        step = -solve(F)
+        x_new = x + step
+        F_new = _residual(f, x_new)
+        report['evaluations'] += 1
+        report['iterations'] += 1
+        norm_new = np.linalg.norm(F_new)
+        refresh = not fresh and norm_new > ratio*norm
+        if refresh and norm_new >= norm:
+            # no progress with an old Jacobian: refresh it at x and retry
+            solve = None
+            continue
+        if refresh or method == 'newton':
+            # too slow with an old Jacobian: keep the step, refresh at the new iterate
+            solve = None
+        elif method == 'broyden':
+            # good Broyden update of the inverse, by Sherman-Morrison
+            y = F_new - F
+            hy = inv @ y
+            denom = step @ hy
+            if denom != 0:
+                inv += np.outer(step - hy, step @ inv)/denom
+        x, F = x_new, F_new
+        fresh = False
+        if np.linalg.norm(step) <= xtol*(1 + np.linalg.norm(x)):
+            report['converged'] = bool(np.linalg.norm(F) <= tol)
+            break
+    else:
+        report['converged'] = bool(np.linalg.norm(F) <= tol)
+    report['residual'] = float(np.linalg.norm(F))
+    return x, report
+
+def _flatten(out):
+    '''
+    Residuals of plain numbers, returned as a number, an array or a list of either, as one 1D array.
+    '''
+    if isinstance(out, (list, tuple)):
+        return np.concatenate([np.asarray(o, dtype=np.float64).reshape(-1) for o in out])
+    return np.asarray(out, dtype=np.float64).reshape(-1)
+
+def _fill_jacobian(f, x, F, jac):
+    '''
+    Evaluate residuals and their Jacobian into F and jac, in place, by forward passes
+    seeded with at most AutoDiff.COSTS['max_width'] input directions each.
+    '''
+    n = len(x)
+    width = int(AutoDiff.COSTS['max_width'])
+    for start in range(0, n, width):
+        stop = min(start + width, n)
+        out = f(*_seed(x, start, stop))
+        row = 0
+        for o in (out if isinstance(out, (list, tuple)) else [out]):
+            if isinstance(o, AutoDiff.fAD):
+                k = len(o.val)
+                F[row:row+k] = o.val
+                jac[row:row+k, start:stop] = o.der
+            else: # residual does not depend on the parameters
+                k = np.size(o)
+                F[row:row+k] = np.reshape(o, -1)
+                jac[row:row+k, start:stop] = 0.0
+            row += k
+
+def least_squares(f, x0, method='lm', tol=1e-10, xtol=1e-12, gtol=1e-10, maxiter=100, damping=1e-3):
+    '''
+    least_squares(function, x0, method = 'lm', tol = 1e-10, xtol = 1e-12, gtol = 1e-10, maxiter = 100, damping = 1e-3)
+
+    Minimize the sum of squared residuals of a function by Levenberg-Marquardt or Gauss-Newton steps.
+
+    Jacobians of the residuals come from forward-mode autodiff, in chunks of at most
+    AutoDiff.COSTS['max_width'] parameters, and are written into one buffer allocated
+    for the whole solve. Every step solves its linear least-squares problem by a QR
+    factorization, never forming the normal equations.
+
+    Parameters
+    --------------
+    function: callable
+        function of len(x0) arguments, returning the residuals as an autodiff object or a list of them.
+        Each may hold one residual or a vector of them, e.g. one per data point of a fit.
+        *function must also accept plain numbers*
+
+    x0: array_like
+        starting point
+
+    method: 'lm' or 'gauss-newton'
+        'lm' damps every step, with Marquardt's scaling of the parameters, and adapts the damping
+        to the agreement between the predicted and the actual decrease.
+        'gauss-newton' takes undamped steps, halved until the sum of squares decreases.
+
+    tol: float
+        tolerance on the norm of the residuals
+
+    xtol: float
+        tolerance on the norm of an accepted step, relative to 1 + the norm of x
+
+    gtol: float
+        tolerance on the largest absolute entry of the gradient of half the sum of squares
+
+    maxiter: int
+        maximal number of steps tried
+
+    damping: float
+        initial damping of 'lm'
+
+    Returns
+    --------------
+    out: (x, report), the last iterate and a dict of 'converged', 'iterations', 'residual' (the norm),
+        and the counts of 'evaluations' (of the residuals alone), 'jacobians' and 'factorizations'
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Solvers
+    >>> import numpy as np
+    >>> t = np.linspace(0.0, 4.0, 20)
+    >>> y = 2.0*np.exp(-0.5*t)
+    >>> x, report = Solvers.least_squares(lambda a, b: a*AutoDiff.exp(-b*t) - y, [1.0, 1.0])
+    >>> [round(float(v), 8) for v in x], report['converged']
+    ([2.0, 0.5], True)
+    '''
+    if method not in LSQ_METHODS:
+        raise ValueError('method should be one of {}.'.format(', '.join(LSQ_METHODS)))
+    x = np.array(x0, dtype=np.float64).reshape(-1)
+    n = len(x)
+    F = _flatten(f(*x))
+    m = len(F)
+    report = {'converged': False, 'iterations': 0, 'evaluations': 1,
+              'jacobians': 0, 'factorizations': 0}
+    # the Jacobian is the top block of the damped system [J; sqrt(damping) D], filled in place
+    system = np.zeros((m + n, n))
+    jac = system[:m]
+    diagonal = np.arange(n)
+    _fill_jacobian(f, x, F, jac)
+    report['jacobians'] += 1
+    cost = 0.5*(F @ F)
+    scale = np.zeros(n)
+    nu = 2.0
+    while report['iterations'] < maxiter:
+        g = jac.T @ F
+        if np.sqrt(2*cost) <= tol or np.max(np.abs(g)) <= gtol:
+            report['converged'] = True
+            break
+        report['iterations'] += 1
+        if method == 'lm':
+            # Marquardt's scaling: the largest column norms of the Jacobian seen so far
+            np.maximum(scale, np.linalg.norm(jac, axis=0), out=scale)
+            system[m + diagonal, diagonal] = np.sqrt(damping)*np.where(scale > 0, scale, 1.0)
+            q, r = np.linalg.qr(system)
+        else:
+            q, r = np.linalg.qr(jac)
+        report['factorizations'] += 1
+        qf = q[:m].T @ F
+        try:
+            step = -np.linalg.solve(r, qf)
+        except np.linalg.LinAlgError: # rank-deficient Jacobian, only without damping
+            step = -np.linalg.lstsq(jac, F, rcond=None)[0]
+        x_new = x + step
+        F_new = _flatten(f(*x_new))
+        report['evaluations'] += 1
+        cost_new = 0.5*(F_new @ F_new)
+        if method == 'lm':
+            js = jac @ step
+            predicted = -(g @ step) - 0.5*(js @ js)
+            gain = (cost - cost_new)/predicted if predicted > 0 and np.isfinite(cost_new) else -1.0
+            if gain <= 0:
+                # rejected: damp more, with the same Jacobian
+                damping *= nu
+                nu *= 2
+                continue
+            damping *= max(1/3, 1 - (2*gain - 1)**3)
+            nu = 2.0
+        else:
+            halvings = 0
+            while not cost_new < cost and halvings < 30:
+                step /= 2
+                x_new = x + step
+                F_new = _flatten(f(*x_new))
+                report['evaluations'] += 1
+                cost_new = 0.5*(F_new @ F_new)
+                halvings += 1
+            if not cost_new < cost:
+                break
+        small = np.linalg.norm(step) <= xtol*(1 + np.linalg.norm(x_new))
+        x, F, cost = x_new, F_new, cost_new
+        if small:
+            report['converged'] = True
+            break
+        _fill_jacobian(f, x, F, jac)
+        report['jacobians'] += 1
+        cost = 0.5*(F @ F)
+    report['residual'] = float(np.sqrt(2*cost))
+    return x, report
+
+def _value_and_grad(f, x):
+    '''
+    Value and gradient of a scalar function of one vector, from a single reverse-mode sweep.
+    '''
+    var = AutoDiff.rAD(x)
+    with AutoDiff.set_grad_enabled(True):
+        out = f(var)
+    if not isinstance(out, AutoDiff.rAD):
+        # constant function
+        return float(out), np.zeros(len(x))
+    out.outer()
+    grad = var.grad()
+    if np.shape(grad) != (len(x),):
+        grad = np.broadcast_to(grad, (len(x),)).copy()
+    return float(out.val[0]), grad
+
+class _LineSearch:
+    '''
+    Line search for the strong Wolfe conditions along a direction, by bracketing and zooming with
+    safeguarded quadratic interpolation. Every trial evaluates the value and the gradient together.
+    '''
+    def __init__(self, f, n, c1, c2, maxls):
+        self.f = f
+        self.c1 = c1
+        self.c2 = c2
+        self.maxls = maxls
+        self.trial = np.empty(n)
+        self.evaluations = 0
+
+    def _eval(self, x, d, t):
+        np.multiply(d, t, out=self.trial)
+        self.trial += x
+        self.evaluations += 1
+        value, grad = _value_and_grad(self.f, self.trial)
+        return value, grad, grad @ d
+
+    def __call__(self, x, d, f0, dg0, t):
+        '''
+        Returns
+        --------------
+        out: (step, value, gradient) at an acceptable step, or None
+        '''
+        lo, f_lo, dg_lo, g_lo = 0.0, f0, dg0, None
+        for i in range(self.maxls):
+            ft, gt, dgt = self._eval(x, d, t)
+            if not np.isfinite(ft) or ft > f0 + self.c1*t*dg0 or (i > 0 and ft >= f_lo):
+                return self._zoom(x, d, f0, dg0, lo, f_lo, dg_lo, g_lo, t, ft)
+            if abs(dgt) <= -self.c2*dg0:
+                return t, ft, gt
+            if dgt >= 0:
+                return self._zoom(x, d, f0, dg0, t, ft, dgt, gt, lo, f_lo)
+            lo, f_lo, dg_lo, g_lo = t, ft, dgt, gt
+            t *= 2
+        return (lo, f_lo, g_lo) if g_lo is not None else None
+
+    def _zoom(self, x, d, f0, dg0, lo, f_lo, dg_lo, g_lo, hi, f_hi):
+        for _ in range(self.maxls):
+            width = hi - lo
+            # minimum of the quadratic through f_lo, dg_lo and f_hi, kept inside the bracket
+            curvature = f_hi - f_lo - dg_lo*width
+            t = lo - dg_lo*width*width/(2*curvature) if curvature > 0 and np.isfinite(f_hi) else lo + width/2
+            if not min(lo, hi) + 0.1*abs(width) <= t <= max(lo, hi) - 0.1*abs(width):
+                t = lo + width/2
+            ft, gt, dgt = self._eval(x, d, t)
+            if not np.isfinite(ft) or ft > f0 + self.c1*t*dg0 or ft >= f_lo:
+                hi, f_hi = t, ft
+            else:
+                if abs(dgt) <= -self.c2*dg0:
+                    return t, ft, gt
+                if dgt*(hi - lo) >= 0:
+                    hi, f_hi = lo, f_lo
+                lo, f_lo, dg_lo, g_lo = t, ft, dgt, gt
+        # the best decrease found, if any
+        return (lo, f_lo, g_lo) if g_lo is not None else None
+
+def lbfgs(f, x0, m=10, tol=1e-6, maxiter=1000, c1=1e-4, c2=0.9, maxls=20):
+    '''
+    lbfgs(function, x0, m = 10, tol = 1e-6, maxiter = 1000, c1 = 1e-4, c2 = 0.9, maxls = 20)
+
+    Minimize a scalar function of a vector by L-BFGS, with gradients from reverse-mode autodiff.
+
+    Parameters
+    --------------
+    function: callable
+        function of one reverse-mode autodiff object holding all the variables, returning a single value.
+        Vector operations and primitives such as AutoDiff.sum, dot and matmul keep its graph small.
+
+    x0: array_like
+        starting point
+
+    m: int
+        number of correction pairs kept, in buffers allocated once
+
+    tol: float
+        tolerance on the largest absolute entry of the gradient
+
+    maxiter: int
+        maximal number of iterations
+
+    c1, c2: float
+        parameters of the strong Wolfe conditions of the line search
+
+    maxls: int
+        maximal number of evaluations per line search
+
+    Returns
+    --------------
+    out: (x, report), the last iterate and a dict of 'converged', 'iterations', 'evaluations'
+        (each of both the value and the gradient), 'value' and 'gradient' (the largest absolute entry)
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Solvers
+    >>> def f(x):
+    ...  return AutoDiff.sum((x - 3)**2) + AutoDiff.sum(x**4)/10
+    >>> x, report = Solvers.lbfgs(f, [0.0, 0.0])
+    >>> [round(float(v), 6) for v in x], report['converged']
+    ([1.811366, 1.811366], True)
+    '''
+    x = np.array(x0, dtype=np.float64).reshape(-1)
+    n = len(x)
+    # history of steps s and gradient changes y, as rings of m rows
+    S = np.zeros((m, n))
+    Y = np.zeros((m, n))
+    rho = np.zeros(m)
+    alpha = np.zeros(m)
+    d = np.empty(n)
+    tmp = np.empty(n)
+    search = _LineSearch(f, n, c1, c2, maxls)
+
+    value, g = _value_and_grad(f, x)
+    report = {'converged': False, 'iterations': 0}
+    count = newest = 0
+    while report['iterations'] < maxiter:
+        if np.max(np.abs(g)) <= tol:
+            report['converged'] = True
+            break
+        # two-loop recursion, d = H g
+        np.copyto(d, g)
+        order = [(newest - i) % m for i in range(count)]
+        for i in order:
+            alpha[i] = rho[i]*(S[i] @ d)
+            np.multiply(Y[i], alpha[i], out=tmp)
+            d -= tmp
+        if count:
+            d *= (S[newest] @ Y[newest])/(Y[newest] @ Y[newest])
+        for i in reversed(order):
+            beta = rho[i]*(Y[i] @ d)
+            np.multiply(S[i], alpha[i] - beta, out=tmp)
+            d += tmp
+        d *= -1
+        dg = g @ d
+        if dg >= 0:
+            # not a descent direction: restart from steepest descent
+            count = 0
+            np.negative(g, out=d)
+            dg = g @ d
+        t = 1.0 if count else min(1.0, 1/np.max(np.abs(g)))
+        found = search(x, d, value, dg, t)
+        if found is None:
+            if count == 0:
+                break
+            count = 0
+            continue
+        t, value, g_new = found
+        report['iterations'] += 1
+        nxt = (newest + 1) % m if count else newest
+        np.multiply(d, t, out=S[nxt])
+        np.subtract(g_new, g, out=Y[nxt])
+        x += S[nxt]
+        g = g_new
+        sy = S[nxt] @ Y[nxt]
+        if sy > 1e-10*np.sqrt((S[nxt] @ S[nxt])*(Y[nxt] @ Y[nxt])):
+            rho[nxt] = 1/sy
+            newest = nxt
+            count = min(count + 1, m)
+        elif count == m:
+            # the skipped pair overwrote the oldest one
+            count -= 1
+    else:
+        report['converged'] = bool(np.max(np.abs(g)) <= tol)
+    report['evaluations'] = search.evaluations + 1
+    report['value'] = value
+    report['gradient'] = float(np.max(np.abs(g)))
+    return x, report
+
+def _stacked_der(out, n):
+    '''
+    Derivative matrix of a residual, returned as one forward-mode object or a list of them.
+    '''
+    if isinstance(out, AutoDiff.fAD):
+        return out.der
+    return np.vstack([o.der if isinstance(o, AutoDiff.fAD) else np.zeros((1, n)) for o in out])
+
+def implicit(solve, residual):
+    '''
+    implicit(solve, residual)
+
+    Wrap a solver of residual(x, p) = 0 into a primitive x(p), differentiated by the implicit function theorem:
+    dx/dp = -(dr/dx)^-1 dr/dp at the solution, whatever the iterations that found it.
+
+    Parameters
+    --------------
+    solve: callable
+        solve(p), returning the solution x for the parameters p, all arrays of plain numbers.
+        It is never traced, so its cost in memory does not depend on its number of iterations.
+
+    residual: callable
+        residual(x, p), of two vector autodiff objects, returning one of len(x) values, or a list of them.
+        It is differentiated once in forward mode at the solution, when derivatives are needed.
+
+    Returns
+    --------------
+    out: AutoDiff.Primitive, taking p as a number, an array, or an autodiff object of either mode.
+        Derivatives cost one linear solve with the Jacobian of the residual in x:
+        with the derivatives of p in forward mode, and with the gradient of x in reverse mode.
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Solvers
+    >>> import numpy as np
+    >>> def solve(p):
+    ...  x = 0.0
+    ...  for _ in range(100):
+    ...   x = np.cos(p[0]*x)
+    ...  return x
+    >>> x = Solvers.implicit(solve, lambda x, p: x - AutoDiff.cos(p*x))
+    >>> p = AutoDiff.rAD(1.0)
+    >>> f = x(p)
+    >>> f.outer()
+    >>> round(float(f.val[0]), 6), round(float(p.grad()[0]), 6)
+    (0.739085, -0.297474)
+    '''
+    def value(p):
+        return np.asarray(solve(np.asarray(p, dtype=np.float64).reshape(-1)), dtype=np.float64).reshape(-1)
+
+    def jacobians(x, p):
+        x = np.asarray(x, dtype=np.float64).reshape(-1)
+        p = np.asarray(p, dtype=np.float64).reshape(-1)
+        n, k = len(x), len(p)
+        seeds = np.eye(n + k)
+        der = _stacked_der(residual(AutoDiff.fAD(x, seeds[:n]), AutoDiff.fAD(p, seeds[n:])), n + k)
+        return der[:, :n], der[:, n:]
+
+    def jvp(x, der, p):
+        dx, dp = jacobians(x, p)
+        return -np.linalg.solve(dx, dp @ der)
+
+    def vjp(x, p):
+        def apply(g):
+            dx, dp = jacobians(x, p)
+            adjoint = np.linalg.solve(dx.T, np.broadcast_to(g, np.shape(x)))
+            return -(dp.T @ adjoint)
+        return apply
+
+    return AutoDiff.Primitive('implicit', value, jvp=jvp, vjp=vjp)
@@ -0,0 +1,215 @@
+'''
+Streaming evaluation of losses summed over datasets larger than memory.
+
+A loss that is a sum over the rows of a dataset is evaluated one chunk of rows
+at a time. Datasets stored as .npy files are memory-mapped, and only the rows
+of the current chunk are read into memory. Every chunk gets fresh reverse-mode
+variables, its value and gradient are added to running totals, and its graph
+is released before the next chunk is read. Peak memory therefore depends on the
+chunk size, not on the size of the dataset.
+
+GradAccumulator does the same for any objective that is a sum of terms: every
+term is differentiated as soon as it is added, and its graph is dropped.
+'''
+import numpy as np
+
+from . import AutoDiff
+
+def _open(data):
+    '''
+    Return a dataset as an array, memory-mapping .npy files.
+    '''
+    if isinstance(data, str):
+        return np.load(data, mmap_mode='r')
+    return data
+
+def chunks(data, chunk=65536):
+    '''
+    chunks(data, chunk = 65536)
+
+    Iterate over a dataset in chunks of rows.
+
+    Parameters
+    --------------
+    data: path of a .npy file, array or memory-mapped array, or a list or tuple of them
+        with the same number of rows, e.g. features and targets, which are chunked in step
+
+    chunk: int
+        number of rows per chunk
+
+    Returns
+    --------------
+    out: iterator over the chunks, each a tuple with one in-memory array per dataset
+    '''
+    if chunk < 1:
+        raise ValueError('Chunks need at least one row.')
+    arrays = [_open(d) for d in data] if isinstance(data, (list, tuple)) else [_open(data)]
+    rows = len(arrays[0])
+    if any(len(a) != rows for a in arrays):
+        raise ValueError('Datasets must have the same number of rows.')
+    for start in range(0, rows, chunk):
+        # copying reads the rows of this chunk only
+        yield tuple(np.array(a[start:start+chunk]) for a in arrays)
+
+def _get(total):
+    if np.shape(total)[0] == 1:
+        return total[0]
+    return total
+
+class GradAccumulator:
+    '''
+    GradAccumulator(params)
+
+    Accumulate the value and gradient of a sum of terms, one term (or block of terms) at a time.
+
+    Every term is evaluated on fresh reverse-mode variables, differentiated at once, added to
+    the running totals and released. No graph outlives its term, so peak memory depends on
+    the largest term, not on the number of terms.
+
+    Parameters
+    --------------
+    params: array_like
+        parameter values, each a number or a vector
+
+    Attributes
+    --------------
+    value: the sum of the terms added so far
+
+    terms: the number of terms added so far
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Streaming
+    >>> acc = Streaming.GradAccumulator([1.0, 2.0])
+    >>> for t in range(1, 4):
+    ...     _ = acc.add(lambda a, b, t: (a*t - b)**2, t)
+    >>> float(acc.value), [float(g) for g in acc.grad()]
+    (2.0, [4.0, 0.0])
+    '''
+    def __init__(self, params):
+        self.reset(params)
+
+    def reset(self, params=None):
+        '''
+        GradAccumulator.reset(params = None)
+
+        Clear the totals, e.g. for the next iteration of an optimizer, optionally at new parameter values.
+        '''
+        if params is not None:
+            self.params = [np.array(p, dtype=np.float64) for p in params]
+        self.value = 0.0
+        self.terms = 0
+        self._totals = [np.zeros(np.size(p)) for p in self.params]
+
+    def add(self, function, *args):
+        '''
+        GradAccumulator.add(function, *args)
+
+        Evaluate one term, and add its value and gradient to the totals.
+
+        Parameters
+        --------------
+        function: callable
+            function(*variables, *args), returning the term as a single-valued reverse-mode
+            autodiff object (or a number, for terms without parameters). There is one variable
+            per parameter.
+
+        args: further arguments of function, such as the data of the term
+
+        Returns
+        --------------
+        out: the value of the term
+        '''
+        # the graph of the term only hangs from these variables, and is freed with them
+        variables = [AutoDiff.rAD(p) for p in self.params]
+        out = function(*variables, *args)
+        val = out.val if isinstance(out, AutoDiff.rAD) else np.reshape(out, -1)
+        if len(val) != 1:
+            raise ValueError('Every term must have a single value.')
+        if isinstance(out, AutoDiff.rAD):
+            out.outer()
+            for total, var in zip(self._totals, variables):
+                grad = var.grad()
+                if total.size == 1:
+                    # a scalar parameter used against vectors gets one partial per element
+                    grad = np.sum(grad)
+                total += grad
+        self.value += val[0]
+        self.terms += 1
+        return val[0]
+
+    def grad(self):
+        '''
+        GradAccumulator.grad()
+
+        Returns
+        --------------
+        out: list with the gradient of the sum with respect to each parameter
+        '''
+        return [_get(total.copy()) for total in self._totals]
+
+def value_and_grad(function, params, data, chunk=65536):
+    '''
+    value_and_grad(function, params, data, chunk = 65536)
+
+    Evaluate a loss summed over a dataset, and its gradient, one chunk of rows at a time.
+
+    Parameters
+    --------------
+    function: callable
+        function(*variables, *arrays), returning the loss summed over the rows of one chunk
+        as a single-valued reverse-mode autodiff object. There is one variable per parameter,
+        and one array per dataset holding the rows of the chunk.
+
+    params: array_like
+        parameter values, each a number or a vector
+
+    data: path of a .npy file, array or memory-mapped array, or a list or tuple of them; see chunks()
+
+    chunk: int
+        number of rows per chunk
+
+    Returns
+    --------------
+    out: (value, gradient)
+        the total loss, and a list with the gradient with respect to each parameter
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Streaming
+    >>> import numpy as np
+    >>> X = np.arange(10.0).reshape(5, 2)
+    >>> y = X @ [1.0, 2.0]
+    >>> loss = lambda w, X, y: np.sum((X @ w - y)**2)
+    >>> value, (grad,) = Streaming.value_and_grad(loss, [[1.0, 1.0]], (X, y), chunk=2)
+    >>> float(value), grad.tolist()
+    (165.0, [-280.0, -330.0])
+    '''
+    accumulator = GradAccumulator(params)
+    for arrays in chunks(data, chunk):
+        accumulator.add(function, *arrays)
+    return accumulator.value, accumulator.grad()
+
+def value(function, params, data, chunk=65536):
+    '''
+    value(function, params, data, chunk = 65536)
+
+    Evaluate a loss summed over a dataset one chunk of rows at a time, without recording derivatives.
+
+    Parameters
+    --------------
+    as for value_and_grad()
+
+    Returns
+    --------------
+    out: the total loss
+    '''
+    total = 0.0
+    with AutoDiff.no_grad():
+        for arrays in chunks(data, chunk):
+            out = function(*[AutoDiff.rAD(p) for p in params], *arrays)
+            val = out.val if isinstance(out, AutoDiff.rAD) else np.reshape(out, -1)
+            if len(val) != 1:
+                raise ValueError('The function must return a single value per chunk.')
+            total += val[0]
+    return total
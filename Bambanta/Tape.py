@@ -0,0 +1,617 @@
+'''
+Recorded reverse-mode tapes.
+
+A tape is a reverse-mode autodiff graph flattened into three arrays:
+one opcode per node, two parent indices per node and a table of constants.
+Nodes are stored in evaluation order, so a tape can be replayed at new input
+values without calling the traced function again.
+
+An IncrementalTape keeps the values of every node between replays, so that
+changing a few inputs only recomputes the nodes downstream of them.
+
+Tapes can be saved to a compact binary file. Loading memory-maps the file,
+so every process replaying the same tape shares one copy of it.
+'''
+import numbers
+
+import numpy as np
+
+from . import AutoDiff
+from .Reverse import _recording
+
+# opcodes of the tape; 'input' and 'const' nodes read from the inputs and the constant table
+OPS = ['input', 'const',
+       'add', 'sub', 'mul', 'div', 'pow', 'neg', 'abs',
+       'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan',
+       'sinh', 'cosh', 'tanh', 'exp', 'logistic', 'log', 'sqrt']
+OPCODES = {name: code for code, name in enumerate(OPS)}
+
+# forward rules, matching the values computed by rAD
+VALUES = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'mul': lambda a, b: a * b,
+    'div': lambda a, b: a / b,
+    'pow': lambda a, b: a ** b,
+    'neg': lambda a, b: -a,
+    'abs': lambda a, b: abs(a),
+    'sin': lambda a, b: np.sin(a),
+    'cos': lambda a, b: np.cos(a),
+    'tan': lambda a, b: np.tan(a),
+    'arcsin': lambda a, b: np.arcsin(a),
+    'arccos': lambda a, b: np.arccos(a),
+    'arctan': lambda a, b: np.arctan(a),
+    'sinh': lambda a, b: np.sinh(a),
+    'cosh': lambda a, b: np.cosh(a),
+    'tanh': lambda a, b: np.tanh(a),
+    'exp': lambda a, b: np.exp(a),
+    'logistic': lambda a, b: 1/(1+np.exp(-a)),
+    'log': lambda a, b: np.log(a)/np.log(b),
+    'sqrt': lambda a, b: a**0.5,
+}
+
+# partial derivatives with respect to the first and second parent, matching those recorded by rAD
+PARTIALS = {
+    'add': (lambda a, b: 1.0, lambda a, b: 1.0),
+    'sub': (lambda a, b: 1.0, lambda a, b: -1.0),
+    'mul': (lambda a, b: b, lambda a, b: a),
+    'div': (lambda a, b: 1/b, lambda a, b: -a/(b**2)),
+    'pow': (lambda a, b: a**(b-1)*b, lambda a, b: a**b*np.log(a)),
+    'neg': (lambda a, b: -1.0,),
+    'abs': (lambda a, b: a/abs(a),),
+    'sin': (lambda a, b: np.cos(a),),
+    'cos': (lambda a, b: -np.sin(a),),
+    'tan': (lambda a, b: 1/(np.cos(a)**2),),
+    'arcsin': (lambda a, b: 1/np.sqrt(1 - a*a),),
+    'arccos': (lambda a, b: -1/np.sqrt(1-a*a),),
+    'arctan': (lambda a, b: 1/(1+a*a),),
+    'sinh': (lambda a, b: np.cosh(a),),
+    'cosh': (lambda a, b: np.sinh(a),),
+    'tanh': (lambda a, b: 1/(np.cosh(a)**2),),
+    'exp': (lambda a, b: np.exp(a),),
+    'logistic': (lambda a, b: np.exp(-a)/((np.exp(-a)+1)**2),),
+    'log': (lambda a, b: 1/(a*np.log(b)),),
+    'sqrt': (lambda a, b: (a**(-0.5))*0.5,),
+}
+
+MAGIC = b'BTAPE\x00\x01\x00'
+_HEADER = np.dtype([('n_nodes', '<i8'), ('n_consts', '<i8'), ('n_outputs', '<i8'), ('n_inputs', '<i8')])
+
+class Tape:
+    '''
+    Tape(opcodes, args, consts, outputs, n_inputs)
+
+    A recorded reverse-mode autodiff graph, usually created by record() or load().
+
+    Parameters
+    --------------
+    opcodes: array_like of int, shape (n_nodes,)
+        operation of each node, indexing OPS
+
+    args: array_like of int, shape (n_nodes, 2)
+        parent node indices of each node, -1 where unused.
+        For 'input' and 'const' nodes, the first entry is the input position or constant index.
+
+    consts: array_like of float
+        constant table
+
+    outputs: array_like of int
+        indices of the output nodes
+
+    n_inputs: int
+        number of input variables
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Tape
+    >>> t = Tape.record(lambda x, y: x*y + AutoDiff.sin(x), [0.0, 2.0])
+    >>> v, j = t.gradient([0.0, 3.0])
+    >>> float(v[0]), j[0].tolist()
+    (0.0, [4.0, 0.0])
+    '''
+    def __init__(self, opcodes, args, consts, outputs, n_inputs):
+        self.opcodes = np.asarray(opcodes, dtype=np.uint8)
+        self.args = np.asarray(args, dtype=np.int32).reshape(-1, 2)
+        self.consts = np.asarray(consts, dtype=np.float64).reshape(-1)
+        self.outputs = np.asarray(outputs, dtype=np.int32).reshape(-1)
+        self.n_inputs = int(n_inputs)
+        if len(self.opcodes) != len(self.args):
+            raise ValueError('Every node needs an opcode and a pair of parent indices.')
+        self._program = None
+
+    def __len__(self):
+        '''
+        Returns
+        --------------
+        out: number of nodes on the tape
+        '''
+        return len(self.opcodes)
+
+    def __repr__(self):
+        return "{0}(nodes={1}, inputs={2}, outputs={3})".format(
+            self.__class__.__name__, len(self), self.n_inputs, len(self.outputs))
+
+    def program(self):
+        '''
+        Tape.program()
+
+        Decode the flat arrays into a list of (operation name, first, second, active) tuples,
+        one per node. The first replay decodes the tape once; later replays reuse the result.
+        active is False for nodes that do not depend on any input.
+        '''
+        if self._program is None:
+            program = []
+            active = []
+            for op, (a, b) in zip(self.opcodes.tolist(), self.args.tolist()):
+                name = OPS[op]
+                if name == 'input':
+                    is_active = True
+                elif name == 'const':
+                    is_active = False
+                else:
+                    is_active = active[a] or (b >= 0 and active[b])
+                active.append(is_active)
+                program.append((name, a, b, is_active))
+            self._program = program
+        return self._program
+
+    def forward(self, vals):
+        '''
+        Tape.forward(vals)
+
+        Replay the tape forward at new input values.
+
+        Parameters
+        --------------
+        vals: array_like
+            one value (number or vector) per input variable
+
+        Returns
+        --------------
+        out: list of the values of every node, as 1D arrays
+        '''
+        if len(vals) != self.n_inputs:
+            raise ValueError('Tape expects {0} inputs, got {1}.'.format(self.n_inputs, len(vals)))
+        consts = self.consts
+        values = []
+        for name, a, b, _ in self.program():
+            if name == 'input':
+                values.append(np.array([vals[a]], dtype=np.float64).reshape(-1))
+            elif name == 'const':
+                values.append(consts[a:a+1])
+            else:
+                values.append(VALUES[name](values[a], values[b] if b >= 0 else None))
+        return values
+
+    def backward(self, values, output=0, partials=None):
+        '''
+        Tape.backward(values, output = 0, partials = None)
+
+        Sweep the tape backward from one output, as outer() and grad() do on rAD objects.
+
+        Parameters
+        --------------
+        values: list
+            node values returned by forward()
+
+        output: int
+            position of the output to differentiate
+
+        partials: list, optional
+            partial derivatives of every node with respect to its parents, as returned by partials().
+            They are computed from values during the sweep when not given.
+
+        Returns
+        --------------
+        out: list of the adjoints of every node (None where the output does not depend on the node)
+        '''
+        program = self.program()
+        adjoints = [None]*len(program)
+        out = int(self.outputs[output])
+        adjoints[out] = 1.0
+        # nodes after the output cannot be among its ancestors
+        for i in range(out, -1, -1):
+            adj = adjoints[i]
+            name, a, b, active = program[i]
+            if adj is None or not active or name == 'input':
+                continue
+            node_partials = partials[i] if partials is not None else self._partials(values, i)
+            for parent, partial in zip((a, b), node_partials):
+                if partial is not None:
+                    contribution = partial*adj
+                    if adjoints[parent] is None:
+                        adjoints[parent] = contribution
+                    else:
+                        adjoints[parent] = adjoints[parent] + contribution
+        return adjoints
+
+    def _partials(self, values, i):
+        '''
+        Return the partials of node i with respect to its parents, None for inactive parents.
+        '''
+        program = self.program()
+        name, a, b, active = program[i]
+        if not active or name == 'input':
+            return ()
+        b_val = values[b] if b >= 0 else None
+        return tuple(partial(values[a], b_val) if program[parent][3] else None
+                     for parent, partial in zip((a, b), PARTIALS[name]))
+
+    def partials(self, values):
+        '''
+        Tape.partials(values)
+
+        Parameters
+        --------------
+        values: list
+            node values returned by forward()
+
+        Returns
+        --------------
+        out: list with a tuple of partial derivatives for every node, one per parent
+            (None for parents that do not depend on any input), empty for inputs, constants
+            and inactive nodes
+        '''
+        return [self._partials(values, i) for i in range(len(self))]
+
+    def values(self, vals):
+        '''
+        Tape.values(vals)
+
+        Returns
+        --------------
+        out: array of output values at vals
+        '''
+        values = self.forward(vals)
+        return np.array([_get(values[i]) for i in self.outputs.tolist()])
+
+    def gradient(self, vals):
+        '''
+        Tape.gradient(vals)
+
+        Replay the tape at new input values and differentiate every output.
+
+        Returns
+        --------------
+        out: (values, Jacobian), as returned by stack_r
+        '''
+        return self._jacobian(vals, self.forward(vals))
+
+    def _jacobian(self, vals, values, partials=None):
+        '''
+        Sweep backward from every output, and gather the adjoints of the inputs as stack_r does.
+        '''
+        jac = [self._row(vals, values, k, partials) for k in range(len(self.outputs))]
+        return np.array([_get(values[i]) for i in self.outputs.tolist()]), np.array(jac)
+
+    def _row(self, vals, values, output, partials=None):
+        '''
+        Return the gradient of one output with respect to every input, as a list.
+        '''
+        adjoints = self.backward(values, output, partials)
+        grad = [_get(np.zeros(np.size(val))) for val in vals]
+        for i, (name, pos, _, _) in enumerate(self.program()):
+            if name == 'input' and adjoints[i] is not None:
+                grad[pos] = _get(adjoints[i]*np.ones_like(values[i]))
+        return grad
+
+    def tobytes(self):
+        '''
+        Tape.tobytes()
+
+        Returns
+        --------------
+        out: bytes of the binary tape format, as written by save()
+        '''
+        header = np.zeros(1, dtype=_HEADER)
+        header[0] = (len(self.opcodes), len(self.consts), len(self.outputs), self.n_inputs)
+        parts = [MAGIC, header.tobytes(),
+                 _pad(self.opcodes.astype('<u1').tobytes()),
+                 _pad(self.args.astype('<i4').tobytes()),
+                 self.consts.astype('<f8').tobytes(),
+                 self.outputs.astype('<i4').tobytes()]
+        return b''.join(parts)
+
+    def save(self, path):
+        '''
+        Tape.save(path)
+
+        Write the tape to a binary file that load() can memory-map.
+        '''
+        with open(path, 'wb') as fh:
+            fh.write(self.tobytes())
+
+def _pad(data):
+    '''
+    Pad bytes with zeros to a multiple of 8, keeping the following array aligned.
+    '''
+    return data + b'\x00'*(-len(data) % 8)
+
+def _get(val):
+    '''
+    Return a one-element array as a number, as rAD.get_val() does.
+    '''
+    if np.shape(val)[0] == 1:
+        return val[0]
+    return val
+
+def _is_constant(arg):
+    return isinstance(arg, numbers.Number) or (isinstance(arg, np.ndarray) and arg.size == 1)
+
+def record(function, vals):
+    '''
+    record(function, vals)
+
+    Trace a function once through reverse-mode autodiff objects and flatten the graph into a Tape.
+
+    Parameters
+    --------------
+    function: callable
+        function of len(vals) arguments, returning a reverse-mode autodiff object or a list of them
+        *constants in the function must be numbers*
+
+    vals: array_like
+        values of the input variables used for tracing
+
+    Returns
+    --------------
+    out: a Tape that can be replayed at other input values
+    '''
+    variables = [AutoDiff.rAD(val) for val in vals]
+    with AutoDiff.set_grad_enabled(True), _recording():
+        out = function(*variables)
+    if not isinstance(out, (list, tuple)):
+        out = [out]
+
+    index = {}
+    positions = {id(var): k for k, var in enumerate(variables)}
+    opcodes, args, consts = [], [], []
+    traced = []
+
+    def constant(value):
+        opcodes.append(OPCODES['const'])
+        args.append((len(consts), -1))
+        consts.append(float(np.reshape(value, -1)[0]))
+        return len(opcodes) - 1
+
+    def visit(root):
+        # iterative post-order walk from an output back to the inputs
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in index:
+                continue
+            if node.op is None:
+                if id(node) not in positions:
+                    raise ValueError('Function uses a reverse-mode object that is not one of its inputs.')
+                opcodes.append(OPCODES['input'])
+                args.append((positions[id(node)], -1))
+                index[id(node)] = len(opcodes) - 1
+                continue
+            name, parents = node.op
+            traced.append(node)
+            if name not in OPCODES:
+                raise ValueError('Primitive {!r} has no tape opcode.'.format(name))
+            if not expanded:
+                stack.append((node, True))
+                for parent in reversed(parents):
+                    if isinstance(parent, AutoDiff.rAD) and id(parent) not in index:
+                        stack.append((parent, False))
+                continue
+            parent_ids = []
+            for parent in parents:
+                if isinstance(parent, AutoDiff.rAD):
+                    parent_ids.append(index[id(parent)])
+                elif _is_constant(parent):
+                    parent_ids.append(constant(parent))
+                else:
+                    raise TypeError('Tapes only support numeric constants.')
+            opcodes.append(OPCODES[name])
+            args.append((parent_ids + [-1])[:2])
+            index[id(node)] = len(opcodes) - 1
+
+    outputs = []
+    try:
+        for node in out:
+            if isinstance(node, AutoDiff.rAD):
+                visit(node)
+                outputs.append(index[id(node)])
+            else:
+                outputs.append(constant(node))
+    finally:
+        # the ops made the traced graph a reference cycle; break it so the graph is freed at once
+        for node in traced:
+            node.op = None
+    return Tape(opcodes, args, consts, outputs, len(variables))
+
+def load(path, mmap=True):
+    '''
+    load(path, mmap = True)
+
+    Read a tape written by Tape.save().
+
+    Parameters
+    --------------
+    path: str
+        file written by Tape.save()
+
+    mmap: bool
+        memory-map the file read-only instead of reading it into memory.
+        Memory-mapped tapes share their pages between all processes loading the same file.
+
+    Returns
+    --------------
+    out: a Tape
+    '''
+    with open(path, 'rb') as fh:
+        magic = fh.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError('{0} is not a Bambanta tape file.'.format(path))
+        header = np.frombuffer(fh.read(_HEADER.itemsize), dtype=_HEADER)[0]
+        if not mmap:
+            data = fh.read()
+    n_nodes, n_consts, n_outputs, n_inputs = [int(v) for v in header]
+    layout = [('opcodes', '<u1', n_nodes, True),
+              ('args', '<i4', 2*n_nodes, True),
+              ('consts', '<f8', n_consts, False),
+              ('outputs', '<i4', n_outputs, False)]
+    arrays = {}
+    offset = len(MAGIC) + _HEADER.itemsize
+    start = offset
+    for name, dtype, count, padded in layout:
+        nbytes = np.dtype(dtype).itemsize*count
+        if count == 0:
+            arrays[name] = np.zeros(0, dtype=dtype)
+        elif mmap:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+        else:
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset-start)
+        offset += nbytes + (-nbytes % 8 if padded else 0)
+    return Tape(arrays['opcodes'], arrays['args'].reshape(-1, 2), arrays['consts'],
+                arrays['outputs'], n_inputs)
+
+class IncrementalTape:
+    '''
+    IncrementalTape(tape, vals)
+
+    A tape replayed once at vals, whose node values and partial derivatives are kept
+    so that later changes to a few inputs only recompute the nodes that depend on them.
+    Usually created by incremental().
+
+    gradient() keeps the Jacobian row of every output, and only sweeps backward again
+    from outputs that depend on changed inputs. Its sweeps reuse the stored partials,
+    so they only multiply and add, without evaluating any elementary function again.
+
+    Parameters
+    --------------
+    tape: a Tape
+
+    vals: array_like
+        one value (number or vector) per input variable
+
+    Attributes
+    --------------
+    recomputed: number of nodes recomputed by the last update()
+
+    Examples
+    --------------
+    >>> from Bambanta import AutoDiff, Tape
+    >>> t = Tape.incremental(Tape.record(lambda x, y: [AutoDiff.sin(x)*x, AutoDiff.exp(y)], [1.0, 0.0]), [1.0, 0.0])
+    >>> t.update({1: 2.0})
+    2
+    >>> v, j = t.gradient()
+    >>> float(v[1]), j[1].tolist()
+    (7.38905609893065, [0.0, 7.38905609893065])
+    '''
+    def __init__(self, tape, vals):
+        self.tape = tape
+        self.vals = list(vals)
+        self._values = tape.forward(self.vals)
+        self._partials = tape.partials(self._values)
+        program = tape.program()
+        # nodes using each node, and the input nodes of each input position
+        self._children = [[] for _ in program]
+        self._inputs = {}
+        for i, (name, a, b, _) in enumerate(program):
+            if name == 'input':
+                self._inputs.setdefault(a, []).append(i)
+            elif name != 'const':
+                self._children[a].append(i)
+                if b >= 0 and b != a:
+                    self._children[b].append(i)
+        self._rows = [None]*len(tape.outputs)
+        self.recomputed = 0
+
+    def __repr__(self):
+        return "{0}(nodes={1}, inputs={2}, outputs={3})".format(
+            self.__class__.__name__, len(self.tape), self.tape.n_inputs, len(self.tape.outputs))
+
+    def update(self, changes):
+        '''
+        IncrementalTape.update(changes)
+
+        Change some inputs, and recompute the values and partials of the nodes depending on them.
+
+        Parameters
+        --------------
+        changes: dict
+            new values by input position
+
+        Returns
+        --------------
+        out: number of nodes recomputed, which is also kept as recomputed
+        '''
+        dirty = set()
+        stack = []
+        for pos, val in changes.items():
+            if not 0 <= pos < self.tape.n_inputs:
+                raise ValueError('Tape has no input {0}.'.format(pos))
+            if np.size(val) != np.size(self.vals[pos]):
+                # the zero gradients of unused inputs change shape as well
+                self._rows = [None]*len(self._rows)
+            self.vals[pos] = val
+            stack.extend(self._inputs.get(pos, []))
+        while stack:
+            node = stack.pop()
+            if node not in dirty:
+                dirty.add(node)
+                stack.extend(self._children[node])
+        program = self.tape.program()
+        values, partials = self._values, self._partials
+        # tape order is evaluation order, so parents are recomputed before their children
+        for i in sorted(dirty):
+            name, a, b, _ = program[i]
+            if name == 'input':
+                values[i] = np.array([self.vals[a]], dtype=np.float64).reshape(-1)
+            else:
+                values[i] = VALUES[name](values[a], values[b] if b >= 0 else None)
+                partials[i] = self.tape._partials(values, i)
+        for k, out in enumerate(self.tape.outputs.tolist()):
+            if out in dirty:
+                self._rows[k] = None
+        self.recomputed = len(dirty)
+        return self.recomputed
+
+    def values(self):
+        '''
+        IncrementalTape.values()
+
+        Returns
+        --------------
+        out: array of output values at the current inputs, as returned by Tape.values()
+        '''
+        return np.array([_get(self._values[i]) for i in self.tape.outputs.tolist()])
+
+    def gradient(self):
+        '''
+        IncrementalTape.gradient()
+
+        Differentiate every output at the current inputs.
+
+        Returns
+        --------------
+        out: (values, Jacobian), as returned by Tape.gradient()
+        '''
+        for k, row in enumerate(self._rows):
+            if row is None:
+                self._rows[k] = self.tape._row(self.vals, self._values, k, self._partials)
+        return self.values(), np.array(self._rows)
+
+def incremental(tape, vals):
+    '''
+    incremental(tape, vals)
+
+    Replay a tape at vals, keeping its node values for incremental updates.
+
+    Parameters
+    --------------
+    tape: a Tape
+
+    vals: array_like
+        one value (number or vector) per input variable
+
+    Returns
+    --------------
+    out: an IncrementalTape; update() changes some inputs, values() and gradient() evaluate it
+    '''
+    return IncrementalTape(tape, vals)
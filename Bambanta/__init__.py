@@ -1 +1,12 @@
 name = "Bambanta"
+
+import importlib
+
+# submodules are imported on first access, e.g. Bambanta.Solvers after a plain import Bambanta
+_SUBMODULES = ('AutoDiff', 'Forward', 'Reverse', 'Primitives', 'Jacobian', 'Tape', 'Passes',
+               'CodeGen', 'Memo', 'Parallel', 'Solvers', 'Profiler', 'Memory', 'Jit', 'Streaming', 'Server')
+
+def __getattr__(attr):
+    if attr in _SUBMODULES:
+        return importlib.import_module('.' + attr, __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, attr))
@@ -5,6 +5,9 @@
 #implements forward-mode and reverse-mode automatic differentiation.
 
 #import unit testing packages pytest and numpy testing
+import os
+import sys
+import subprocess
 import pytest
 import numpy as np
 from numpy.testing import assert_array_equal, assert_array_almost_equal, assert_approx_equal
@@ -471,6 +474,389 @@ def test_rAD_ne():
     assert a != c
     assert (a != b) == False
 
+#Test whether no_grad() computes values only and records nothing
+def test_rAD_no_grad():
+    x, y = AutoDiff.rAD([1.0, 2.0]), AutoDiff.rAD(3.0)
+    with AutoDiff.no_grad():
+        assert AutoDiff.is_grad_enabled() == False
+        f = AutoDiff.log(x**y, 2) + AutoDiff.sin(x)*y - 1/y + abs(-x)
+    assert AutoDiff.is_grad_enabled() == True
+    assert x.children == [] and y.children == []
+    assert f.op is None
+    g = AutoDiff.log(x**y, 2) + AutoDiff.sin(x)*y - 1/y + abs(-x)
+    assert_array_equal(f.val, g.val)
+    #as a decorator, and nested inside recording code
+    @AutoDiff.no_grad()
+    def value(a):
+        return AutoDiff.exp(a)*a
+    assert value(x).op is None
+    z = AutoDiff.rAD(3.0)
+    with AutoDiff.no_grad():
+        with AutoDiff.set_grad_enabled(True):
+            h = AutoDiff.exp(z)
+        assert z.children[0][1] is h
+    h.outer()
+    assert_array_almost_equal(z.grad(), np.exp([3.0]))
+
+#Test whether jacobian() gives the same values and derivatives in every mode
+def test_jacobian_modes():
+    def f(x, y, z):
+        return [x*y + AutoDiff.sin(z), AutoDiff.exp(x/2)*z**2, 4.0, x - y*z]
+    vals = [0.5, 2.0, 1.5]
+    v0, j0 = AutoDiff.stack_r(vals, [lambda x, y, z: x*y + AutoDiff.sin(z),
+                                     lambda x, y, z: AutoDiff.exp(x/2)*z**2 + 0*y])
+    costs = dict(AutoDiff.COSTS)
+    try:
+        AutoDiff.COSTS['max_width'] = 2
+        for mode in ['forward', 'chunked', 'reverse', 'auto']:
+            v, j = AutoDiff.jacobian(f, vals, mode)
+            assert v.shape == (4,) and j.shape == (4, 3)
+            assert_array_almost_equal(v[:2], v0)
+            assert_array_almost_equal(j[:2], j0)
+            assert v[2] == 4.0 and not j[2].any()
+            assert_array_almost_equal(j[3], [1.0, -1.5, -2.0])
+    finally:
+        AutoDiff.COSTS.update(costs)
+    with pytest.raises(ValueError):
+        AutoDiff.jacobian(f, vals, 'backward')
+    #a known number of outputs spares the evaluation counting them
+    calls = []
+    def counted(x, y, z):
+        calls.append(1)
+        return f(x, y, z)
+    for mode in ['forward', 'reverse']:
+        del calls[:]
+        v, j = AutoDiff.jacobian(counted, vals, mode, n_outputs = 4)
+        assert len(calls) == 1
+        assert_array_almost_equal(j, AutoDiff.jacobian(f, vals, mode)[1])
+
+#Test grad() on scalar functions, and that it refuses vector-valued ones
+def test_grad():
+    for mode in ['forward', 'reverse']:
+        v, g = AutoDiff.grad(lambda x, y: AutoDiff.log(x)*y, [2.0, 3.0], mode)
+        assert_approx_equal(v, np.log(2.0)*3)
+        assert_array_almost_equal(g, [1.5, np.log(2.0)])
+    with pytest.raises(ValueError):
+        AutoDiff.grad(lambda x, y: [x, y], [1.0, 2.0])
+
+#Test whether batch_jacobian() matches jacobian() at every point, in every mode
+def test_batch_jacobian():
+    def f(x, y, z):
+        return [x*y + AutoDiff.sin(z), AutoDiff.exp(x/2)*z**2, 4.0, x - y*z]
+    points = [[0.5, 2.0, 1.5], [1.0, -1.0, 0.0], [2.0, 0.5, 3.0]]
+    costs = dict(AutoDiff.COSTS)
+    try:
+        AutoDiff.COSTS['max_width'] = 2
+        for mode in ['forward', 'chunked', 'reverse', 'auto']:
+            v, j = AutoDiff.batch_jacobian(f, points, mode)
+            assert v.shape == (3, 4) and j.shape == (3, 4, 3)
+            for p, vals in enumerate(points):
+                v0, j0 = AutoDiff.jacobian(f, vals, mode)
+                assert_array_almost_equal(v[p], v0)
+                assert_array_almost_equal(j[p], j0)
+    finally:
+        AutoDiff.COSTS.update(costs)
+    with pytest.raises(ValueError):
+        AutoDiff.batch_jacobian(f, [1.0, 2.0, 3.0])
+    with pytest.raises(ValueError):
+        AutoDiff.batch_jacobian(f, points, 'backward')
+
+#Test the cost model choosing between modes, and its calibration
+def test_choose_mode():
+    costs = {'forward_base': 1.0, 'forward_per_input': 0.01, 'reverse_base': 1.0,
+             'reverse_per_output': 1.0, 'max_width': 10}
+    assert AutoDiff.choose_mode(1, 100, costs) == 'forward'
+    assert AutoDiff.choose_mode(20, 100, costs) == 'chunked'
+    assert AutoDiff.choose_mode(20, 1, costs) == 'reverse'
+    saved = dict(AutoDiff.COSTS)
+    try:
+        measured = AutoDiff.calibrate(widths = (1, 8, 64), repeat = 1)
+        assert AutoDiff.COSTS == measured
+        assert measured['max_width'] in (1, 8, 64)
+        assert all(measured[k] > 0 for k in measured)
+    finally:
+        AutoDiff.COSTS.update(saved)
+
+#Test whether registered primitives apply to numbers and both modes, with custom derivative rules
+def test_register_primitive():
+    assert AutoDiff.PRIMITIVES['sin'].name == 'sin'
+    with pytest.raises(ValueError):
+        AutoDiff.register_primitive('sin', np.sin, np.cos)
+    with pytest.raises(ValueError):
+        AutoDiff.Primitive('broken', np.sin)
+    try:
+        # elementwise rule
+        hypot = AutoDiff.register_primitive('hypot', np.hypot,
+                                            lambda r, x, y: (x/r, y/r), nargs = 2)
+        assert hypot(3.0, 4.0) == 5.0
+        x, y = AutoDiff.create_f([3.0, 4.0])
+        assert_array_almost_equal(hypot(x, y).der, [[0.6, 0.8]])
+        assert_array_almost_equal(hypot(x, 4.0).der, [[0.6, 0.0]])
+        x, y = AutoDiff.rAD(3.0), AutoDiff.rAD(4.0)
+        f = hypot(x, y)
+        assert x.children[0][1] is f and y.children[0][1] is f
+        f.outer()
+        assert_array_almost_equal([x.grad()[0], y.grad()[0]], [0.6, 0.8])
+        # explicit rules for a non-elementwise primitive: total of a vector
+        total = AutoDiff.register_primitive('total', np.sum,
+                                            jvp = lambda s, der, x: np.sum(der, axis = 0),
+                                            vjp = lambda s, x: lambda g: g*np.ones(len(x)))
+        v = AutoDiff.fAD([1.0, 2.0], [[1.0, 0.0], [0.0, 1.0]])
+        assert_array_equal(total(v).der, [[1.0, 1.0]])
+        v = AutoDiff.rAD([1.0, 2.0])
+        t = total(AutoDiff.sin(v))
+        t.outer()
+        assert_array_almost_equal(v.grad(), np.cos([1.0, 2.0]))
+        # subclasses dispatch like their base class
+        class Leaf(AutoDiff.rAD):
+            pass
+        z = Leaf(0.5)
+        s = AutoDiff.exp(z)
+        s.outer()
+        assert_array_almost_equal(z.grad(), np.exp([0.5]))
+    finally:
+        AutoDiff.PRIMITIVES.pop('hypot', None)
+        AutoDiff.PRIMITIVES.pop('total', None)
+
+#Test the fused composites against their closed forms, in both modes
+def test_fused_composites():
+    x = np.array([0.3, -1.2, 2.0])
+    soft = np.exp(x)/np.sum(np.exp(x))
+    target = np.array([0.2, 0.5, 0.3])
+    cases = [(AutoDiff.logsumexp, np.log(np.sum(np.exp(x))), soft),
+             (AutoDiff.norm, np.sqrt(np.sum(x**2)), x/np.sqrt(np.sum(x**2))),
+             (lambda v: AutoDiff.cross_entropy(v, target), -np.sum(target*np.log(soft)), soft - target)]
+    for f, value, gradient in cases:
+        assert_approx_equal(f(x), value)
+        fx = f(AutoDiff.fAD(x, np.eye(3)))
+        assert_array_almost_equal(fx.val, [value])
+        assert_array_almost_equal(fx.der, [gradient])
+        rx = AutoDiff.rAD(x)
+        out = f(rx)
+        assert len(rx.children) == 1
+        out.outer()
+        assert_array_almost_equal(rx.grad(), gradient)
+    # elementwise composites
+    for f, value, d in [(AutoDiff.softplus, np.log(1 + np.exp(x)), 1/(1 + np.exp(-x))),
+                        (AutoDiff.log_logistic, -np.log(1 + np.exp(-x)), 1/(1 + np.exp(x)))]:
+        assert_array_almost_equal(f(x), value)
+        assert_array_almost_equal(f(AutoDiff.fAD(x, np.eye(3))).der, np.diag(d))
+        rx = AutoDiff.rAD(x)
+        out = f(rx)
+        out.outer()
+        assert_array_almost_equal(rx.grad(), d)
+
+#Test whether the fused composites stay finite at extreme inputs
+def test_fused_composites_extreme():
+    with np.errstate(over = 'raise', invalid = 'raise'):
+        big = np.array([1000.0, -1000.0])
+        assert_approx_equal(AutoDiff.logsumexp(big), 1000.0)
+        assert_array_equal(AutoDiff.softplus(big), [1000.0, 0.0])
+        assert_array_equal(AutoDiff.log_logistic(big), [0.0, -1000.0])
+        assert_approx_equal(AutoDiff.norm([3e200, 4e200]), 5e200)
+        assert AutoDiff.norm([0.0, 0.0]) == 0.0
+        rx = AutoDiff.rAD(big)
+        out = AutoDiff.cross_entropy(rx, [0.0, 1.0])
+        assert_approx_equal(out.val[0], 2000.0)
+        out.outer()
+        assert_array_almost_equal(rx.grad(), [1.0, -1.0])
+        fx = AutoDiff.softplus(AutoDiff.fAD(big, np.eye(2)))
+        assert_array_equal(fx.der, [[1.0, 0.0], [0.0, 0.0]])
+        zero = AutoDiff.rAD([0.0, 0.0])
+        n = AutoDiff.norm(zero)
+        n.outer()
+        assert_array_equal(zero.grad(), [0.0, 0.0])
+
+#Test reductions and products of vector autodiff objects in both modes
+def test_reductions_linear_algebra():
+    x0 = np.array([0.5, -1.0, 2.0])
+    w = np.array([1.0, 2.0, -3.0])
+    A = np.array([[1.0, 2.0, 0.0], [0.0, -1.0, 3.0]])
+    x = AutoDiff.fAD(x0, np.eye(3))
+    assert_array_almost_equal(AutoDiff.sum(x).der, [[1.0, 1.0, 1.0]])
+    assert_array_almost_equal(AutoDiff.mean(x*x).der, [2*x0/3])
+    assert_array_almost_equal(AutoDiff.dot(x, w).der, [w])
+    assert_array_almost_equal(AutoDiff.dot(x, x).der, [2*x0])
+    y = AutoDiff.matmul(A, x)
+    assert_array_almost_equal(y.val, A @ x0)
+    assert_array_almost_equal(y.der, A)
+    assert_array_almost_equal(AutoDiff.matmul(w[:2], AutoDiff.fAD(w[:2], np.eye(2))).der, [w[:2]])
+    assert_array_almost_equal(AutoDiff.matmul(AutoDiff.fAD(A @ x0, np.eye(2)), A).der, A.T)
+    # reverse mode: one node for the whole linear layer
+    x = AutoDiff.rAD(x0)
+    f = AutoDiff.sum(AutoDiff.sin(AutoDiff.matmul(A, x)))
+    assert len(x.children) == 1
+    f.outer()
+    assert_array_almost_equal(x.grad(), A.T @ np.cos(A @ x0))
+    x = AutoDiff.rAD(x0)
+    f = AutoDiff.dot(x, x) + AutoDiff.mean(x)
+    f.outer()
+    assert_array_almost_equal(x.grad(), 2*x0 + 1/3)
+    # numbers
+    assert AutoDiff.sum([1.0, 2.0]) == 3.0
+    assert AutoDiff.dot([1.0, 2.0], [3.0, 4.0]) == 11.0
+    assert_array_equal(AutoDiff.matmul(A, x0), A @ x0)
+
+#Test einsum against the equivalent products, in both modes
+def test_einsum():
+    x0 = np.array([0.5, -1.0, 2.0])
+    v0 = np.array([1.0, 3.0])
+    A = np.array([[1.0, 2.0, 0.0], [0.0, -1.0, 3.0]])
+    x = AutoDiff.fAD(x0, np.eye(3))
+    y = AutoDiff.einsum('ij,j->i', A, x)
+    assert_array_almost_equal(y.val, A @ x0)
+    assert_array_almost_equal(y.der, A)
+    assert_array_almost_equal(AutoDiff.einsum('i,i', x, x).der, [2*x0])
+    # outer product of two variables, flattened
+    x, v = AutoDiff.fAD(x0, np.hstack([np.eye(3), np.zeros((3, 2))])), AutoDiff.fAD(v0, np.hstack([np.zeros((2, 3)), np.eye(2)]))
+    o = AutoDiff.einsum('i,j->ij', x, v)
+    assert_array_almost_equal(o.val, np.outer(x0, v0).reshape(-1))
+    assert o.der.shape == (6, 5)
+    assert_array_almost_equal(o.der[1], [3.0, 0.0, 0.0, 0.0, 0.5])
+    x, v = AutoDiff.rAD(x0), AutoDiff.rAD(v0)
+    f = AutoDiff.einsum('i,j->ij', x, v)
+    f.outer()
+    assert_array_almost_equal(x.grad(), np.full(3, v0.sum()))
+    assert_array_almost_equal(v.grad(), np.full(2, x0.sum()))
+    # an index summed over within the constant only
+    x = AutoDiff.rAD(x0)
+    f = AutoDiff.einsum('ij,j->', A, x)
+    f.outer()
+    assert_array_almost_equal(x.grad(), A.sum(axis = 0))
+    v = AutoDiff.rAD(v0)
+    f = AutoDiff.einsum('ij,i->', A, v)
+    f.outer()
+    assert_array_almost_equal(v.grad(), A.sum(axis = 1))
+    with pytest.raises(ValueError):
+        AutoDiff.einsum('...i,i', A, x)
+    with pytest.raises(ValueError):
+        AutoDiff.einsum('ij,j->i', A)
+
+#Test whether AutoDiff loads its submodules, and numpy, only on first use of their names
+def test_lazy_import():
+    script = ("import sys\n"
+              "from Bambanta import AutoDiff\n"
+              "print(sorted(m for m in sys.modules if m.startswith('Bambanta')), 'numpy' in sys.modules)\n"
+              "AutoDiff.fAD\n"
+              "print(sorted(m for m in sys.modules if m.startswith('Bambanta')), 'numpy' in sys.modules)\n")
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    out = subprocess.run([sys.executable, '-c', script], cwd = root, check = True,
+                         capture_output = True, text = True).stdout.splitlines()
+    assert out == ["['Bambanta', 'Bambanta.AutoDiff'] False",
+                   "['Bambanta', 'Bambanta.AutoDiff', 'Bambanta.Forward'] True"]
+    #every exported name resolves, to the object of its submodule
+    from Bambanta import Primitives
+    assert AutoDiff.sin is Primitives.sin
+    assert set(AutoDiff.__all__) <= set(dir(AutoDiff))
+    assert all(getattr(AutoDiff, name) is not None for name in AutoDiff.__all__)
+    with pytest.raises(AttributeError):
+        AutoDiff.no_such_name
+
+#Test whether NumPy ufuncs on AD instances route to the primitives and operators, in both modes
+def test_numpy_ufuncs():
+    x0 = np.array([0.5, 1.0, 2.0])
+    c = np.array([3.0, 0.5, 2.0])
+    x = AutoDiff.fAD(x0, np.eye(3))
+    y = np.sin(x)*c + np.exp(x)/c - c**x + np.log2(x) - np.sqrt(np.square(x))
+    z = AutoDiff.sin(x)*c + AutoDiff.exp(x)/c - c**x + AutoDiff.log(x, 2) - AutoDiff.sqrt(x**2)
+    assert isinstance(y, AutoDiff.fAD)
+    assert_array_almost_equal(y.val, z.val)
+    assert_array_almost_equal(y.der, z.der)
+    assert_array_almost_equal(y.der, np.diag(np.cos(x0)*c + np.exp(x0)/c - c**x0*np.log(c)
+                                             + 1/(x0*np.log(2)) - 1))
+    x = AutoDiff.rAD(x0)
+    f = np.sum(np.tanh(x)*c - np.abs(-x) + np.reciprocal(x))
+    assert isinstance(f, AutoDiff.rAD)
+    f.outer()
+    assert_array_almost_equal(x.grad(), c/np.cosh(x0)**2 - 1 - 1/x0**2)
+    #a NumPy scalar and a matrix on the left
+    A = np.array([[1.0, 2.0, 0.0], [0.0, -1.0, 3.0]])
+    x = AutoDiff.fAD(x0, np.eye(3))
+    y = np.float64(2.0)*(A @ x)
+    assert_array_almost_equal(y.der, 2*A)
+    #unsupported ufuncs and arguments, and mixed modes, raise
+    with pytest.raises(TypeError):
+        np.maximum(x, 1.0)
+    with pytest.raises(TypeError):
+        np.sin(x, out = np.zeros(3))
+    with pytest.raises(TypeError):
+        np.add(x, AutoDiff.rAD(x0))
+    #object arrays of scalar AD instances join into one vector with an AD operand
+    objects = np.array([AutoDiff.fAD(1.0), AutoDiff.fAD(2.0)], dtype = object)
+    assert_array_equal((objects*AutoDiff.fAD(3.0)).val, [3.0, 6.0])
+    a, b = AutoDiff.create_r([1.0, 2.0])
+    objects = np.array([a, b], dtype = object)
+    f = AutoDiff.sum(np.multiply(objects, AutoDiff.rAD(np.array([3.0, 5.0]))))
+    f.outer()
+    assert_array_almost_equal([a.grad()[0], b.grad()[0]], [3.0, 5.0])
+    #and alone, NumPy's element-by-element loop applies the same rules
+    a, b = AutoDiff.create_r([1.0, 2.0])
+    y = np.sin(np.array([a, b], dtype = object))
+    assert_array_almost_equal([e.get_val() for e in y], np.sin([1.0, 2.0]))
+    y[1].outer()
+    assert_array_almost_equal([a.grad()[0], b.grad()[0]], [0.0, np.cos(2.0)])
+    y = np.exp(np.array(AutoDiff.create_f([0.0, 1.0]), dtype = object))
+    assert_array_almost_equal([e.get_jac() for e in y], [[1.0, 0.0], [0.0, np.e]])
+
+#Test whether NumPy array functions on AD instances route to the reductions and products
+def test_numpy_functions():
+    x0 = np.array([3.0, 4.0])
+    A = np.array([[1.0, 2.0], [0.0, -1.0], [3.0, 0.5]])
+    x = AutoDiff.fAD(x0, np.eye(2))
+    assert_array_almost_equal(np.sum(x*x).der, [2*x0])
+    assert_array_almost_equal(np.mean(x).der, [[0.5, 0.5]])
+    assert_array_almost_equal(np.dot(x, x0).der, [x0])
+    assert_array_almost_equal(np.dot(A, x).der, A)
+    assert_array_almost_equal(np.linalg.norm(x).der, [x0/5])
+    assert_array_almost_equal(np.einsum('ij,j->i', A, x).der, A)
+    x = AutoDiff.rAD(x0)
+    f = np.sum(np.matmul(A, x)) + np.dot(x, x)
+    f.outer()
+    assert_array_almost_equal(x.grad(), A.sum(axis = 0) + 2*x0)
+    #functions that are not routed behave as before
+    assert np.shape(x) == ()
+    with pytest.raises(TypeError):
+        np.sum(x, axis = 0)
+
+#Test whether scalar AD instances join into one vector, in both modes
+def test_concatenate():
+    a, b = AutoDiff.create_r([1.0, 2.0])
+    f = np.sum(np.stack([a, b])*np.array([3.0, 4.0])) + AutoDiff.sum(np.concatenate([a, b, [5.0]])**2)
+    f.outer()
+    assert_array_almost_equal(a.grad(), [5.0])
+    assert_array_almost_equal(b.grad(), [8.0])
+    a, b = AutoDiff.create_f([1.0, 2.0])
+    v = AutoDiff.concatenate(np.array([a, 7.0, b], dtype = object))
+    assert_array_equal(v.val, [1.0, 7.0, 2.0])
+    assert_array_equal(v.der, [[1, 0], [0, 0], [0, 1]])
+    with pytest.raises(TypeError):
+        np.stack([AutoDiff.fAD([1.0, 2.0], [[1], [1]]), a])
+    assert_array_equal(AutoDiff.concatenate([1.0, [2.0, 3.0]]), [1.0, 2.0, 3.0])
+
+#Test whether operations with constant arrays scale each value's derivatives by its own constant
+def test_array_constants():
+    x0 = np.array([1.0, 2.0])
+    c = np.array([3.0, 5.0])
+    x = AutoDiff.fAD(x0, [[1.0, 0.0, 1.0], [0.0, 1.0, 1.0]])
+    assert_array_almost_equal((x*c).der, [[3.0, 0.0, 3.0], [0.0, 5.0, 5.0]])
+    assert_array_almost_equal((c*x).der, [[3.0, 0.0, 3.0], [0.0, 5.0, 5.0]])
+    assert_array_almost_equal((x/c).der, [[1/3, 0.0, 1/3], [0.0, 0.2, 0.2]])
+    #a single variable against a constant vector
+    s = AutoDiff.fAD(2.0)*c
+    assert_array_almost_equal(s.der, [[3.0], [5.0]])
+    x = AutoDiff.rAD(x0)
+    f = x*c
+    f.outer()
+    assert_array_almost_equal(x.grad(), c)
+    assert_array_almost_equal(AutoDiff.mul_by_row(c, np.ones((2, 3))), [[3.0]*3, [5.0]*3])
+
+#Test whether a single reverse-mode value used against a vector gets one partial per element
+def test_rAD_broadcast():
+    a = AutoDiff.rAD(2.0)
+    f = a*AutoDiff.rAD([1.0, 2.0])
+    f.outer()
+    assert_array_almost_equal(a.grad(), [1.0, 2.0])
+
 #Test whether taking the sine of AD instance returns the correct value
 #Test whether the sin() function also apply to integers
 def test_combined_sin():
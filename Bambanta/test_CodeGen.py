@@ -0,0 +1,47 @@
+#test_CodeGen.py
+#
+#This test suite is associated with file 'CodeGen.py', which
+#emits straight-line NumPy code for values and Jacobians of traced functions.
+
+import os
+from numpy.testing import assert_array_almost_equal
+
+from Bambanta import AutoDiff, Tape, CodeGen
+
+def f1(x, y, z):
+    return 2*x + y**3 + AutoDiff.cos(z) - x/y
+
+def f2(x, y, z):
+    return AutoDiff.log(x*y, 2) + 2**z - abs(-x) + AutoDiff.sqrt(z)
+
+def f3(x, y, z):
+    return AutoDiff.logistic(x)*AutoDiff.tanh(y) + AutoDiff.exp(z)**y - 1
+
+def vector_f(x, y, z):
+    return [f1(x, y, z), f2(x, y, z), f3(x, y, z), x]
+
+#Test whether generated code matches stack_r away from the traced point
+def test_codegen(tmpdir):
+    fn = CodeGen.codegen(vector_f, [1.0, 2.0, 3.0], cache_dir=str(tmpdir))
+    for vals in [[1.0, 2.0, 3.0], [0.5, 1.5, 0.25]]:
+        v, j = AutoDiff.stack_r(vals, [f1, f2, f3, lambda x, y, z: x + 0*(y + z)])
+        cv, cj = fn(*vals)
+        assert_array_almost_equal(cv, v)
+        assert_array_almost_equal(cj, j)
+
+#Test whether generated modules are written to and reused from the cache
+def test_codegen_cache(tmpdir):
+    t = Tape.record(vector_f, [1.0, 2.0, 3.0])
+    module = CodeGen.compile_tape(t, cache_dir=str(tmpdir))
+    files = os.listdir(str(tmpdir))
+    assert files == [module.__name__ + '.py']
+    assert CodeGen.compile_tape(Tape.record(vector_f, [4.0, 5.0, 6.0]), cache_dir=str(tmpdir)) is module
+    assert 'rAD' not in open(os.path.join(str(tmpdir), files[0])).read()
+    assert_array_almost_equal(module.value(0.5, 1.5, 0.25), t.values([0.5, 1.5, 0.25]))
+
+#Test whether constants of any sign are emitted correctly
+def test_codegen_constants(tmpdir):
+    fn = CodeGen.codegen(lambda x: x**(-2.0) + (-3.0)*x, [2.0], cache_dir=str(tmpdir))
+    v, j = fn(3.0)
+    assert_array_almost_equal(v, [1/9.0 - 9.0])
+    assert_array_almost_equal(j, [[-2/27.0 - 3.0]])
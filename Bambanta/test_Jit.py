@@ -0,0 +1,103 @@
+#test_Jit.py
+#
+#This test suite is associated with file 'Jit.py', which
+#replays recorded tapes with compiled kernels when Numba is installed.
+
+import pytest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from Bambanta import AutoDiff, Tape, Jit
+
+def f1(x, y, z):
+    return 2*x + y**3 + AutoDiff.cos(z) - x/y
+
+def f2(x, y, z):
+    return AutoDiff.log(x*y, 2) + 2**z - abs(-x) + AutoDiff.sqrt(z)
+
+def f3(x, y, z):
+    return AutoDiff.logistic(x)*AutoDiff.tanh(y) + AutoDiff.exp(z)**y
+
+def f4(x, y, z):
+    return AutoDiff.arctan(-x*z) + AutoDiff.sinh(y)/AutoDiff.cosh(z) - AutoDiff.tan(x) + AutoDiff.arcsin(x/4)
+
+def vector_f(x, y, z):
+    return [f1(x, y, z), f2(x, y, z), f3(x, y, z), f4(x, y, z), x, 2.0]
+
+def wide_f(*xs):
+    # long chains of arithmetic between elementals, and inputs used many times
+    out = []
+    for i in range(len(xs)):
+        f = xs[i]
+        for j in range(1, 6):
+            f = AutoDiff.sin(f*xs[(i+j) % len(xs)] + 1) - f/(xs[i-j]**2 + 1)
+        out.append(f)
+    return out
+
+def assert_identical(a, b):
+    #bit for bit, which also tells 0.0 from -0.0 and compares nans
+    a, b = np.asarray(a), np.asarray(b)
+    assert a.dtype == b.dtype and a.shape == b.shape
+    assert a.tobytes() == b.tobytes()
+
+@pytest.fixture(params=['numba', 'numpy'])
+def backend(request, monkeypatch):
+    if request.param == 'numba':
+        pytest.importorskip('numba')
+    else:
+        #as if Numba were not installed
+        monkeypatch.setattr(Jit, '_kernels', False)
+    return request.param
+
+#Test whether both backends replay a tape exactly as the interpreter does
+def test_jit_identical(backend):
+    t = Tape.record(vector_f, [1.0, 2.0, 3.0])
+    jt = Jit.jit(t)
+    assert jt.backend == backend
+    assert Jit.available() == (backend == 'numba')
+    rng = np.random.default_rng(0)
+    points = [[1.0, 2.0, 3.0], [0.5, 1.5, 0.25], [0.0, 1.0, -0.0]] + rng.uniform(0.1, 3.0, (20, 3)).tolist()
+    with np.errstate(all='ignore'):
+        for vals in points:
+            v, j = jt.gradient(vals)
+            tv, tj = t.gradient(vals)
+            assert_identical(v, tv)
+            assert_identical(j, tj)
+            assert_identical(jt.values(vals), t.values(vals))
+
+#Test whether many stages of elementals and arithmetic replay exactly
+def test_jit_wide(backend):
+    vals = np.linspace(0.1, 2.0, 12).tolist()
+    t = Tape.record(wide_f, vals)
+    jt = Jit.jit(t)
+    v, j = jt.gradient(vals[::-1])
+    tv, tj = t.gradient(vals[::-1])
+    assert_identical(v, tv)
+    assert_identical(j, tj)
+    v, j = AutoDiff.stack_r(vals[::-1], [lambda *xs, i=i: wide_f(*xs)[i] for i in range(len(vals))])
+    np.testing.assert_array_almost_equal(jt.gradient(vals[::-1])[1], j)
+
+#Test whether special values come out as the interpreter's
+def test_jit_special_values(backend):
+    t = Tape.record(lambda x, y: [x/y, AutoDiff.log(x, 2), abs(x)*y, -x**y], [1.0, 2.0])
+    jt = Jit.jit(t)
+    with np.errstate(all='ignore'):
+        for vals in [[1.0, 0.0], [-1.0, 0.5], [0.0, -0.0], [np.inf, 2.0], [np.nan, 1.0]]:
+            v, j = jt.gradient(vals)
+            tv, tj = t.gradient(vals)
+            assert_identical(v, tv)
+            assert_identical(j, tj)
+
+#Test whether vector inputs and unused inputs are handled as by the interpreter
+def test_jit_inputs(backend):
+    t = Tape.record(lambda x, y, z: x*y, [1.0, 2.0, 3.0])
+    jt = Jit.jit(t)
+    assert_identical(jt.gradient([2, 5, 7])[1], t.gradient([2, 5, 7])[1])
+    assert_identical(jt.gradient([[2.0], 5.0, 7.0])[1], t.gradient([[2.0], 5.0, 7.0])[1])
+    v, j = jt.gradient([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    assert_array_equal(v[0], [3.0, 8.0])
+    assert_array_equal(j[0][0], [3.0, 4.0])
+    with pytest.raises(ValueError):
+        jt.gradient([1.0, 2.0])
+    assert 'backend' in repr(jt)
+    assert len(jt) == len(t)
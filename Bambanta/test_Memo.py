@@ -0,0 +1,58 @@
+#test_Memo.py
+#
+#This test suite is associated with file 'Memo.py', which
+#memoizes evaluations of differentiated functions.
+
+import pytest
+import numpy as np
+
+from Bambanta import AutoDiff, Tape, Memo
+
+def f(x, y):
+    return AutoDiff.sin(x)*y
+
+#Test whether repeated evaluations are served from the cache
+def test_memo_hits():
+    calls = []
+    def vg(x):
+        calls.append(x)
+        return AutoDiff.stack_r(x, [f])
+    cached = Memo.Memoize(vg)
+    v1, j1 = cached(np.array([1.0, 2.0]))
+    v2, j2 = cached(np.array([1.0, 2.0]))
+    assert len(calls) == 1
+    assert v1 is v2 and j1 is j2
+    assert cached.hits == 1 and cached.misses == 1
+    #inputs are keyed on their exact bytes
+    cached(np.array([1.0, 2.0 + 1e-16]))
+    cached(np.array([1.0, np.nextafter(2.0, 3.0)]))
+    assert cached.misses == 2
+    #cached arrays cannot be corrupted by callers
+    with pytest.raises(ValueError):
+        j1[0, 0] = 5.0
+
+#Test whether the cache evicts least recently used results by count and by bytes
+def test_memo_eviction():
+    t = Tape.record(f, [1.0, 2.0])
+    cached = Memo.Memoize(t.gradient, maxsize=2)
+    cached([1.0, 1.0])
+    cached([2.0, 2.0])
+    cached([1.0, 1.0])
+    cached([3.0, 3.0])
+    assert len(cached) == 2
+    assert cached.evictions == 1
+    cached([1.0, 1.0])
+    assert cached.hits == 2
+    cached([2.0, 2.0])
+    assert cached.misses == 4
+    nbytes = cached.nbytes//len(cached)
+    cached = Memo.memoize(t.gradient, maxsize=None, maxbytes=3*nbytes)
+    for k in range(10):
+        cached([float(k), 1.0])
+    assert len(cached) == 3
+    assert cached.cache_info()['nbytes'] <= 3*nbytes
+    assert cached.cache_info()['evictions'] == 7
+    cached.cache_clear()
+    assert cached.cache_info()['size'] == 0 and cached.hits == 0
+    with pytest.raises(TypeError):
+        cached([AutoDiff.rAD(1.0), 1.0])
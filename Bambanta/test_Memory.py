@@ -0,0 +1,46 @@
+#test_Memory.py
+#
+#This test suite is associated with file 'Memory.py', which
+#accounts for the memory held by reverse-mode graphs.
+
+import gc
+import numpy as np
+
+from Bambanta import AutoDiff, Memory
+
+#Test the counts and bytes of a small graph, before and after the sweep
+def test_graph_stats():
+    x, y = AutoDiff.rAD(np.ones(100)), AutoDiff.rAD(np.ones(100))
+    f = AutoDiff.exp(x*y) + x
+    stats = Memory.graph_stats(f)
+    # x, y, x*y, exp, +
+    assert stats['nodes'] == 5
+    assert stats['edges'] == 5
+    assert stats['value_bytes'] == 5*800
+    # partials of *, exp and + with respect to an array value are arrays
+    assert stats['partial_bytes'] >= 3*800
+    assert stats['gradient_bytes'] == 0
+    assert stats['total_bytes'] == sum(stats[k] for k in Memory.FIELDS[2:])
+    f.outer()
+    x.grad()
+    assert Memory.graph_stats(f)['gradient_bytes'] >= 3*800
+    #any node of the graph gives the whole graph
+    assert Memory.graph_stats(x)['nodes'] == 5
+    assert Memory.graph_stats([f, y])['nodes'] == 5
+    #graphs cut by reset_der
+    AutoDiff.reset_der([x, y])
+    assert Memory.graph_stats(x)['nodes'] == 1
+
+#Test whether process-wide accounting sees graphs until they are released
+def test_process_stats():
+    gc.collect()
+    before = Memory.process_stats()
+    xs = [AutoDiff.rAD(float(i)) for i in range(10)]
+    outs = [AutoDiff.sin(x)*x for x in xs]
+    during = Memory.process_stats()
+    assert during['nodes'] - before['nodes'] == 30
+    assert during['recorded'] - before['recorded'] == 10
+    del xs, outs
+    gc.collect()
+    after = Memory.process_stats()
+    assert after['nodes'] == before['nodes']
@@ -0,0 +1,54 @@
+#test_Parallel.py
+#
+#This test suite is associated with file 'Parallel.py', which
+#spreads Jacobian and batch evaluations over a process pool.
+
+import pytest
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from Bambanta import AutoDiff, Parallel
+
+#functions are defined at module level so that worker processes can unpickle them
+def f1(x, y, z):
+    return 2*x + y**3 + AutoDiff.cos(z)
+
+def f2(x, y, z):
+    return x*y*z
+
+def f3(x, y, z):
+    return AutoDiff.exp(x) - y/z
+
+def vector_f(x, y, z):
+    return [f1(x, y, z), f2(x, y, z), f3(x, y, z)]
+
+#Test whether parallel_r matches stack_r, serially and on a pool
+def test_parallel_r():
+    vals = [1.0, 2.0, 3.0]
+    v, j = AutoDiff.stack_r(vals, [f1, f2, f3])
+    for workers in [1, 2]:
+        pv, pj = Parallel.parallel_r(vals, [f1, f2, f3], workers=workers)
+        assert_array_almost_equal(pv, v)
+        assert_array_almost_equal(pj, j)
+
+#Test whether parallel_f matches the forward-mode Jacobian for any chunk size
+def test_parallel_f():
+    vals = [1.0, 2.0, 3.0]
+    f = AutoDiff.stack_f(vector_f(*AutoDiff.create_f(vals)))
+    for workers, chunk in [(1, None), (2, None), (2, 1), (3, 2)]:
+        pv, pj = Parallel.parallel_f(vector_f, vals, workers=workers, chunk=chunk)
+        assert_array_almost_equal(pv, f.val)
+        assert_array_almost_equal(pj, f.der)
+
+#Test whether batch_f evaluates every point
+def test_batch_f():
+    points = np.random.RandomState(0).uniform(1, 2, size=(7, 3))
+    pv, pj = Parallel.batch_f(vector_f, points, workers=2)
+    assert pv.shape == (7, 3)
+    assert pj.shape == (7, 3, 3)
+    for p in range(7):
+        f = AutoDiff.stack_f(vector_f(*AutoDiff.create_f(points[p])))
+        assert_array_almost_equal(pv[p], f.val)
+        assert_array_almost_equal(pj[p], f.der)
+    with pytest.raises(ValueError):
+        Parallel.batch_f(vector_f, [1.0, 2.0, 3.0])
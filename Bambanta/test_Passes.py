@@ -0,0 +1,111 @@
+#test_Passes.py
+#
+#This test suite is associated with file 'Passes.py', which
+#implements optimization passes over recorded tapes.
+
+import pytest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_array_almost_equal
+
+from Bambanta import AutoDiff, Tape, Passes
+
+def f(x, y):
+    s = AutoDiff.sin(x)*AutoDiff.sin(x)
+    return [s + x**2 + x**2*1 + 0 + y/1, y*x + x*y, AutoDiff.log(y, 2)]
+
+#Test whether simplify() merges repeated subexpressions, in either operand order
+def test_simplify_cse():
+    t = Tape.record(f, [1.0, 2.0])
+    s, report = Passes.simplify(t)
+    # sin(x), x**2 and x*y are each computed twice, the constant 2 appears three times
+    assert report['merged'] >= 5
+    assert report['identities'] == 3
+    assert_array_almost_equal(s.gradient([0.3, 1.7])[1], t.gradient([0.3, 1.7])[1])
+
+#Test whether constant-only subtrees are folded
+def test_simplify_fold():
+    t = Tape.Tape([Tape.OPCODES['input'], Tape.OPCODES['const'], Tape.OPCODES['const'],
+                   Tape.OPCODES['add'], Tape.OPCODES['exp'], Tape.OPCODES['mul']],
+                  [(0, -1), (0, -1), (1, -1), (1, 2), (3, -1), (0, 4)],
+                  [1.0, 2.0], [5], 1)
+    s, report = Passes.simplify(t)
+    assert report['folded'] == 2
+    o, report = Passes.optimize(t)
+    assert len(o) == 3
+    assert report['removed'] == 3
+    assert_array_almost_equal(o.gradient([2.0])[0], [2*np.exp(3.0)])
+    assert_array_almost_equal(o.gradient([2.0])[1], [[np.exp(3.0)]])
+
+#Test whether optimize() preserves values and Jacobians exactly and reports removed nodes
+def test_optimize():
+    t = Tape.record(f, [1.0, 2.0])
+    o, report = Passes.optimize(t)
+    assert report['before'] == len(t)
+    assert report['after'] == len(o)
+    assert report['removed'] == len(t) - len(o) > 0
+    for vals in [[1.0, 2.0], [0.25, 3.5]]:
+        v, j = t.gradient(vals)
+        ov, oj = o.gradient(vals)
+        assert_array_equal(ov, v)
+        assert_array_almost_equal(oj, j)
+    #an already optimized tape is left unchanged
+    assert Passes.optimize(o)[1]['removed'] == 0
+
+def gaussian(x, mu, s):
+    return AutoDiff.exp(-(x-mu)**2/s)
+
+#Test whether fuse() groups an elementwise chain into one node
+def test_fuse_groups():
+    t = Tape.record(gaussian, [[0.0, 1.0], 0.5, 2.0])
+    fused, report = Passes.fuse(t)
+    assert report == {'groups': 1, 'fused': 4}
+    assert len(fused) == len(t) - 4
+    #values used more than once, and outputs, are never fused away
+    def f(x):
+        s = AutoDiff.sin(x)
+        return [s*AutoDiff.cos(x), s]
+    fused, report = Passes.fuse(Tape.record(f, [1.0]))
+    assert report['fused'] == 1
+
+#Test whether fused tapes match unfused tapes on vector inputs
+def test_fuse_gradient():
+    def f(x, y):
+        a = AutoDiff.exp(-(x-y)**2/2.0)
+        b = AutoDiff.tanh(AutoDiff.sin(x)*y) + AutoDiff.log(x*x, 2)
+        return [a*b + a, AutoDiff.sqrt(abs(-y))]
+    t = Tape.record(f, [1.0, 2.0])
+    fused, report = Passes.fuse(t)
+    assert report['groups'] >= 2
+    vals = [np.linspace(0.5, 2.0, 4), np.linspace(-1.0, 1.0, 4)]
+    v, j = t.gradient(vals)
+    fv, fj = fused.gradient(vals)
+    assert_array_almost_equal(fv, v)
+    assert_array_almost_equal(fj, j)
+    assert_array_almost_equal(fused.values(vals), t.values(vals))
+    with pytest.raises(ValueError):
+        fused.forward([1.0])
+
+#Test whether fused tapes release the values the backward sweep does not read
+def test_fuse_release():
+    t = Tape.record(gaussian, [[0.0, 1.0], 0.5, 2.0])
+    fused, _ = Passes.fuse(t)
+    vals = [np.linspace(-1.0, 1.0, 5), 0.5, 2.0]
+    values, local = fused.forward(vals)
+    assert sum(v is not None for v in values) == 1
+    assert len(local[int(t.outputs[0])]) == 3
+    v, j = t.gradient(vals)
+    fv, fj = fused.gradient(vals)
+    assert_array_almost_equal(fv, v)
+    assert_array_almost_equal(fj, j)
+
+#Test whether a scalar parameter fused into a vector operation is broadcast
+def test_fuse_broadcast():
+    vals = [np.arange(3.0), 0.5]
+    for f in [lambda x, mu: AutoDiff.exp(-mu)*x, lambda x, s: AutoDiff.sin(s*2)*x]:
+        t = Tape.record(f, vals)
+        fused, report = Passes.fuse(t)
+        assert report['fused'] >= 1
+        v, j = t.gradient(vals)
+        fv, fj = fused.gradient(vals)
+        assert_array_almost_equal(fv, v)
+        assert_array_almost_equal(fj, j)
@@ -0,0 +1,76 @@
+#test_Profiler.py
+#
+#This test suite is associated with file 'Profiler.py', which
+#profiles automatic differentiation by operation.
+
+import json
+
+from Bambanta import AutoDiff, Profiler, Reverse
+
+def f(x, y):
+    return AutoDiff.exp(x)*y - y/x + AutoDiff.log(x, 2)
+
+def counts():
+    return {(s['name'], s['phase']): s['calls'] for s in Profiler.stats()}
+
+#Test whether operators, elementals and the backward sweep are counted in both modes
+def test_profile_counts():
+    with Profiler.profiling():
+        x, y = AutoDiff.create_f([1.0, 2.0])
+        f(x, y)
+        AutoDiff.sin(0.5)
+        x, y = AutoDiff.rAD(1.0), AutoDiff.rAD(2.0)
+        out = f(x, y)
+        out.outer()
+        x.grad()
+        y.grad()
+    c = counts()
+    for mode in ['fAD', 'rAD']:
+        assert c[(mode + '.exp', 'forward')] == 1
+        assert c[(mode + '.log', 'forward')] == 1
+        assert c[(mode + '.mul', 'forward')] == 1
+        assert c[(mode + '.div', 'forward')] == 1
+        assert c[(mode + '.sub', 'forward')] == 1
+        assert c[(mode + '.add', 'forward')] == 1
+    assert c[('numeric.sin', 'forward')] == 1
+    #one backward entry per edge, by the operation of the node it leads to
+    assert c[('rAD.mul', 'backward')] == 2
+    assert c[('rAD.div', 'backward')] == 2
+    assert c[('rAD.exp', 'backward')] == 1
+    assert c[('rAD.grad', 'backward')] == 2
+    for s in Profiler.stats():
+        assert 0 <= s['self'] <= s['total'] + 1e-9
+
+#Test whether disabling restores the original methods
+def test_profile_disable():
+    mul, call, grad = AutoDiff.rAD.__mul__, AutoDiff.Primitive.__call__, AutoDiff.rAD.grad
+    Profiler.enable()
+    try:
+        assert Profiler.is_enabled()
+        assert Reverse._edge_hook.__wrapped__ is Reverse._edge
+        assert Reverse._record_ops
+        assert AutoDiff.rAD.__mul__ is not mul
+        assert AutoDiff.rAD.__mul__.__wrapped__ is mul
+        Profiler.enable()
+    finally:
+        Profiler.disable()
+    assert not Profiler.is_enabled()
+    assert AutoDiff.rAD.__mul__ is mul
+    assert AutoDiff.Primitive.__call__ is call
+    assert AutoDiff.rAD.grad is grad
+    assert Reverse._edge_hook is None and not Reverse._record_ops
+    #nothing is counted while disabled
+    Profiler.reset()
+    AutoDiff.sin(AutoDiff.rAD(1.0))*2
+    assert Profiler.stats() == []
+
+#Test the exports of the counters
+def test_profile_exports():
+    with Profiler.profiling():
+        AutoDiff.sqrt(AutoDiff.fAD(4.0))
+    rows = json.loads(Profiler.to_json())
+    assert rows[0]['name'] == 'fAD.sqrt' and rows[0]['calls'] == 1
+    text = Profiler.table()
+    assert 'fAD.sqrt' in text and 'forward' in text
+    Profiler.reset()
+    assert Profiler.stats() == []
@@ -0,0 +1,125 @@
+#test_Server.py
+#
+#This test suite is associated with file 'Server.py', which
+#evaluates functions for concurrent requests in batches.
+
+import os
+import asyncio
+import tempfile
+import pytest
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from Bambanta import AutoDiff, Server
+
+def f(x, y):
+    return [x*AutoDiff.exp(y), AutoDiff.sin(x) - y**2]
+
+def g(x):
+    # fails for negative inputs
+    if np.any(np.reshape(getattr(x, 'val', x), -1) < 0):
+        raise ArithmeticError('negative input')
+    return AutoDiff.sqrt(x)
+
+POINTS = [[0.5, 1.0], [1.0, -2.0], [2.0, 0.0], [-1.0, 0.5]]
+
+#Test whether concurrent requests are evaluated in one batch, with the results of jacobian()
+def test_server_batches():
+    server = Server.Server({'f': f}, window=0.01)
+    async def clients():
+        return await asyncio.gather(*[server.evaluate('f', x) for x in POINTS])
+    results = asyncio.run(clients())
+    assert server.stats == {'requests': 4, 'batches': 1, 'errors': 0}
+    for (v, j), x in zip(results, POINTS):
+        v0, j0 = AutoDiff.jacobian(f, x)
+        assert_array_almost_equal(v, v0)
+        assert_array_almost_equal(j, j0)
+    #max_batch splits batches, and values only are batched apart from Jacobians
+    server = Server.Server({'f': f}, window=0.01, max_batch=3)
+    async def mixed():
+        return await asyncio.gather(*[server.evaluate('f', x) for x in POINTS],
+                                    *[server.evaluate('f', x, grad=False) for x in POINTS])
+    results = asyncio.run(mixed())
+    assert server.stats['batches'] == 4
+    for v, x in zip(results[4:], POINTS):
+        assert_array_almost_equal(v, AutoDiff.jacobian(f, x)[0])
+
+#Test whether a failing point only fails its own request
+def test_server_errors():
+    server = Server.Server({'g': g}, window=0.01)
+    async def clients():
+        return await asyncio.gather(*[server.evaluate('g', [x]) for x in [4.0, -1.0, 9.0]],
+                                    return_exceptions=True)
+    results = asyncio.run(clients())
+    assert isinstance(results[1], ArithmeticError)
+    assert_array_almost_equal(results[0][1], [[0.25]])
+    assert_array_almost_equal(results[2][0], [3.0])
+    assert server.stats['errors'] == 1
+    with pytest.raises(ValueError):
+        asyncio.run(server.evaluate('h', [1.0]))
+
+#Test whether functions reducing over their inputs, or registered as not elementwise, get per-point results
+def test_server_reductions():
+    lse = lambda x, y: AutoDiff.logsumexp(AutoDiff.concatenate([x, y]))
+    server = Server.Server({'lse': lse}, window=0.01)
+    server.register('mixed', lambda x: x*AutoDiff.sum(x), elementwise=False)
+    points = [[0.0, 0.0], [5.0, 0.0], [1.0, -2.0]]
+    async def clients():
+        return await asyncio.gather(*[server.evaluate('lse', x) for x in points],
+                                    *[server.evaluate('lse', x, grad=False) for x in points],
+                                    *[server.evaluate('mixed', [x]) for x in [2.0, 3.0]])
+    results = asyncio.run(clients())
+    for (v, j), value, x in zip(results[:3], results[3:6], points):
+        v0, j0 = AutoDiff.jacobian(lse, x)
+        assert_array_almost_equal(v, v0)
+        assert_array_almost_equal(j, j0)
+        assert_array_almost_equal(value, v0)
+    assert_array_almost_equal(results[6][1], [[4.0]])
+    assert_array_almost_equal(results[7][0], [9.0])
+    assert server.stats['errors'] == 0
+    with pytest.raises(ValueError):
+        AutoDiff.batch_jacobian(lse, points)
+
+#Test requests from clients over TCP, including errors
+def test_client_tcp():
+    async def main():
+        server = Server.Server({'f': f, 'g': g}, window=0.01)
+        async with await server.start():
+            host, port = server.address()
+            async with Server.Client(host, port) as a, Server.Client(host, port) as b:
+                results = await asyncio.gather(*[c.evaluate('f', x) for c in (a, b) for x in POINTS])
+                value = await a.evaluate('f', POINTS[0], grad=False)
+                with pytest.raises(RuntimeError, match='negative input'):
+                    await b.evaluate('g', [-1.0])
+                with pytest.raises(RuntimeError, match='No function'):
+                    await b.evaluate('h', [1.0])
+                assert await b.evaluate('g', [4.0]) == ([2.0], [[0.25]])
+        return server, results, value
+    server, results, value = asyncio.run(main())
+    assert server.stats['batches'] < len(results)
+    for (v, j), x in zip(results, POINTS*2):
+        v0, j0 = AutoDiff.jacobian(f, x)
+        assert_array_almost_equal(v, v0)
+        assert_array_almost_equal(j, j0)
+    assert_array_almost_equal(value, results[0][0])
+
+#Test requests over a Unix socket, and malformed requests
+@pytest.mark.skipif(not hasattr(asyncio, 'start_unix_server'), reason='no Unix sockets')
+def test_client_unix():
+    async def main(path):
+        server = Server.Server({'f': f}, window=0)
+        async with await server.start(path=path):
+            assert server.address() == path
+            async with Server.Client(path=path) as client:
+                v, j = await client.evaluate('f', [1.0, 0.0])
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'not json\n{"id": 7, "x": [1.0]}\n')
+            responses = [await reader.readline() for _ in range(2)]
+            writer.close()
+        return v, j, responses
+    with tempfile.TemporaryDirectory() as d:
+        v, j, responses = asyncio.run(main(os.path.join(d, 'server.sock')))
+    assert_array_almost_equal(v, [1.0, np.sin(1.0)])
+    assert_array_almost_equal(j, [[1.0, 1.0], [np.cos(1.0), 0.0]])
+    assert all(b'"error"' in r for r in responses)
+    assert any(b'"id": 7' in r for r in responses)
@@ -0,0 +1,188 @@
+#test_Solvers.py
+#
+#This test suite is associated with file 'Solvers.py', which
+#implements solvers driven by automatic differentiation.
+
+import pytest
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from Bambanta import AutoDiff, Solvers
+
+def circle(x, y):
+    return [x*x + y*y - 4, AutoDiff.exp(x - y) - 1]
+
+#Test whether every Newton variant converges to the root
+def test_newton_methods():
+    reports = {}
+    for method in Solvers.METHODS:
+        x, report = Solvers.newton_solve(circle, [1.0, 2.0], method = method)
+        assert report['converged']
+        assert report['residual'] <= 1e-10
+        assert_array_almost_equal(x, [np.sqrt(2), np.sqrt(2)], decimal = 10)
+        reports[method] = report
+    #newton differentiates once per iteration, the others reuse Jacobians
+    assert reports['newton']['jacobians'] == reports['newton']['iterations']
+    assert reports['chord']['jacobians'] < reports['newton']['jacobians']
+    assert reports['broyden']['jacobians'] < reports['newton']['jacobians']
+    for report in reports.values():
+        assert report['factorizations'] == report['jacobians']
+
+#Test whether the reported counts account for every evaluation of the function
+def test_newton_counts():
+    calls = []
+    def counted(x, y):
+        calls.append(1)
+        return circle(x, y)
+    for method in Solvers.METHODS:
+        del calls[:]
+        x, report = Solvers.newton_solve(counted, [1.0, 2.0], method = method, mode = 'forward')
+        assert len(calls) == report['evaluations'] + report['jacobians']
+
+#Test a larger system in every differentiation mode
+def test_newton_modes():
+    n = 6
+    target = np.linspace(0.5, 1.5, n)
+    def f(*x):
+        return [x[i]**3 + 0.1*x[(i+1) % n] - target[i]**3 - 0.1*target[(i+1) % n] for i in range(n)]
+    for mode in ['forward', 'reverse']:
+        x, report = Solvers.newton_solve(f, np.ones(n), method = 'chord', mode = mode)
+        assert report['converged']
+        assert_array_almost_equal(x, target)
+
+#Test the reports of failures and the checks of arguments
+def test_newton_failures():
+    x, report = Solvers.newton_solve(circle, [1.0, 2.0], maxiter = 1)
+    assert not report['converged'] and report['iterations'] == 1
+    # no real root
+    x, report = Solvers.newton_solve(lambda x: [x*x + 1], [0.5], maxiter = 20)
+    assert not report['converged']
+    with pytest.raises(ValueError):
+        Solvers.newton_solve(circle, [1.0, 2.0], method = 'secant')
+    with pytest.raises(ValueError):
+        Solvers.newton_solve(lambda x, y: [x + y], [1.0, 2.0])
+
+def rosenbrock(x):
+    n = len(x.val)
+    head, tail = np.eye(n)[:-1], np.eye(n)[1:]
+    xh = AutoDiff.matmul(head, x)
+    return AutoDiff.sum(100*(AutoDiff.matmul(tail, x) - xh**2)**2 + (1 - xh)**2)
+
+#Test whether L-BFGS finds the minimum of the Rosenbrock function
+def test_lbfgs_rosenbrock():
+    x, report = Solvers.lbfgs(rosenbrock, np.full(10, -1.0), tol = 1e-8, maxiter = 2000)
+    assert report['converged']
+    assert_array_almost_equal(x, np.ones(10), decimal = 6)
+    assert report['gradient'] <= 1e-8
+    assert report['evaluations'] >= report['iterations']
+
+#Test a large separable problem with a short history
+def test_lbfgs_large():
+    n = 20000
+    c = np.linspace(-1.0, 1.0, n)
+    def f(x):
+        return AutoDiff.sum(AutoDiff.exp(x - c) - x + (x - c)**2)
+    x, report = Solvers.lbfgs(f, np.zeros(n), m = 3)
+    assert report['converged']
+    assert_array_almost_equal(x, c, decimal = 5)
+
+#Test the iteration limit and constant functions
+def test_lbfgs_limits():
+    x, report = Solvers.lbfgs(rosenbrock, np.zeros(4), maxiter = 3)
+    assert not report['converged'] and report['iterations'] == 3
+    x, report = Solvers.lbfgs(lambda x: 2.0, [1.0, 2.0])
+    assert report['converged'] and report['value'] == 2.0
+
+def cubic_root(p):
+    x, report = Solvers.newton_solve(lambda x: [x**3 + p[0]*x - p[1]], [1.0], tol = 1e-14)
+    return x
+
+def cubic(x, p):
+    a, b = AutoDiff.einsum('i,i->', [1.0, 0.0], p), AutoDiff.einsum('i,i->', [0.0, 1.0], p)
+    return x**3 + a*x - b
+
+#Test implicit derivatives of a root against the closed form, in both modes
+def test_implicit_root():
+    x_of = Solvers.implicit(cubic_root, cubic)
+    p0 = np.array([2.0, 3.0])
+    x0 = x_of(p0)
+    assert_array_almost_equal(x0**3 + 2*x0 - 3, [0.0])
+    # dx/da = -x/(3x^2 + a), dx/db = 1/(3x^2 + a)
+    expected = np.array([-x0[0], 1.0])/(3*x0[0]**2 + 2)
+    y = x_of(AutoDiff.fAD(p0, np.eye(2)))
+    assert_array_almost_equal(y.val, x0)
+    assert_array_almost_equal(y.der, [expected])
+    p = AutoDiff.rAD(p0)
+    y = x_of(p)
+    y.outer()
+    assert_array_almost_equal(p.grad(), expected)
+
+#Test whether the graph of a fixed-point iteration does not grow with its iterations
+def test_implicit_fixed_point():
+    def iterate(p, steps):
+        x = 0.0
+        for _ in range(steps):
+            x = AutoDiff.cos(p*x)
+        return x
+    x_of = Solvers.implicit(lambda p: iterate(p[0], 200), lambda x, p: x - AutoDiff.cos(p*x))
+    p = AutoDiff.rAD(0.8)
+    f = AutoDiff.exp(x_of(p))
+    f.outer()
+    assert len(p.children) == 1
+    unrolled = AutoDiff.rAD(0.8)
+    g = AutoDiff.exp(iterate(unrolled, 200))
+    g.outer()
+    assert_array_almost_equal(f.val, g.val)
+    assert_array_almost_equal(p.grad(), unrolled.grad())
+
+def decay(t, y):
+    return lambda a, b, c: a*AutoDiff.exp(-b*t) + c - y
+
+#Test whether both least-squares methods fit a model, with vector and scalar residuals
+def test_least_squares_fit():
+    t = np.linspace(0.0, 5.0, 40)
+    y = 3.0*np.exp(-0.7*t) + 0.5
+    for method in Solvers.LSQ_METHODS:
+        x, report = Solvers.least_squares(decay(t, y), [1.0, 1.0, 0.0], method = method)
+        assert report['converged']
+        assert report['residual'] <= 1e-8
+        assert_array_almost_equal(x, [3.0, 0.7, 0.5], decimal = 8)
+        assert report['jacobians'] <= report['iterations'] + 1
+        assert report['factorizations'] == report['iterations']
+        assert report['evaluations'] > report['iterations']
+    #the Rosenbrock function as a sum of squares, one residual at a time
+    x, report = Solvers.least_squares(lambda x, y: [10*(y - x*x), 1 - x], [-1.2, 1.0])
+    assert report['converged']
+    assert_array_almost_equal(x, [1.0, 1.0])
+
+#Test a fit with nonzero residuals against the linear least-squares solution, in chunks
+def test_least_squares_linear():
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((30, 5))
+    b = rng.standard_normal(30)
+    expected = np.linalg.lstsq(A, b, rcond = None)[0]
+    def f(*x):
+        return [sum(A[i, j]*x[j] for j in range(5)) - b[i] for i in range(30)]
+    costs = dict(AutoDiff.COSTS)
+    try:
+        for width in [1, 2, 1024]:
+            AutoDiff.COSTS['max_width'] = width
+            for method in Solvers.LSQ_METHODS:
+                x, report = Solvers.least_squares(f, np.zeros(5), method = method)
+                assert report['converged']
+                assert_array_almost_equal(x, expected)
+                assert report['residual'] == pytest.approx(np.linalg.norm(A @ expected - b))
+    finally:
+        AutoDiff.COSTS.update(costs)
+
+#Test the iteration limit, constant residuals and the checks of arguments
+def test_least_squares_limits():
+    t = np.linspace(0.0, 5.0, 40)
+    x, report = Solvers.least_squares(decay(t, 3.0*np.exp(-0.7*t)), [1.0, 1.0, 0.0], maxiter = 1)
+    assert not report['converged'] and report['iterations'] == 1
+    x, report = Solvers.least_squares(lambda x, y: [x - 1, 2.0], [0.0, 5.0])
+    assert report['converged']
+    assert_array_almost_equal(x, [1.0, 5.0])
+    assert report['residual'] == pytest.approx(2.0)
+    with pytest.raises(ValueError):
+        Solvers.least_squares(lambda x: [x], [1.0], method = 'dogleg')
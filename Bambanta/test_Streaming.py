@@ -0,0 +1,113 @@
+#test_Streaming.py
+#
+#This test suite is associated with file 'Streaming.py', which
+#evaluates losses summed over datasets one chunk of rows at a time.
+
+import gc
+import tracemalloc
+import pytest
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from Bambanta import AutoDiff, Streaming
+
+def logistic_loss(w, b, X, y):
+    z = X @ w + b
+    return np.sum(AutoDiff.softplus(z) - y*z)
+
+def dataset(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, 3))
+    y = (X @ [1.0, -2.0, 0.5] + rng.standard_normal(rows) > 0).astype(np.float64)
+    return X, y
+
+#Test whether streamed values and gradients match those over the whole dataset
+def test_value_and_grad(tmpdir):
+    X, y = dataset(1003)
+    params = [[0.1, -0.2, 0.3], 0.5]
+    w, b = AutoDiff.rAD(params[0]), AutoDiff.rAD(params[1])
+    f = logistic_loss(w, b, X, y)
+    f.outer()
+    np.save(str(tmpdir.join('X.npy')), X)
+    np.save(str(tmpdir.join('y.npy')), y)
+    for data in [(X, y), [str(tmpdir.join('X.npy')), str(tmpdir.join('y.npy'))]]:
+        for chunk in [1, 100, 5000]:
+            value, (gw, gb) = Streaming.value_and_grad(logistic_loss, params, data, chunk=chunk)
+            assert value == pytest.approx(f.get_val())
+            assert_array_almost_equal(gw, w.get_grad())
+            assert gb == pytest.approx(np.sum(b.get_grad()))
+            assert Streaming.value(logistic_loss, params, data, chunk=chunk) == pytest.approx(value)
+
+#Test whether peak memory depends on the chunk size, not on the size of the dataset
+def test_peak_memory(tmpdir):
+    peaks = []
+    for rows in [20000, 200000]:
+        X, y = dataset(rows)
+        np.save(str(tmpdir.join('X.npy')), X)
+        np.save(str(tmpdir.join('y.npy')), y)
+        del X, y
+        gc.collect()
+        tracemalloc.start()
+        Streaming.value_and_grad(logistic_loss, [[0.0]*3, 0.0],
+                                 [str(tmpdir.join('X.npy')), str(tmpdir.join('y.npy'))], chunk=1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    #the larger dataset alone takes 6.4 MB
+    assert peaks[1] < 1.5*peaks[0] + 100000
+    assert peaks[1] < 1000000
+
+#Test the chunks of a dataset, and invalid datasets and losses
+def test_chunks():
+    X, y = dataset(10)
+    parts = list(Streaming.chunks((X, y), 4))
+    assert [len(p[0]) for p in parts] == [4, 4, 2]
+    assert np.array_equal(np.concatenate([p[1] for p in parts]), y)
+    with pytest.raises(ValueError):
+        list(Streaming.chunks((X, y[:5]), 4))
+    with pytest.raises(ValueError):
+        list(Streaming.chunks(X, 0))
+    with pytest.raises(ValueError):
+        Streaming.value_and_grad(lambda w, X: X @ w, [[1.0, 1.0, 1.0]], X, chunk=4)
+
+#Test whether the accumulator sums terms as a single graph of the whole sum would
+def test_grad_accumulator():
+    X, y = dataset(50)
+    params = [[0.1, -0.2, 0.3], 0.5]
+    w, b = AutoDiff.rAD(params[0]), AutoDiff.rAD(params[1])
+    f = logistic_loss(w, b, X, y)
+    f.outer()
+    acc = Streaming.GradAccumulator(params)
+    for row in range(50):
+        acc.add(logistic_loss, X[row:row+1], y[row:row+1])
+    acc.add(lambda w, b: 0.0)
+    assert acc.terms == 51
+    assert acc.value == pytest.approx(f.get_val())
+    gw, gb = acc.grad()
+    assert_array_almost_equal(gw, w.get_grad())
+    assert gb == pytest.approx(np.sum(b.get_grad()))
+    #the gradient returned is not changed by later terms
+    acc.add(logistic_loss, X[:1], y[:1])
+    assert gb == pytest.approx(np.sum(b.get_grad()))
+    acc.reset([[0.0]*3, 0.0])
+    assert acc.value == 0.0 and acc.terms == 0
+    assert acc.add(lambda w, b: np.sum(w) + b) == 0.0
+    assert_array_almost_equal(acc.grad()[0], [1.0, 1.0, 1.0])
+    with pytest.raises(ValueError):
+        acc.add(lambda w, b: w)
+    assert acc.terms == 1
+
+#Test whether the peak memory of the accumulator depends on the largest term, not on the number of terms
+def test_grad_accumulator_memory():
+    def residual(a, b, t, y):
+        return (a*AutoDiff.exp(-b*t) - y)**2
+    peaks = []
+    for terms in [200, 2000]:
+        gc.collect()
+        tracemalloc.start()
+        acc = Streaming.GradAccumulator([1.0, 0.5])
+        for t in np.linspace(0.0, 5.0, terms):
+            acc.add(residual, t, np.exp(-t/2))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert_array_almost_equal(acc.grad(), [0.0, 0.0])
+    assert peaks[1] < 1.5*peaks[0] + 20000
@@ -0,0 +1,156 @@
+#test_Tape.py
+#
+#This test suite is associated with file 'Tape.py', which
+#records reverse-mode graphs into replayable, memory-mappable tapes.
+
+import gc
+import weakref
+import pytest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_array_almost_equal
+
+from Bambanta import AutoDiff, Reverse, Tape
+
+def f1(x, y, z):
+    return 2*x + y**3 + AutoDiff.cos(z) - x/y
+
+def f2(x, y, z):
+    return AutoDiff.log(x*y, 2) + 2**z - abs(-x) + AutoDiff.sqrt(z)
+
+def f3(x, y, z):
+    return AutoDiff.logistic(x)*AutoDiff.tanh(y) + AutoDiff.exp(z)**y
+
+def vector_f(x, y, z):
+    return [f1(x, y, z), f2(x, y, z), f3(x, y, z)]
+
+#Test whether operations are recorded on rAD objects while tracing only
+def test_rAD_op():
+    x, y = AutoDiff.create_r([1.0, 2.0])
+    assert AutoDiff.sin(x*y).op is None
+    with Reverse._recording():
+        z = AutoDiff.sin(x*y)
+    assert x.op is None
+    assert z.op[0] == 'sin'
+    assert z.op[1][0].op == ('mul', (x, y))
+
+#Test whether graphs are freed by reference counting alone, after tracing as well
+def test_graphs_acyclic():
+    gc.disable()
+    try:
+        x = AutoDiff.rAD([1.0, 2.0])
+        f = AutoDiff.sin(x)*x + x**2
+        node = weakref.ref(f)
+        f.outer()
+        x.grad()
+        del x, f
+        assert node() is None
+        alive = lambda: sum(isinstance(obj, AutoDiff.rAD) for obj in gc.get_objects())
+        before = alive()
+        Tape.record(f1, [1.0, 2.0, 3.0])
+        assert alive() == before
+    finally:
+        gc.enable()
+
+#Test whether a replayed tape matches stack_r at points other than the traced one
+def test_tape_gradient():
+    t = Tape.record(vector_f, [1.0, 2.0, 3.0])
+    assert t.n_inputs == 3
+    assert len(t.outputs) == 3
+    for vals in [[1.0, 2.0, 3.0], [0.5, 1.5, 0.25]]:
+        v, j = AutoDiff.stack_r(vals, [f1, f2, f3])
+        tv, tj = t.gradient(vals)
+        assert_array_almost_equal(tv, v)
+        assert_array_almost_equal(tj, j)
+        assert_array_almost_equal(t.values(vals), v)
+
+#Test whether tapes replay vector-valued inputs element by element
+def test_tape_vector_inputs():
+    t = Tape.record(f1, [1.0, 2.0, 3.0])
+    a, b, c = AutoDiff.create_r([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    f = f1(a, b, c)
+    f.outer()
+    v, j = t.gradient([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    assert_array_almost_equal(v[0], f.get_val())
+    assert_array_almost_equal(j[0][0], a.get_grad())
+    assert_array_almost_equal(j[0][2], c.get_grad())
+
+#Test whether saved tapes load back, memory-mapped or not
+def test_tape_save_load(tmpdir):
+    t = Tape.record(vector_f, [1.0, 2.0, 3.0])
+    path = str(tmpdir.join('f.tape'))
+    t.save(path)
+    with open(path, 'rb') as fh:
+        assert fh.read() == t.tobytes()
+    for mmap in [True, False]:
+        loaded = Tape.load(path, mmap=mmap)
+        assert_array_equal(loaded.opcodes, t.opcodes)
+        assert_array_equal(loaded.args, t.args)
+        assert_array_equal(loaded.consts, t.consts)
+        assert_array_equal(loaded.outputs, t.outputs)
+        v, j = loaded.gradient([0.5, 1.5, 0.25])
+        tv, tj = t.gradient([0.5, 1.5, 0.25])
+        assert_array_equal(v, tv)
+        assert_array_equal(j, tj)
+    #memory-mapped tapes are read-only views on the file
+    assert not Tape.load(path).args.flags.writeable
+    with open(path, 'wb') as fh:
+        fh.write(b'not a tape')
+    with pytest.raises(ValueError):
+        Tape.load(path)
+
+#Test whether unsupported graphs are rejected
+def test_tape_errors():
+    w = AutoDiff.rAD(2.0)
+    with pytest.raises(ValueError):
+        Tape.record(lambda x: x*w, [1.0])
+    with pytest.raises(TypeError):
+        Tape.record(lambda x: x + np.array([1.0, 2.0]), [[1.0, 2.0]])
+    square = AutoDiff.Primitive('square', lambda x: x*x, lambda y, x: 2*x)
+    with pytest.raises(ValueError):
+        Tape.record(lambda x: square(x), [1.0])
+    t = Tape.record(lambda x, y: x*y, [1.0, 2.0])
+    with pytest.raises(ValueError):
+        t.forward([1.0])
+
+def chain_f(*xs):
+    # every output depends on two neighbouring inputs only
+    return [AutoDiff.sin(xs[i]*xs[i-1]) + AutoDiff.exp(xs[i]/4)*xs[i] for i in range(len(xs))]
+
+#Test whether incremental updates give exactly the values and Jacobian of a full replay
+def test_incremental():
+    t = Tape.record(vector_f, [1.0, 2.0, 3.0])
+    inc = Tape.incremental(t, [1.0, 2.0, 3.0])
+    vals = [1.0, 2.0, 3.0]
+    for changes in [{2: 0.25}, {0: 0.5, 1: 1.5}, {}, {1: 1.5}]:
+        inc.update(changes)
+        for pos, val in changes.items():
+            vals[pos] = val
+        v, j = t.gradient(vals)
+        iv, ij = inc.gradient()
+        assert_array_equal(iv, v)
+        assert_array_equal(ij, j)
+        assert_array_equal(inc.values(), t.values(vals))
+    assert inc.recomputed < len(t)
+    with pytest.raises(ValueError):
+        inc.update({3: 1.0})
+
+#Test whether an update only recomputes the nodes downstream of the changed inputs
+def test_incremental_affected():
+    vals = np.linspace(0.1, 2.0, 50).tolist()
+    t = Tape.record(chain_f, vals)
+    inc = Tape.incremental(t, vals)
+    assert inc.update({10: 1.0}) == inc.recomputed
+    #the input, its products with both neighbours, and the nodes after them in two outputs
+    assert inc.recomputed < 20
+    vals[10] = 1.0
+    assert_array_equal(inc.gradient()[1], t.gradient(vals)[1])
+    #inputs that no output uses change nothing
+    t = Tape.record(lambda x, y, z: x*z, [1.0, 2.0, 3.0])
+    inc = Tape.incremental(t, [1.0, 2.0, 3.0])
+    assert inc.update({1: 5.0}) == 0
+    assert_array_equal(inc.gradient()[1], t.gradient([1.0, 5.0, 3.0])[1])
+    #vector-valued inputs
+    inc = Tape.incremental(t, [[1.0, 2.0], [0.0, 0.0], [3.0, 4.0]])
+    inc.update({0: [5.0, 6.0]})
+    assert_array_equal(inc.values()[0], [15.0, 24.0])
+    assert_array_equal(inc.gradient()[1][0][2], [5.0, 6.0])
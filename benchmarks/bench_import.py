@@ -0,0 +1,80 @@
+'''
+Import time of Bambanta and of the first use of each part of AutoDiff, checked against a budget.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5] [--json] [--budget CASE=MS ...]
+
+Every case runs in a fresh interpreter, and the best of --repeat runs is reported in milliseconds.
+The exit status is 1 if a case with a budget went over it.
+'''
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CASES = {
+    'import Bambanta': 'import Bambanta',
+    'import AutoDiff': 'from Bambanta import AutoDiff',
+    'first fAD': 'from Bambanta import AutoDiff; AutoDiff.fAD',
+    'first rAD': 'from Bambanta import AutoDiff; AutoDiff.rAD',
+    'first elemental': 'from Bambanta import AutoDiff; AutoDiff.sin',
+    'first jacobian': 'from Bambanta import AutoDiff; AutoDiff.jacobian',
+    'import Solvers': 'from Bambanta import Solvers',
+    'import Tape': 'from Bambanta import Tape',
+    'numpy alone': 'import numpy',
+}
+
+# milliseconds; importing the package and the AutoDiff names must not load numpy or any submodule
+BUDGETS = {
+    'import Bambanta': 20.0,
+    'import AutoDiff': 20.0,
+}
+
+TIMER = '''
+import time
+start = time.perf_counter()
+{}
+print(time.perf_counter() - start)
+'''
+
+def measure(statement, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', TIMER.format(statement)], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout
+        best = min(best, float(out)*1000)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--budget', nargs='*', default=[], metavar='CASE=MS',
+                        help='override or add budgets, in milliseconds')
+    args = parser.parse_args()
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        case, ms = item.rsplit('=', 1)
+        budgets[case] = float(ms)
+
+    results = []
+    for case, statement in CASES.items():
+        ms = measure(statement, args.repeat)
+        budget = budgets.get(case)
+        results.append({'case': case, 'ms': ms, 'budget_ms': budget,
+                        'over': budget is not None and ms > budget})
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('{:<18}{:>10}{:>10}'.format('case', 'ms', 'budget'))
+        for r in results:
+            budget = '' if r['budget_ms'] is None else '{:.1f}'.format(r['budget_ms'])
+            print('{:<18}{:>10.2f}{:>10}{}'.format(r['case'], r['ms'], budget, '  OVER' if r['over'] else ''))
+    if any(r['over'] for r in results):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
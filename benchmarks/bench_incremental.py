@@ -0,0 +1,87 @@
+'''
+Full tape replays against incremental updates when one input changes at a time.
+
+Usage:
+    python benchmarks/bench_incremental.py [--inputs 100 300] [--depth 3] [--steps 20] [--json]
+
+Each case records a tape with one output per input, every output a chain of
+elementals over a few neighbouring inputs, then changes one input per step as
+coordinate descent does. Every step is evaluated by a full Tape replay and by
+an IncrementalTape update, for values alone and for the Jacobian. The results
+are checked to be bit-for-bit equal.
+'''
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff, Tape
+
+def chains(depth):
+    def f(*xs):
+        out = []
+        for i in range(len(xs)):
+            y = xs[i]
+            for j in range(1, depth + 1):
+                y = AutoDiff.sin(y*xs[i-j] + 1) + AutoDiff.exp(-y**2)
+            out.append(y)
+        return out
+    return f
+
+def sweep(evaluate, vals, steps):
+    '''
+    Time evaluate(vals, position) for one changed input per step, and return the seconds and last result.
+    '''
+    vals = list(vals)
+    start = time.perf_counter()
+    for k in range(steps):
+        pos = (k*7) % len(vals)
+        vals[pos] = vals[pos] + 0.1
+        out = evaluate(vals, pos)
+    return time.perf_counter() - start, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--inputs', type=int, nargs='*', default=[100, 300])
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for n in args.inputs:
+        vals = np.linspace(0.1, 2.0, n).tolist()
+        tape = Tape.record(chains(args.depth), vals)
+        row = {'inputs': n, 'nodes': len(tape)}
+        for name, full, partial in [
+                ('values', tape.values, lambda t: t.values()),
+                ('gradient', tape.gradient, lambda t: t.gradient())]:
+            inc = Tape.incremental(tape, vals)
+            def update(vals, pos):
+                inc.update({pos: vals[pos]})
+                return partial(inc)
+            full_s, expected = sweep(lambda vals, pos: full(vals), vals, args.steps)
+            inc_s, got = sweep(update, vals, args.steps)
+            for a, b in zip(np.atleast_1d(got) if name == 'values' else got,
+                            np.atleast_1d(expected) if name == 'values' else expected):
+                if np.asarray(a).tobytes() != np.asarray(b).tobytes():
+                    raise AssertionError('incremental update differs from a full replay')
+            row.update({name + '_full_s': full_s, name + '_incremental_s': inc_s, name + '_speedup': full_s/inc_s})
+        row['recomputed'] = inc.recomputed
+        results.append(row)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('{:>8}{:>10}{:>12}{:>14}{:>14}{:>10}{:>14}{:>14}{:>10}'.format(
+        'inputs', 'nodes', 'recomputed', 'values (s)', 'inc (s)', 'speedup', 'gradient (s)', 'inc (s)', 'speedup'))
+    for r in results:
+        print(('{inputs:>8}{nodes:>10}{recomputed:>12}{values_full_s:>14.6f}{values_incremental_s:>14.6f}'
+               '{values_speedup:>10.1f}{gradient_full_s:>14.6f}{gradient_incremental_s:>14.6f}'
+               '{gradient_speedup:>10.1f}').format(**r))
+
+if __name__ == '__main__':
+    main()
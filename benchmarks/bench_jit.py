@@ -0,0 +1,73 @@
+'''
+Tape replay by the NumPy interpreter against compiled replay by Bambanta.Jit.
+
+Usage:
+    python benchmarks/bench_jit.py [--inputs 10 100] [--depth 5] [--repeat 5] [--json]
+
+Each case records a tape with one output per input, every output a chain of
+elementals and arithmetic over several inputs, and reports the best time of a
+gradient() replay by each backend. The results are checked to be bit-for-bit equal.
+'''
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff, Tape, Jit
+
+def chains(depth):
+    def f(*xs):
+        out = []
+        for i in range(len(xs)):
+            y = xs[i]
+            for j in range(1, depth + 1):
+                y = AutoDiff.sin(y*xs[(i+j) % len(xs)] + 1) - y/(xs[i-j]**2 + 1)
+            out.append(y)
+        return out
+    return f
+
+def best(function, vals, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(vals)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--inputs', type=int, nargs='*', default=[10, 100])
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for n in args.inputs:
+        vals = np.linspace(0.1, 2.0, n).tolist()
+        tape = Tape.record(chains(args.depth), vals)
+        jitted = Jit.jit(tape)
+        start = time.perf_counter()
+        jitted.gradient(vals)
+        first = time.perf_counter() - start
+        for got, expected in zip(jitted.gradient(vals), tape.gradient(vals)):
+            if got.tobytes() != expected.tobytes():
+                raise AssertionError('compiled replay differs from the interpreter')
+        interpreted = best(tape.gradient, vals, args.repeat)
+        compiled = best(jitted.gradient, vals, args.repeat)
+        results.append({'inputs': n, 'nodes': len(tape), 'backend': jitted.backend, 'first_s': first,
+                        'interpreter_s': interpreted, 'jit_s': compiled, 'speedup': interpreted/compiled})
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('{:>8}{:>10}{:>10}{:>14}{:>14}{:>14}{:>10}'.format(
+        'inputs', 'nodes', 'backend', 'first (s)', 'interp (s)', 'jit (s)', 'speedup'))
+    for r in results:
+        print('{inputs:>8}{nodes:>10}{backend:>10}{first_s:>14.6f}{interpreter_s:>14.6f}{jit_s:>14.6f}{speedup:>10.1f}'.format(**r))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+'''
+Peak memory of building and sweeping representative reverse-mode graphs, traced by tracemalloc.
+
+Usage:
+    python benchmarks/bench_memory.py [--size 1000] [--json]
+
+For every graph, the peak traced bytes of building it and running the backward sweep are
+reported next to what Bambanta.Memory.graph_stats() accounts for. The leak cases rebuild a
+graph on the same inputs, with and without reset_der(), and report the growth of the
+reverse-mode objects alive in the process.
+'''
+import os
+import sys
+import gc
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff, Memory
+
+# rAD.grad() recurses once per node, and a level of the chain adds three nodes, so 100 levels
+# stay well within Python's default recursion limit (also with the Profiler's edge hook)
+MAX_DEPTH = 100
+
+def _tree_sum(xs):
+    while len(xs) > 1:
+        xs = [xs[i] + xs[i+1] if i + 1 < len(xs) else xs[i] for i in range(0, len(xs), 2)]
+    return xs[0]
+
+def scalar_chain(n):
+    x = AutoDiff.rAD(0.5)
+    f = x
+    for _ in range(min(n, MAX_DEPTH)):
+        f = AutoDiff.sin(f)*0.5 + x
+    return [x], f
+
+def vector_elementwise(n):
+    x = AutoDiff.rAD(np.linspace(0.1, 1.0, n))
+    f = AutoDiff.sum(AutoDiff.exp(x)*AutoDiff.sin(x) - x**2)
+    return [x], f
+
+def linear_layer(n):
+    x = AutoDiff.rAD(np.linspace(0.1, 1.0, n))
+    weights = np.random.default_rng(0).standard_normal((n, n))/n
+    f = AutoDiff.sum(AutoDiff.tanh(AutoDiff.matmul(weights, x)))
+    return [x], f
+
+def scalar_variables(n):
+    xs = AutoDiff.create_r(np.linspace(0.1, 1.0, n))
+    return xs, _tree_sum([AutoDiff.sin(x)*x for x in xs])
+
+GRAPHS = {
+    'scalar_chain': scalar_chain,
+    'vector_elementwise': vector_elementwise,
+    'linear_layer': linear_layer,
+    'scalar_variables': scalar_variables,
+}
+
+def traced(build, n):
+    '''
+    Peak traced bytes of building a graph and sweeping it, with its accounted size.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    inputs, f = build(n)
+    f.outer()
+    for x in inputs:
+        x.grad()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = Memory.graph_stats(f)
+    return {'graph': build.__name__, 'size': n, 'peak_bytes': peak, 'retained_bytes': current,
+            'nodes': stats['nodes'], 'edges': stats['edges'], 'accounted_bytes': stats['total_bytes']}
+
+def leak(n, rounds, reset):
+    '''
+    Growth of the graphs alive in the process when a graph is rebuilt on the same inputs.
+    '''
+    gc.collect()
+    before = Memory.process_stats()
+    xs = AutoDiff.create_r(np.linspace(0.1, 1.0, n))
+    for _ in range(rounds):
+        f = _tree_sum([AutoDiff.sin(x)*x for x in xs])
+        f.outer()
+        [x.grad() for x in xs]
+        if reset:
+            AutoDiff.reset_der(xs)
+    del f
+    gc.collect()
+    after = Memory.process_stats()
+    return {'graph': 'rebuilt_with_reset' if reset else 'rebuilt_without_reset', 'size': n, 'rounds': rounds,
+            'nodes_growth': after['nodes'] - before['nodes'],
+            'bytes_growth': after['total_bytes'] - before['total_bytes']}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    graphs = [traced(build, args.size) for build in GRAPHS.values()]
+    leaks = [leak(args.size, args.rounds, reset) for reset in (False, True)]
+    if args.json:
+        print(json.dumps({'graphs': graphs, 'leaks': leaks}, indent=2))
+        return
+    print('{:<20}{:>8}{:>10}{:>10}{:>14}{:>14}{:>14}'.format(
+        'graph', 'size', 'nodes', 'edges', 'accounted', 'peak', 'retained'))
+    for r in graphs:
+        print('{graph:<20}{size:>8}{nodes:>10}{edges:>10}{accounted_bytes:>14}{peak_bytes:>14}{retained_bytes:>14}'.format(**r))
+    print()
+    print('{:<24}{:>8}{:>8}{:>14}{:>14}'.format('graph', 'size', 'rounds', 'nodes growth', 'bytes growth'))
+    for r in leaks:
+        print('{graph:<24}{size:>8}{rounds:>8}{nodes_growth:>14}{bytes_growth:>14}'.format(**r))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+'''
+Microbenchmarks of every fAD/rAD operator, every elemental and the helper functions of Bambanta.AutoDiff.
+
+Usage:
+    python benchmarks/bench_ops.py [--widths 1 10 1000 100000] [--filter REGEX] [--output results.json]
+    python benchmarks/bench_ops.py --compare baseline.json [--threshold 1.25]
+
+Each case is timed as the best of --repeat runs of enough calls to last --min-time seconds,
+and reported in seconds per call. With --compare, the run is checked against a saved --output
+file, and the exit status is 1 if any case got slower than the threshold ratio.
+'''
+import os
+import re
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff
+
+WIDTHS = [1, 10, 1000, 100000]
+
+# comparisons only support single values
+SCALAR_ONLY = {'fAD.eq', 'fAD.ne', 'rAD.eq', 'rAD.ne'}
+
+# create_f and stack_f build n derivatives of width n, stack_r differentiates n functions
+QUADRATIC_LIMIT = 1000
+
+OPERATORS = {
+    'add': lambda x, y: x + y,
+    'radd': lambda x, y: 2.0 + x,
+    'sub': lambda x, y: x - y,
+    'rsub': lambda x, y: 2.0 - x,
+    'mul': lambda x, y: x*y,
+    'rmul': lambda x, y: 2.0*x,
+    'truediv': lambda x, y: x/y,
+    'rtruediv': lambda x, y: 2.0/x,
+    'pow': lambda x, y: x**y,
+    'pow_const': lambda x, y: x**2.5,
+    'rpow': lambda x, y: 2.0**x,
+    'neg': lambda x, y: -x,
+    'abs': lambda x, y: abs(x),
+    'eq': lambda x, y: x == y,
+    'ne': lambda x, y: x != y,
+}
+
+ELEMENTALS = {
+    'sin': AutoDiff.sin,
+    'cos': AutoDiff.cos,
+    'tan': AutoDiff.tan,
+    'arcsin': AutoDiff.arcsin,
+    'arccos': AutoDiff.arccos,
+    'arctan': AutoDiff.arctan,
+    'sinh': AutoDiff.sinh,
+    'cosh': AutoDiff.cosh,
+    'tanh': AutoDiff.tanh,
+    'exp': AutoDiff.exp,
+    'logistic': AutoDiff.logistic,
+    'log': AutoDiff.log,
+    'log_base': lambda x: AutoDiff.log(x, 2),
+    'sqrt': AutoDiff.sqrt,
+}
+
+def _values(width, offset=0.0):
+    # inside (0, 1), so that every elemental is defined
+    return np.linspace(0.1, 0.9, width) + offset
+
+def _fAD(width, offset=0.0):
+    return AutoDiff.fAD(_values(width, offset), np.ones((width, 1)))
+
+def _tree_sum(xs):
+    # pairwise, since rAD.grad() recurses once per level of the graph
+    while len(xs) > 1:
+        xs = [xs[i] + xs[i+1] if i + 1 < len(xs) else xs[i] for i in range(0, len(xs), 2)]
+    return xs[0]
+
+def cases(widths):
+    '''
+    Yield (name, width, make), where make() returns a fresh zero-argument callable to time.
+    '''
+    for width in widths:
+        for name, op in OPERATORS.items():
+            def make_f(op=op, width=width):
+                x, y = _fAD(width), _fAD(width, 0.05)
+                return lambda: op(x, y)
+            def make_r(op=op, width=width):
+                x, y = AutoDiff.rAD(_values(width)), AutoDiff.rAD(_values(width, 0.05))
+                return lambda: op(x, y)
+            if width == 1 or 'fAD.' + name not in SCALAR_ONLY:
+                yield 'fAD.' + name, width, make_f
+            if width == 1 or 'rAD.' + name not in SCALAR_ONLY:
+                yield 'rAD.' + name, width, make_r
+        for name, fn in ELEMENTALS.items():
+            def make_f(fn=fn, width=width):
+                x = _fAD(width)
+                return lambda: fn(x)
+            def make_r(fn=fn, width=width):
+                x = AutoDiff.rAD(_values(width))
+                return lambda: fn(x)
+            def make_n(fn=fn, width=width):
+                x = _values(width)[0] if width == 1 else _values(width)
+                return lambda: fn(x)
+            yield 'fAD.' + name, width, make_f
+            yield 'rAD.' + name, width, make_r
+            yield 'numeric.' + name, width, make_n
+        def make_backward(width=width):
+            def run():
+                x = AutoDiff.rAD(_values(width))
+                f = AutoDiff.sin(x)*x + AutoDiff.exp(x)
+                f.outer()
+                return x.grad()
+            return run
+        yield 'rAD.backward', width, make_backward
+        def make_reset(width=width):
+            xs = AutoDiff.create_r(_values(width)) if width > 1 else [AutoDiff.rAD(0.5)]
+            return lambda: AutoDiff.reset_der(xs)
+        yield 'reset_der', width, make_reset
+        def make_create_r(width=width):
+            vals = _values(width)
+            return lambda: AutoDiff.create_r(vals)
+        yield 'create_r', width, make_create_r
+        if width > QUADRATIC_LIMIT:
+            continue
+        def make_create_f(width=width):
+            vals = _values(width)
+            return lambda: AutoDiff.create_f(vals)
+        yield 'create_f', width, make_create_f
+        def make_stack_f(width=width):
+            xs = AutoDiff.create_f(_values(width)) if width > 1 else [AutoDiff.create_f(0.5)]
+            return lambda: AutoDiff.stack_f(xs)
+        yield 'stack_f', width, make_stack_f
+        def make_stack_r(width=width):
+            vals = _values(width)
+            # every input is used, since stack_r needs a gradient for each
+            functions = [lambda *xs: xs[0]*xs[-1] + AutoDiff.sin(_tree_sum(xs))]*min(width, 10)
+            return lambda: AutoDiff.stack_r(vals, functions)
+        yield 'stack_r', width, make_stack_r
+
+def measure(make, repeat, min_time):
+    '''
+    Best time per call, in seconds, over repeat runs each lasting at least min_time.
+    Every run times a fresh callable, so reverse-mode graphs do not grow across runs.
+    '''
+    once = timeit.Timer(make()).timeit(1)
+    number = max(1, int(min_time/max(once, 1e-7)))
+    best = float('inf')
+    for _ in range(repeat):
+        best = min(best, timeit.Timer(make()).timeit(number)/number)
+    return best, number
+
+def run(widths, pattern, repeat, min_time):
+    results = []
+    with np.errstate(all='ignore'):
+        for name, width, make in cases(widths):
+            if pattern and not re.search(pattern, name):
+                continue
+            seconds, number = measure(make, repeat, min_time)
+            results.append({'name': name, 'width': width, 'seconds': seconds, 'number': number})
+    return {'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                     'machine': platform.machine(), 'platform': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+def compare(baseline, current, threshold):
+    '''
+    Print the ratio of every case to the baseline, returning the cases slower than threshold.
+    '''
+    base = {(r['name'], r['width']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    print('{:<22}{:>8}{:>14}{:>14}{:>8}'.format('case', 'width', 'baseline', 'current', 'ratio'))
+    for r in current['results']:
+        key = (r['name'], r['width'])
+        if key not in base:
+            continue
+        ratio = r['seconds']/base[key]
+        flag = ''
+        if ratio > threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print('{:<22}{:>8}{:>14.3e}{:>14.3e}{:>8.2f}{}'.format(key[0], key[1], base[key], r['seconds'], ratio, flag))
+    print('{} of {} cases slower than {:.2f}x the baseline'.format(len(regressions), len(current['results']), threshold))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--widths', type=int, nargs='+', default=WIDTHS)
+    parser.add_argument('--filter', default=None, help='regular expression selecting case names')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.02, help='seconds per timed run')
+    parser.add_argument('--output', default=None, help='write the results as JSON to this file')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--compare', default=None, help='baseline JSON file written by --output')
+    parser.add_argument('--threshold', type=float, default=1.25, help='ratio to the baseline flagged as a regression')
+    args = parser.parse_args()
+
+    current = run(args.widths, args.filter, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(current, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
+    elif args.json:
+        print(json.dumps(current, indent=2))
+    else:
+        print('{:<22}{:>8}{:>14}'.format('case', 'width', 'seconds'))
+        for r in current['results']:
+            print('{name:<22}{width:>8}{seconds:>14.3e}'.format(**r))
+
+if __name__ == '__main__':
+    main()
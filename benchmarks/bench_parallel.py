@@ -0,0 +1,77 @@
+'''
+Speedup of the process-pool drivers in Bambanta.Parallel by worker count.
+
+Usage:
+    python benchmarks/bench_parallel.py [--inputs 8] [--outputs 16] [--points 32] [--work 200] [--json]
+'''
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff, Parallel
+
+WORK = 200
+
+def expensive(*xs, work=WORK):
+    '''
+    A scalar function whose cost is dominated by repeated elementals.
+    '''
+    total = 0
+    for k in range(work):
+        for x in xs:
+            total = total + AutoDiff.sin(x*(k+1))*AutoDiff.exp(-x)
+    return total
+
+def vector_expensive(*xs, work=WORK):
+    return [expensive(*xs, work=work) for _ in range(2)]
+
+def _time(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--inputs', type=int, default=8)
+    parser.add_argument('--outputs', type=int, default=16)
+    parser.add_argument('--points', type=int, default=32)
+    parser.add_argument('--work', type=int, default=WORK)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    # the amount of work travels with the pickled callables, which also holds for spawned workers
+    scalar = functools.partial(expensive, work=args.work)
+    vector = functools.partial(vector_expensive, work=args.work)
+
+    vals = np.linspace(0.1, 1.0, args.inputs)
+    points = np.tile(vals, (args.points, 1))
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, 16, 32, 64, cpus} & set(range(1, cpus+1)))
+
+    jobs = {
+        'parallel_r': lambda w: Parallel.parallel_r(vals, [scalar]*args.outputs, workers=w),
+        'parallel_f': lambda w: Parallel.parallel_f(scalar, vals, workers=w, chunk=1),
+        'batch_f': lambda w: Parallel.batch_f(vector, points, workers=w),
+    }
+    results = []
+    for name, job in jobs.items():
+        base = None
+        for w in counts:
+            seconds = _time(lambda: job(w))
+            base = base or seconds
+            results.append({'driver': name, 'workers': w, 'seconds': seconds, 'speedup': base/seconds})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('{:<12}{:>8}{:>12}{:>10}'.format('driver', 'workers', 'seconds', 'speedup'))
+        for r in results:
+            print('{driver:<12}{workers:>8}{seconds:>12.4f}{speedup:>10.2f}'.format(**r))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+'''
+Load test of the batching evaluation server: throughput and latency for many concurrent clients.
+
+Usage:
+    python benchmarks/bench_server.py [--clients 64] [--requests 50] [--windows 0 0.002] [--json]
+
+For every latency window, a server is started in a separate process on a free
+localhost port. Every client opens its own connection and sends its requests
+one after another, each waiting for the previous response, so that requests
+from different clients arrive together. The first row is a server evaluating
+every request on its own (max_batch=1), for reference. A window of 0 batches
+the requests that the server reads together; longer windows wait for more.
+'''
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff, Server
+
+INPUTS = 4
+
+def model(a, b, c, d):
+    # a small network of elementals, with two outputs
+    h1 = AutoDiff.tanh(a*b + c - d/2)
+    h2 = AutoDiff.logistic(a - b*c + d)
+    h3 = AutoDiff.sin(h1*h2 + a*d)
+    return [h1*h3 + AutoDiff.exp(-h2**2), AutoDiff.log(1 + h1**2 + h2**2)*h3]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def serve(port, window, max_batch):
+    Server.serve({'model': model}, port=port, window=window, max_batch=max_batch)
+
+async def connect(port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return await Server.Client(port=port).connect()
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+async def load(port, clients, requests):
+    rng = np.random.default_rng(0)
+    connections = [await connect(port) for _ in range(clients)]
+    latencies = []
+
+    async def run(client):
+        for x in rng.uniform(-1.0, 1.0, (requests, INPUTS)):
+            start = time.perf_counter()
+            await client.evaluate('model', x)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[run(c) for c in connections])
+    seconds = time.perf_counter() - start
+    for c in connections:
+        await c.close()
+    return seconds, np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=50, help='requests per client')
+    parser.add_argument('--windows', type=float, nargs='*', default=[0.0, 0.002])
+    parser.add_argument('--serve', type=float, nargs=3, metavar=('PORT', 'WINDOW', 'MAX_BATCH'), help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    if args.serve:
+        serve(int(args.serve[0]), args.serve[1], int(args.serve[2]))
+        return
+
+    results = []
+    for window, max_batch in [(0.0, 1)] + [(w, 1024) for w in args.windows]:
+        port = free_port()
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve',
+                                    str(port), str(window), str(max_batch)])
+        try:
+            seconds, latencies = asyncio.run(load(port, args.clients, args.requests))
+        finally:
+            process.terminate()
+            process.wait()
+        total = args.clients*args.requests
+        results.append({'window': window, 'max_batch': max_batch, 'clients': args.clients, 'requests': total,
+                        'seconds': seconds, 'requests_per_s': total/seconds,
+                        'p50_ms': 1000*np.percentile(latencies, 50), 'p99_ms': 1000*np.percentile(latencies, 99)})
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('{:>10}{:>10}{:>10}{:>10}{:>10}{:>12}{:>10}{:>10}'.format('window', 'max batch', 'clients', 'requests', 's', 'requests/s', 'p50 ms', 'p99 ms'))
+    for r in results:
+        print('{window:>10}{max_batch:>10}{clients:>10}{requests:>10}{seconds:>10.3f}{requests_per_s:>12.0f}{p50_ms:>10.2f}{p99_ms:>10.2f}'.format(**r))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+'''
+Peak memory and throughput of streaming a loss and its gradient over memory-mapped datasets.
+
+Usage:
+    python benchmarks/bench_streaming.py [--rows 100000 1000000] [--chunk 65536] [--json]
+
+For every dataset size, features and targets are written to .npy files in a
+temporary directory, then Bambanta.Streaming.value_and_grad() evaluates a
+logistic regression loss over them. The peak traced bytes stay near those of
+one chunk while the dataset grows.
+'''
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from Bambanta import AutoDiff, Streaming
+
+FEATURES = 8
+
+def loss(w, b, X, y):
+    z = X @ w + b
+    return np.sum(AutoDiff.softplus(z) - y*z)
+
+def write(directory, rows):
+    rng = np.random.default_rng(0)
+    X = np.lib.format.open_memmap(os.path.join(directory, 'X.npy'), mode='w+', shape=(rows, FEATURES))
+    y = np.lib.format.open_memmap(os.path.join(directory, 'y.npy'), mode='w+', shape=(rows,))
+    for start in range(0, rows, 100000):
+        stop = min(start + 100000, rows)
+        X[start:stop] = rng.standard_normal((stop - start, FEATURES))
+        y[start:stop] = X[start:stop, 0] > 0
+    X.flush()
+    y.flush()
+    del X, y
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='*', default=[100000, 1000000])
+    parser.add_argument('--chunk', type=int, default=65536)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        data = [os.path.join(directory, 'X.npy'), os.path.join(directory, 'y.npy')]
+        for rows in args.rows:
+            write(directory, rows)
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            Streaming.value_and_grad(loss, [np.zeros(FEATURES), 0.0], data, chunk=args.chunk)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append({'rows': rows, 'chunk': args.chunk, 'dataset_bytes': rows*(FEATURES + 1)*8,
+                            'peak_bytes': peak, 'seconds': seconds, 'rows_per_s': rows/seconds})
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('{:>10}{:>8}{:>16}{:>14}{:>10}{:>14}'.format('rows', 'chunk', 'dataset bytes', 'peak bytes', 's', 'rows/s'))
+    for r in results:
+        print('{rows:>10}{chunk:>8}{dataset_bytes:>16}{peak_bytes:>14}{seconds:>10.3f}{rows_per_s:>14.0f}'.format(**r))
+
+if __name__ == '__main__':
+    main()